@@ -0,0 +1,98 @@
+"""
+Micro-benchmark of BitField.render_int() and BitField.render_ints() against the string based implementation they
+replaced. Before timing, it checks that the output is byte for byte identical for random values (negative and out of
+range values included) of every bit width from 1 to 64, both endians, signed and unsigned, binary and ascii.
+
+Usage: python benchmarks/render_int.py [values_per_case]
+"""
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fuzzowski.constants import LITTLE_ENDIAN, BIG_ENDIAN
+from fuzzowski.mutants.primitives.bit_field import BitField, binary_string_to_int, int_to_binary_string
+
+
+def legacy_render_int(value, output_format, bit_width, endian, signed):
+    """
+    The previous implementation of BitField.render_int(), through strings of '0' and '1'
+    """
+    if output_format == "binary":
+        bit_stream = ""
+        rendered = b""
+        if bit_width % 8 == 0:
+            bit_stream += int_to_binary_string(value, bit_width)
+        else:
+            bit_stream = "0" * (8 - (bit_width % 8))
+            bit_stream += int_to_binary_string(value, bit_width)
+        for i in range(len(bit_stream) // 8):
+            chunk = bit_stream[8 * i:8 * i + 8]
+            rendered += struct.pack("B", binary_string_to_int(chunk))
+        if endian == LITTLE_ENDIAN:
+            bytes_list = list(rendered)
+            bytes_list.reverse()
+            rendered = bytes(bytes_list)
+        _rendered = rendered
+    else:
+        if signed and int_to_binary_string(value, bit_width)[0] == "1":
+            max_num = binary_string_to_int("1" + "0" * (bit_width - 1))
+            val = value & binary_string_to_int("1" * (bit_width - 1))
+            val = max_num - val - 1
+            _rendered = "%d" % ~val
+        else:
+            _rendered = "%d" % value
+    if isinstance(_rendered, str):
+        _rendered = _rendered.encode()
+    return _rendered
+
+
+def check_identical(values_per_case):
+    rng = random.Random(0)
+    cases = 0
+    for bit_width in range(1, 65):
+        values = [0, 1, -1, (1 << bit_width) - 1, 1 << bit_width, 1 << (bit_width - 1)]
+        values += [rng.randrange(-(1 << (bit_width + 1)), 1 << (bit_width + 1)) for _ in range(values_per_case)]
+        for output_format in ('binary', 'ascii'):
+            for endian in (LITTLE_ENDIAN, BIG_ENDIAN):
+                for signed in (False, True):
+                    if signed and output_format == 'ascii' and bit_width == 1:
+                        continue  # the previous implementation raised ValueError
+                    args = (output_format, bit_width, endian, signed)
+                    expected = [legacy_render_int(value, *args) for value in values]
+                    assert [BitField.render_int(value, *args) for value in values] == expected, args
+                    assert BitField.render_ints(values, *args) == expected, args
+                    cases += len(values)
+    return cases
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(values_per_case):
+    print(f'{check_identical(values_per_case)} renders identical to the previous implementation')
+
+    print(f'{"field":<24} {"values":>7} {"legacy us":>10} {"render_int us":>14} {"render_ints us":>15} {"speedup":>8}')
+    rng = random.Random(1)
+    for bit_width, endian, output_format in ((8, LITTLE_ENDIAN, 'binary'), (16, BIG_ENDIAN, 'binary'),
+                                             (32, LITTLE_ENDIAN, 'binary'), (64, BIG_ENDIAN, 'binary'),
+                                             (12, LITTLE_ENDIAN, 'binary'), (32, LITTLE_ENDIAN, 'ascii')):
+        values = [rng.randrange(1 << bit_width) for _ in range(10000)]
+        args = (output_format, bit_width, endian, False)
+        legacy = timed(lambda: [legacy_render_int(value, *args) for value in values], 3)
+        single = timed(lambda: [BitField.render_int(value, *args) for value in values], 10)
+        batch = timed(lambda: BitField.render_ints(values, *args), 10)
+        name = f'{bit_width} bits {output_format} {endian}'
+        print(f'{name:<24} {len(values):>7} {legacy / len(values) * 1e6:>10.3f} {single / len(values) * 1e6:>14.3f} '
+              f'{batch / len(values) * 1e6:>15.3f} {legacy / single:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
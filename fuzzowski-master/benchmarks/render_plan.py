@@ -0,0 +1,51 @@
+"""
+Benchmark of Request.render() against the compiled RenderPlan used by TestCase.transmit, on the requests of the bundled
+IPP and BACnet fuzzers. It also checks that both renders are identical for every test case measured.
+
+Usage: python benchmarks/render_plan.py [max_cases_per_request]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fuzzowski.fuzzers.bacnet.bacnet import BACnet
+from fuzzowski.fuzzers.ipp.ipp import IPP
+from fuzzowski.mutants.spike import s_get
+
+
+def measure(request, render, max_cases):
+    """
+    Move the request to each test case with goto() and time only the render of each one
+    """
+    rendered = []
+    elapsed = 0
+    for mutant_index in range(1, min(max_cases, request.num_mutations) + 1):
+        request.goto(mutant_index)
+        start = time.perf_counter()
+        data = render()
+        elapsed += time.perf_counter() - start
+        rendered.append(data)
+    request.reset()
+    return elapsed, rendered
+
+
+def main(max_cases):
+    IPP.define_nodes(host='127.0.0.1', port=631)
+    BACnet.define_nodes()
+    requests = [s_get(r.__name__) for r in IPP.get_requests() + BACnet.get_requests()]
+
+    print(f'{"request":<32} {"cases":>6} {"render() us":>12} {"plan us":>9} {"speedup":>8}')
+    for request in requests:
+        plan = request.compile()
+        time_render, expected = measure(request, request.render, max_cases)
+        time_plan, rendered = measure(request, plan.render, max_cases)
+        assert rendered == expected, f'{request.name}: compiled render differs from render()'
+        cases = len(expected)
+        print(f'{request.name:<32} {cases:>6} {time_render / cases * 1e6:>12.1f} {time_plan / cases * 1e6:>9.1f} '
+              f'{time_render / time_plan:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -19,6 +19,8 @@ from .connections import ITargetConnection
 from .exception import FuzzowskiRuntimeError, SizerNotUtilizedError, MustImplementException
 from .connections import SocketConnection, TelnetConnection
 from .connections.target import Target
+from .connections.completion import Completion, FixedLength, LengthPrefix, ContentLength, Delimiter, RegexMatch, \
+    PeerClose
 from .loggers import IFuzzLogger
 from .mutants import Request
 from .mutants.spike import *
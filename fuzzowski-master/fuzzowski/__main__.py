@@ -20,9 +20,11 @@ import hashlib
 import sys
 
 from fuzzowski import *
+from fuzzowski.connections.completion import completion_from_string
 from fuzzowski.fuzzers import IFuzzer
 from fuzzowski.mutants import REQUESTS, String
 from fuzzowski.restarters import IRestarter
+from fuzzowski.schedulers import IScheduler
 from fuzzowski.monitors import IMonitor, IThreadMonitor
 
 from fuzzowski.session import Session
@@ -50,25 +52,12 @@ class Fuzzowski(object):
         self._init_argparser()
         self.args = self._parse_args()
 
-        # Create session
-        if self.args.protocol == 'telnet':  # TODO: Set this automatically from fuzzers without modifying main program!
-            # TODO: 意思是从fuzzer包来进行设置，而并非在main程序中改变
-            self.target = Target(connection=TelnetConnection(self.args.host,
-                                                             port=self.args.port,
-                                                             timeout=self.args.recv_timeout,
-                                                             username=self.args.username,
-                                                             password=self.args.password
-                                                             )
-                                 )
-        else:
-            self.target = Target(connection=SocketConnection(self.args.host,
-                                                             self.args.port,
-                                                             proto=self.args.protocol,
-                                                             bind=self.args.bind,
-                                                             send_timeout=self.args.send_timeout,
-                                                             recv_timeout=self.args.recv_timeout
-                                                             )  # Socket的参数
-                                 )
+        try:
+            completions = [completion_from_string(spec) for spec in self.args.recv_completions]
+        except FuzzowskiRuntimeError as e:
+            print(e)
+            exit(1)
+        self.target = self._create_target(self.args.host, self.args.port, completions)
 
         self.session = Session(session_filename=self.session_filename,
                                sleep_time=self.args.sleep_time,
@@ -85,8 +74,22 @@ class Fuzzowski(object):
                                restarter=self.restart_module,
                                monitors=self.monitors,
                                new_connection_between_requests=self.args.new_connection_between_requests,
-                               transmit_full_path=self.args.transmit_full_path
+                               transmit_full_path=self.args.transmit_full_path,
+                               combination_strength=self.args.combination_strength,
+                               combination_mutants=self.args.combination_mutants,
+                               scheduler=self.scheduler,
+                               sample_budget=self.args.sample_budget,
+                               sample_seed=self.args.sample_seed,
+                               sample_weights=self.args.sample_weights,
+                               deduplicate=self.args.deduplicate,
+                               fuzz_requests_once=self.args.fuzz_requests_once,
+                               canonical_paths=self.args.canonical_paths,
+                               in_flight=self.args.in_flight,
+                               case_timeout=self.args.case_timeout
                                )
+        for host, port in self.args.parallel_targets:
+            self.session.add_target(self._create_target(host, port, completions),
+                                    restarter=self._create_restarter(host, port))
 
         # Connect nodes of graph
         if self.args.fuzz_protocol == 'raw' and self.fuzz_requests is not None:
@@ -143,6 +146,18 @@ class Fuzzowski(object):
         conn_grp.add_argument('-nc', '--new-conns', dest='new_connection_between_requests',
                               help="Open a new connection after each packet of the same test",
                               action='store_true')  # nc 新链接，在请求之间建立 在每一个相同测试用例后简历一个新的连接
+        conn_grp.add_argument('--reuse-conn', dest='reuse_connection', action='store_true', default=False,
+                              help="Keep the connection open between test cases, reopening it only when the target "
+                                   "closes or resets it (e.g. HTTP keep-alive, MODBUS/TCP)")
+        conn_grp.add_argument('--in-flight', dest='in_flight', type=int, default=1, metavar='K',
+                              help="Keep K test cases transmitting at the same time, each one in its own connection "
+                                   "(TCP and SSL only, Default 1)")
+        conn_grp.add_argument('--case-timeout', dest='case_timeout', type=float, default=None,
+                              help="With --in-flight, abort a test case after this number of seconds")
+        conn_grp.add_argument('--parallel-targets', dest='parallel_targets', nargs='+', default=[],
+                              metavar='HOST:PORT',
+                              help="Run the test cases in parallel in other instances of the target, with the same "
+                                   "options. The restarter args can use {host} and {port} to restart each instance")
         conn_grp.add_argument('-tn', '--transmit_full_path', dest='transmit_full_path',
                               help="Transmit the next node in the graph of the fuzzed node",
                               action='store_true')  # tn 发送被模糊节点图中的下一个节点
@@ -156,6 +171,16 @@ class Fuzzowski(object):
         recv_grp.add_argument('-cr', '--check-recv', dest='check_data_received_each_request',
                               help="Check that data has been received in recv()",
                               action='store_true')  # 检查刚刚接收的数据
+        recv_grp.add_argument('--recv-until', dest='recv_completions', nargs='+', default=[], metavar='COMPLETION',
+                              help="Stop recv() as soon as the reply is complete instead of waiting for the recv "
+                                   "timeout: length:<n>, prefix:<offset>:<size>[:<adjust>[:little]] (length field), "
+                                   "http (Content-Length), delim:<delimiter>, regex:<regex> or close. Completions "
+                                   "defined in the requests take precedence")
+        recv_grp.add_argument('--adaptive-timeout', dest='adaptive_timeout', action='store_true', default=False,
+                              help="Learn the time the target takes to reply to each request (like the TCP RTO) and "
+                                   "wait only that long in recv(), up to the recv timeout")
+        recv_grp.add_argument('--timeout-floor', dest='timeout_floor', type=float, default=0.05,
+                              help="Minimum adaptive timeout in seconds (Default 0.05)")
 
         crash_grp = self.parser.add_argument_group('Crashes Options')
         crash_grp.add_argument("--threshold-request", dest="crash_threshold_request", type=int, default=9999,
@@ -184,6 +209,39 @@ class Fuzzowski(object):
         fuzz_grp_opts.add_argument('--file', dest='filename', help='Use contents of a file for fuzz mutations')
         # 使用文件的内容进行模糊突变  即，用户可以指定用来fuzz的内容。
 
+        fuzz_grp.add_argument('--combine', dest='combination_strength', type=int, nargs='?', const=2, default=0,
+                              metavar='N',
+                              help="Mutate several fields at once, covering every combination of mutations of any N "
+                                   "fields (Default N=2, pairwise)")
+        # 组合模式：同时变异多个字段，覆盖任意N个字段的所有变异组合
+        fuzz_grp.add_argument('--combine-mutants', dest='combination_mutants', nargs='+', default=None,
+                              metavar='REQUEST.MUTANT',
+                              help="Mutants combined with --combine (Default all the fuzzable mutants)")
+        schedulers_help = 'Order of the test cases (Default declaration order). Scheduler Modules:\n'
+        for scheduler in IScheduler.__subclasses__():
+            schedulers_help += '  {}: {}\n'.format(scheduler.name(), scheduler.help())
+        fuzz_grp.add_argument('--scheduler', nargs='+', default=[], metavar=('module_name', 'args'),
+                              help=schedulers_help)
+        # 调度器：决定测试用例的执行顺序
+        fuzz_grp.add_argument('--budget', dest='sample_budget', type=int, default=0, metavar='N',
+                              help="Run only a sample of N test cases, stratified by mutant and mutation type")
+        fuzz_grp.add_argument('--budget-seed', dest='sample_seed', type=int, default=0, metavar='SEED',
+                              help="Seed of the --budget sample (Default 0)")
+        fuzz_grp.add_argument('--budget-weights', dest='sample_weights', nargs='+', default=None,
+                              metavar='KEY=WEIGHT',
+                              help="Weights of the mutants in the --budget sample. KEY is request.mutant, request or a "
+                                   "mutant type, e.g. String=4 (Default 1, 0 to exclude)")
+        # 抽样预算：只执行N个分层抽样的测试用例
+        fuzz_grp.add_argument('--once', dest='fuzz_requests_once', action='store_true', default=False,
+                              help="Fuzz each request in only one path, instead of in every path where it is")
+        fuzz_grp.add_argument('--canonical-paths', dest='canonical_paths', nargs='+', default=None,
+                              metavar='R1->R2',
+                              help="Paths where the requests are fuzzed with --once (Default the path where each "
+                                   "request is reached first)")
+        # 每个请求只在一条路径中fuzz一次
+        fuzz_grp.add_argument('--dedup', dest='deduplicate', action='store_true', default=False,
+                              help="Skip the test cases whose payload was already sent in the same path")
+
         fuzzers = [fuzzer_class.name for fuzzer_class in IFuzzer.__subclasses__()] + ['raw']
         protocols_help = 'Requests of the protocol to fuzz, default All\n'
         # 默认情况下，用来进行fuzz请求中的协议。
@@ -240,6 +298,28 @@ class Fuzzowski(object):
             fuzz_opts = 'callback'
         else:
             fuzz_opts = 'default'
+        if args.combination_mutants and not args.combination_strength:
+            args.combination_strength = 2
+        if args.combination_strength:
+            # The test case ids of the combination mode are different, do not mix their sessions
+            fuzz_opts += f'_combine{args.combination_strength}'
+        if args.scheduler:
+            # The position in the schedule is saved in the session file
+            fuzz_opts += '_' + '_'.join(args.scheduler)
+        if args.canonical_paths:
+            args.fuzz_requests_once = True
+        if args.fuzz_requests_once:
+            # The test case ids change when each request is fuzzed only once
+            fuzz_opts += '_once'
+            if args.canonical_paths:
+                fuzz_opts += '_' + hashlib.md5(', '.join(args.canonical_paths).encode('utf-8')).hexdigest()
+        if args.sample_budget:
+            if args.scheduler:
+                print('--budget can not be used with --scheduler')
+                exit(1)
+            fuzz_opts += f'_budget{args.sample_budget}_{args.sample_seed}'
+            if args.sample_weights:
+                fuzz_opts += '_' + '_'.join(args.sample_weights)
 
         if args.fuzz_protocol == 'raw':  # Raw chosen, lets define packets
             if not args.fuzz_requests:
@@ -281,15 +361,37 @@ class Fuzzowski(object):
                 reqs
             )
 
-        self.restart_module = None
+        self.restart_class = None
+        self.restart_args = args.restart[1:]
         if len(args.restart) > 0:
             try:
-                restart_module = [mod for mod in IRestarter.__subclasses__() if mod.name() == args.restart[0]][0]
-                restart_args = args.restart[1:]
-                self.restart_module = restart_module(*restart_args)
+                self.restart_class = [mod for mod in IRestarter.__subclasses__() if mod.name() == args.restart[0]][0]
             except IndexError:
                 print(f"The restarter module {args.restart[0]} does not exist!")
                 exit(1)
+        self.restart_module = self._create_restarter(args.host, args.port)
+
+        parallel_targets = []
+        for spec in args.parallel_targets:
+            host, _, port = spec.rpartition(':')
+            if not host or not port.isdigit():
+                print(f"Invalid parallel target {spec}, use HOST:PORT")
+                exit(1)
+            parallel_targets.append((host, int(port)))
+        args.parallel_targets = parallel_targets
+
+        self.scheduler = None
+        if len(args.scheduler) > 0:
+            try:
+                scheduler_module = [mod for mod in IScheduler.__subclasses__() if mod.name() == args.scheduler[0]][0]
+            except IndexError:
+                print(f"The scheduler module {args.scheduler[0]} does not exist!")
+                exit(1)
+            try:
+                self.scheduler = scheduler_module(*args.scheduler[1:])
+            except FuzzowskiRuntimeError as e:
+                print(str(e))
+                exit(1)
 
         self.monitors = []
         if len(args.monitors) > 0:
@@ -300,6 +402,45 @@ class Fuzzowski(object):
 
     # --------------------------------------------------------------- #
 
+    def _create_target(self, host: str, port: int, completions: list) -> Target:
+        """Creates a Target with the connection options of the arguments"""
+        target_options = {'adaptive_timeout': self.args.adaptive_timeout,
+                          'timeout_floor': min(self.args.timeout_floor, self.args.recv_timeout),
+                          'timeout_ceiling': self.args.recv_timeout,
+                          'reuse_connection': self.args.reuse_connection}
+
+        if self.args.protocol == 'telnet':  # TODO: Set this automatically from fuzzers without modifying main program!
+            # TODO: 意思是从fuzzer包来进行设置，而并非在main程序中改变
+            return Target(connection=TelnetConnection(host,
+                                                      port=port,
+                                                      timeout=self.args.recv_timeout,
+                                                      username=self.args.username,
+                                                      password=self.args.password
+                                                      ),
+                          completions=completions,
+                          **target_options
+                          )
+        else:
+            return Target(connection=SocketConnection(host,
+                                                      port,
+                                                      proto=self.args.protocol,
+                                                      bind=self.args.bind,
+                                                      send_timeout=self.args.send_timeout,
+                                                      recv_timeout=self.args.recv_timeout
+                                                      ),  # Socket的参数
+                          completions=completions,
+                          **target_options
+                          )
+
+    def _create_restarter(self, host: str, port: int) -> IRestarter or None:
+        """Creates the restarter of a target, replacing {host} and {port} in the restarter args"""
+        if self.restart_class is None:
+            return None
+        return self.restart_class(*[arg.replace('{host}', host).replace('{port}', str(port))
+                                    for arg in self.restart_args])
+
+    # --------------------------------------------------------------- #
+
     def _set_file_for_strings(self, block_list: "list of IFuzzable", filename: str) -> None:
         """
         Walk the nodes setting a filename for the strings to replace the fuzzing library
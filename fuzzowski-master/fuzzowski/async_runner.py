@@ -0,0 +1,393 @@
+import asyncio
+import collections
+import time
+from typing import Deque, List, Optional, TYPE_CHECKING
+
+from fuzzowski import exception
+from fuzzowski.connections import SocketConnection
+from fuzzowski.connections.async_socket_connection import AsyncSocketConnection
+from fuzzowski.connections.target import log_send_info, log_send_prefix
+from fuzzowski.ip_constants import DEFAULT_MAX_RECV
+from fuzzowski.mutants.blocks import Request
+from fuzzowski.testcase import TestCase
+
+if TYPE_CHECKING:
+    from fuzzowski.session import Session
+
+
+class _Step(object):
+    """A request of the path of an _AsyncTestCase, rendered when the test case is dispatched"""
+
+    def __init__(self, request: Request, segments: List[bytes], fuzzed: bool, original: bool):
+        self.request = request
+        self.segments = segments
+        self.fuzzed = fuzzed
+        self.original = original  # Sent before the fuzzed request, transmission errors are not caused by the fuzzing
+
+
+class _AsyncTestCase(object):
+    """
+    A TestCase run by the AsyncRunner. The transmission only records what happened (log entries, errors and if it is
+    a suspect), the session is updated when the test case is collected, in the order of the test cases.
+    """
+
+    def __init__(self, test_case: TestCase, steps: List[_Step]):
+        self.test_case = test_case
+        self.steps = steps
+        self.task: Optional[asyncio.Task] = None
+        self.log_entries = []  # (FuzzLogger method name, argument)
+        self.errors = []
+        self.suspect = False
+        self.connect_error: Optional[Exception] = None
+        self.connect_failed_at: Optional[float] = None
+        self.last_connect_before_failure: Optional[float] = None
+        self.sent_at: Optional[float] = None  # When the first data was sent
+        self.finished_at: Optional[float] = None
+
+    def log(self, method: str, argument):
+        self.log_entries.append((method, argument))
+
+    def reset(self):
+        """Forgets the results, to run the test case again"""
+        self.__init__(self.test_case, self.steps)
+
+
+class AsyncRunner(object):
+    """
+    Runs the test cases of a Session with asyncio, keeping up to in_flight test cases transmitting at the same time,
+    each one in its own AsyncSocketConnection. The results are collected in the order of the test cases: the log of
+    each test case is written when it is collected, and only then it is added to the latest tests and as a suspect.
+    异步执行测试用例，同时保持in_flight个测试用例在传输中，按顺序收集结果
+
+    When a test case can not connect to the target, all the test cases that sent data after the last successful
+    connection before the failure, or were still sending after it, are suspects: with one test case in flight this
+    is the last test case, like in TestCase.run(). New test cases are not dispatched until the target recovers
+    (with the restarter of the session, if any), then the test cases that could not connect run again.
+
+    The payloads are rendered when the test case is dispatched, so paths where a request with Responses is followed
+    by other requests are not supported, as the variables set by the Responses would not be updated when the requests
+    after it are rendered. Paths with callbacks are not supported, as callbacks use the synchronous Target, nor
+    learning the RTT of the paths before fuzzing them, as it would block the event loop (the adaptive timeouts are
+    learned from the replies to the test cases).
+    """
+
+    def __init__(self, session: 'Session', in_flight: int = 8, case_timeout: float = None):
+        """
+        Args:
+            session: The session, it must have a TCP or SSL SocketConnection target
+            in_flight: (Optional, def=8) Maximum number of test cases transmitting at the same time
+            case_timeout: (Optional, def=None) Seconds a test case can take, it is aborted after that
+        """
+        if in_flight < 1:
+            raise exception.FuzzowskiRuntimeError(f'Invalid number of test cases in flight: {in_flight}')
+        connection = session.target.target_connection if session.target is not None else None
+        if not isinstance(connection, SocketConnection) or connection.proto not in AsyncSocketConnection._PROTOCOLS:
+            raise exception.FuzzowskiRuntimeError('Running test cases in flight needs a TCP or SSL SocketConnection')
+        for path in session.graph.path_iterator():
+            for edge in path:
+                if edge.callback is not None:
+                    raise exception.FuzzowskiRuntimeError(f'Running test cases in flight does not support callbacks '
+                                                          f'({edge.src.name}->{edge.dst.name})')
+            # The payloads are rendered when a test case is dispatched, before the responses of the requests sent
+            # before the fuzzed one are parsed, so the variables they set would be outdated
+            for edge in path[:-1]:
+                if len(edge.dst.responses) > 0:
+                    raise exception.FuzzowskiRuntimeError(f'Running test cases in flight does not support Responses '
+                                                          f'in requests followed by others ({edge.dst.name})')
+        self.session = session
+        self.in_flight = in_flight
+        self.case_timeout = case_timeout
+        self._connection = connection
+        self._last_connect = float('-inf')  # Last time a connection to the target succeeded
+        self._recent: Deque[_AsyncTestCase] = collections.deque(maxlen=4 * in_flight)
+        self._exhausted = False
+
+    def run_all(self):
+        """
+        Runs test cases from the actual one until the session is paused or the test cases are exhausted, like
+        Session.run_all(). When it returns, the actual test case of the session is the first one not collected.
+        """
+        self._exhausted = False
+        # A loop of its own, like asyncio.run() (Python 3.7+) does
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._run_all())
+        finally:
+            # The test cases still in flight if _run_all() raised are among the latest ones started
+            tasks = [case.task for case in self._recent if case.task is not None and not case.task.done()]
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            asyncio.set_event_loop(None)
+            loop.close()
+            self.session._forget_taken()
+            if self._exhausted:
+                self.session.is_paused = True
+
+    async def _run_all(self):
+        session = self.session
+        pending: Deque[_AsyncTestCase] = collections.deque()
+        while True:
+            while not self._exhausted and not session.is_paused and len(pending) < self.in_flight:
+                case = self._dispatch_next()
+                if case is not None:
+                    pending.append(case)
+            if not pending:
+                return
+            case = pending.popleft()
+            await case.task
+            if case.connect_error is None:
+                await self._collect(case)
+                continue
+
+            # The target seems down: wait for the test cases in flight and blame the ones sent before the failure
+            await asyncio.gather(*(other.task for other in pending))
+            self._add_suspects(case)
+            session.restart_target()
+            try:
+                case.test_case.wait_until_target_recovered()
+            except exception.FuzzowskiPaused:
+                # Not recovered, the test cases not collected run again when the session continues
+                session.goto(case.test_case.id)
+                return
+            for retry in [case] + [other for other in pending if other.connect_error is not None]:
+                retry.reset()
+                self._start(retry)
+            pending.appendleft(case)
+
+    # --------------------------------------------------------------- #
+
+    def _dispatch_next(self) -> Optional[_AsyncTestCase]:
+        """
+        Starts the transmission of the actual test case of the session and goes to the next one, like
+        Session.run_next() does
+
+        Returns: The test case started, None if it was skipped
+        """
+        session = self.session
+        # When the test cases are exhausted, the session is paused once the test cases in flight are collected, so
+        # the target can still be waited for
+        test_case, self._exhausted = session._take_next()
+        if test_case is None:
+            return None
+        case = _AsyncTestCase(test_case, self._steps(test_case))
+        self._start(case)
+        return case
+
+    @staticmethod
+    def _steps(test_case: TestCase) -> List[_Step]:
+        """The requests of the path of the test case, with the payloads rendered as TestCase.run() sends them"""
+        steps = []
+        fuzzed_sent = False
+        for edge, payload in zip(test_case.path, test_case.payloads):
+            request = edge.dst
+            fuzzed = request == test_case.request
+            steps.append(_Step(request, payload, fuzzed, not fuzzed and not fuzzed_sent))
+            fuzzed_sent = fuzzed_sent or fuzzed
+        return steps
+
+    def _start(self, case: _AsyncTestCase):
+        self._recent.append(case)
+        case.task = asyncio.ensure_future(self._run_case(case))
+
+    # --------------------------------------------------------------- #
+
+    async def _run_case(self, case: _AsyncTestCase):
+        """Transmits a test case, with the case timeout"""
+        connection = AsyncSocketConnection.from_connection(self._connection)
+        try:
+            if self.case_timeout is None:
+                await self._transmit_case(connection, case)
+            else:
+                await asyncio.wait_for(self._transmit_case(connection, case), self.case_timeout)
+        except asyncio.TimeoutError:
+            # Like a reply that is not received in TestCase.transmit()
+            e = exception.FuzzowskiTargetRecvTimeout(f'Test case aborted, it took more than {self.case_timeout} '
+                                                     f'seconds')
+            case.errors.append(e)
+            if self.session.opts.check_data_received_each_request:
+                case.log('log_fail', str(e))
+                case.suspect = True
+            else:
+                case.log('log_info', str(e))
+        finally:
+            case.finished_at = time.monotonic()
+            await connection.close()
+
+    async def _transmit_case(self, connection: AsyncSocketConnection, case: _AsyncTestCase):
+        """Transmits the path of a test case, see TestCase.run()"""
+        try:
+            await self._open(connection, case)
+        except exception.FuzzowskiTargetConnectionFailedError:
+            return
+        try:
+            for idx, step in enumerate(case.steps, start=1):
+                case.log('open_test_step', f'{"Fuzzing" if step.fuzzed else "Transmit"} node {step.request.name}')
+                await self._transmit(connection, case, step)
+
+                if self.session.opts.new_connection_between_requests and len(case.steps) > idx:
+                    await connection.close()
+                    try:
+                        await connection.open()
+                    except exception.FuzzowskiTargetConnectionFailedError as e:
+                        case.errors.append(e)
+                        case.suspect = True
+                        raise exception.FuzzowskiTestCaseAborted(str(e))
+        except exception.FuzzowskiTestCaseAborted as e:
+            case.log('log_info', f'Test case aborted due to transmission error: {str(e)}')
+
+    async def _open(self, connection: AsyncSocketConnection, case: _AsyncTestCase):
+        """Opens the connection, trying twice (see TestCase.open_fuzzing_target())"""
+        case.log('log_info', f'Opening target connection ({connection.info})...')
+        try:
+            await connection.open()
+        except exception.FuzzowskiTargetConnectionFailedError:
+            case.log('log_fail', 'Cannot connect to target; Retrying... ')
+            try:
+                await connection.open()
+            except exception.FuzzowskiTargetConnectionFailedError as e:
+                case.log('log_error', 'Cannot connect to target; target presumed down.')
+                case.connect_error = e
+                case.connect_failed_at = time.monotonic()
+                case.last_connect_before_failure = self._last_connect
+                raise
+        self._last_connect = time.monotonic()
+        case.log('log_info', 'Connection opened.')
+
+    async def _transmit(self, connection: AsyncSocketConnection, case: _AsyncTestCase, step: _Step):
+        """Sends a request and receives the reply, see TestCase.transmit()"""
+        opts = self.session.opts
+        target = self.session.target
+        request = step.request
+
+        # 1. SEND DATA
+        try:
+            case.log('log_send', log_send_prefix(step.segments))
+            if case.sent_at is None:
+                case.sent_at = time.monotonic()
+            num_sent = await connection.send_segments(step.segments)
+            sent_time = time.monotonic()
+            case.log('log_info', log_send_info(num_sent, step.segments))
+        except exception.FuzzowskiTargetConnectionReset as e:
+            case.log('log_info', 'Target connection reset.')
+            condition = opts.ignore_transmission_errors if step.original else opts.ignore_connection_issues_after_fuzz
+            if not condition:
+                case.errors.append(e)
+                case.suspect = True
+            raise exception.FuzzowskiTestCaseAborted(str(e))
+        except exception.FuzzowskiTargetConnectionAborted as e:
+            msg = f"Target connection lost (socket error: {e.socket_errno} {e.socket_errmsg})"
+            condition = opts.ignore_transmission_errors if step.original else opts.ignore_connection_issues_after_fuzz
+            if condition:
+                case.log('log_info', msg)
+                sent_time = None
+            else:
+                case.log('log_fail', msg)
+                case.errors.append(e)
+                case.suspect = True
+                raise exception.FuzzowskiTestCaseAborted(str(e))
+
+        # 2. RECEIVE DATA
+        estimator = target.rtt_estimator(request.name)
+        timeout = estimator.timeout if estimator is not None else None
+        try:
+            case.log('log_info', 'Receiving...' if timeout is None else f'Receiving (adaptive timeout {timeout:.3f}s)...')
+            completions = request.reply_completions
+            data = await connection.recv_all(DEFAULT_MAX_RECV,
+                                             completions=target.completions if completions is None else completions,
+                                             timeout=timeout)
+            if data and estimator is not None and sent_time is not None and connection.first_recv_time is not None:
+                estimator.add_sample(connection.first_recv_time - sent_time)
+            case.log('log_recv', data)
+
+            receive_failed = False
+            error = ''
+            if not data:
+                receive_failed = True
+                error = "Nothing received. Connection Reset?"
+            elif len(request.responses) > 0:
+                try:
+                    case.log('log_check', 'Parsing response with data received')
+                    case.log('log_info', request.parse_response(data))
+                except exception.FuzzowskiRuntimeError as e:
+                    case.log('log_fail', str(e))
+                    raise exception.FuzzowskiTestCaseAborted(str(e))
+                except Exception as e:
+                    case.log('log_fail', str(e))
+                    self.session.is_paused = True  # Pause the session if an uncontrolled error occurs
+                    raise exception.FuzzowskiTestCaseAborted(str(e))
+
+            if opts.check_data_received_each_request:
+                case.log('log_check', 'Checking data received...')
+                if receive_failed:
+                    case.log('log_fail', f'Nothing received from target. {error}')
+                    case.suspect = True
+                    raise exception.FuzzowskiTestCaseAborted("Receive failed. Aborting Test Case")
+
+        except exception.FuzzowskiTargetConnectionReset as e:
+            case.log('log_info', 'Target connection reset.')
+            if opts.check_data_received_each_request:
+                case.log('log_fail', 'Target connection reset.')
+                case.errors.append(e)
+                case.suspect = True
+            raise exception.FuzzowskiTestCaseAborted(str(e))
+        except exception.FuzzowskiTargetConnectionAborted as e:
+            msg = f"Target connection lost (socket error: {e.socket_errno} {e.socket_errmsg})"
+            if opts.check_data_received_each_request:
+                case.log('log_fail', msg)
+                case.errors.append(e)
+                case.suspect = True
+            else:
+                case.log('log_info', msg)
+            raise exception.FuzzowskiTestCaseAborted(str(e))
+
+    # --------------------------------------------------------------- #
+
+    def _log_test_case(self, case: _AsyncTestCase):
+        """Writes the log of the test case, as if it ran alone"""
+        test_case = case.test_case
+        logger = self.session.logger
+        logger.open_test_case(f"{test_case.id}: {test_case.name}", name=test_case.name, index=test_case.id)
+        logger.log_info(f"{test_case.mutant_info}. Case {test_case.id} of {self.session.num_mutations} overall. "
+                        f"Sent in flight with up to {self.in_flight} test cases.")
+        for method, argument in case.log_entries:
+            getattr(logger, method)(argument)
+
+    async def _collect(self, case: _AsyncTestCase):
+        """
+        Updates the session with the results of a test case, in the order of the test cases. The monitors are
+        synchronous and can block, so they run in a thread while the test cases in flight go on
+        """
+        self._log_test_case(case)
+        test_case = case.test_case
+        for error in case.errors:
+            test_case.add_error(error)
+        if case.suspect:
+            self.session.add_suspect(test_case)
+        self.session.add_latest_test(test_case)
+        self.session._mark_sent(test_case)
+        if self.session.monitors:
+            await asyncio.get_event_loop().run_in_executor(None, self._run_monitors, test_case)
+
+    def _run_monitors(self, test_case: TestCase):
+        for monitor in self.session.monitors:
+            monitor.run(test_case)
+
+    def _add_suspects(self, failed: _AsyncTestCase):
+        """
+        Adds as suspects the test cases that may have taken the target down before a test case could not connect:
+        the ones that sent data before the failure, and were still running after the last successful connection
+        before it
+        """
+        self._log_test_case(failed)
+        suspects = [case for case in self._recent
+                    if case is not failed and case.sent_at is not None and case.sent_at < failed.connect_failed_at
+                    and case.finished_at > failed.last_connect_before_failure]
+        if not suspects:
+            return
+        self.session.logger.log_warn(f'Adding the test cases sent before the connection failure as suspects: '
+                                     f'{", ".join(str(case.test_case.id) for case in suspects)}')
+        for case in suspects:
+            case.test_case.add_error(failed.connect_error)
+            self.session.add_suspect(case.test_case)
@@ -0,0 +1,163 @@
+import asyncio
+import errno
+import ssl
+import time
+
+from .. import exception
+from ..mutants.mutation_library import RepeatedSequence
+from .completion import is_complete
+
+
+class AsyncSocketConnection(object):
+    """
+    asyncio counterpart of SocketConnection for TCP and SSL targets. It has the same methods as ITargetConnection, but
+    they are coroutines, so many connections can wait for the target at the same time in one thread (see AsyncRunner).
+    asyncio版本的SocketConnection，用于同时保持多个到目标的连接
+
+    Args:
+        host (str): Hostname or IP address of target system.
+        port (int): Port of target service.
+        proto (str): Communication protocol ("tcp", "ssl"). Default "tcp".
+        send_timeout (float): Seconds to wait for send before timing out. Default 5.0.
+        recv_timeout (float): Seconds to wait for recv before timing out. Default 5.0.
+    """
+    _PROTOCOLS = ["tcp", "ssl"]
+
+    def __init__(self, host, port, proto="tcp", send_timeout=5.0, recv_timeout=5.0):
+        self.host = host
+        self.port = port
+        self.proto = proto.lower()
+        self._send_timeout = send_timeout
+        self._recv_timeout = recv_timeout
+        self._reader = None
+        self._writer = None
+        self.first_recv_time = None
+
+        if self.proto not in self._PROTOCOLS:
+            raise exception.FuzzowskiRuntimeError(f"PROTOCOL NOT SUPPORTED BY {self.__class__.__name__}: {proto}")
+
+    @classmethod
+    def from_connection(cls, connection):
+        """
+        Creates an AsyncSocketConnection to the same target of a SocketConnection
+
+        Args:
+            connection (SocketConnection): The connection to copy
+
+        Returns:
+            AsyncSocketConnection
+        """
+        return cls(connection.host, connection.port, proto=connection.proto,
+                   send_timeout=connection._send_timeout, recv_timeout=connection._recv_timeout)
+
+    async def open(self):
+        """
+        Opens connection to the target. Make sure to call close!
+
+        Raises:
+            FuzzowskiTargetConnectionFailedError if the connection fails
+        """
+        ssl_context = None
+        if self.proto == "ssl":
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=ssl_context), self._recv_timeout)
+        except asyncio.TimeoutError:
+            raise exception.FuzzowskiTargetConnectionFailedError('ETIMEDOUT')
+        except OSError as e:
+            raise exception.FuzzowskiTargetConnectionFailedError(errno.errorcode.get(e.errno, str(e)))
+
+    async def close(self):
+        """
+        Close connection to the target.
+        """
+        if self._writer is None:
+            return
+        writer, self._reader, self._writer = self._writer, None, None
+        writer.close()
+        if not hasattr(writer, 'wait_closed'):  # Python 3.6, the transport is closed in the next loop iteration
+            return
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass  # The target already closed or reset it
+
+    async def send_segments(self, segments):
+        """
+        Send data given as a list of segments to the target. The RepeatedSequences are written in chunks, waiting for
+        each one to be sent, so the repetitions are not built nor buffered at once. Only valid after calling open!
+
+        Args:
+            segments: List of segments (bytes-like objects or RepeatedSequences) of the data to send.
+
+        Returns:
+            int: Number of bytes actually sent.
+        """
+        try:
+            for segment in segments:
+                if isinstance(segment, RepeatedSequence):
+                    for chunk in segment.chunks():
+                        self._writer.write(chunk)
+                        await asyncio.wait_for(self._writer.drain(), self._send_timeout)
+                else:
+                    self._writer.write(segment)
+            await asyncio.wait_for(self._writer.drain(), self._send_timeout)
+        except (ConnectionResetError, BrokenPipeError):
+            raise exception.FuzzowskiTargetConnectionReset()
+        except asyncio.TimeoutError:
+            raise exception.FuzzowskiTargetConnectionAborted(socket_errno=errno.ETIMEDOUT, socket_errmsg='Send timeout')
+        except OSError as e:
+            raise exception.FuzzowskiTargetConnectionAborted(socket_errno=e.errno, socket_errmsg=e.strerror)
+        return sum(len(segment) for segment in segments)
+
+    async def send(self, data):
+        return await self.send_segments([data])
+
+    async def recv(self, max_bytes, timeout=None):
+        """
+        Receive up to max_bytes data from the target.
+
+        Args:
+            max_bytes (int): Maximum number of bytes to receive.
+            timeout (float): Seconds to wait. Default: recv_timeout
+
+        Returns:
+            Received data, b'' if the timeout expires or the target closes the connection.
+        """
+        try:
+            return await asyncio.wait_for(self._reader.read(max_bytes),
+                                          self._recv_timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            return b''
+        except ConnectionAbortedError as e:
+            raise exception.FuzzowskiTargetConnectionAborted(socket_errno=e.errno, socket_errmsg=e.strerror)
+        except (ConnectionResetError, ssl.SSLError):
+            raise exception.FuzzowskiTargetConnectionReset()
+
+    async def recv_all(self, max_bytes, completions=None, timeout=None):
+        """
+        Receive up to max_bytes data from the target, until the peer closes the connection, the recv timeout expires
+        or one of the completions considers the data a complete reply (see SocketConnection.recv_all()).
+
+        Args:
+            max_bytes (int): Maximum number of bytes to receive.
+            completions (list): Completions of the reply (see completion.py).
+            timeout (float): Seconds to wait in each recv. Default: recv_timeout
+
+        Returns:
+            Received data.
+        """
+        chunk = await self.recv(max_bytes, timeout)
+        self.first_recv_time = time.monotonic() if chunk else None
+        data = chunk
+        while chunk and len(data) < max_bytes and not is_complete(data, completions):
+            chunk = await self.recv(max_bytes - len(data), timeout)
+            data += chunk
+        return data
+
+    @property
+    def info(self):
+        return '{0}:{1}'.format(self.host, self.port)
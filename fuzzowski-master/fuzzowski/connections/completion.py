@@ -0,0 +1,190 @@
+import codecs
+import re
+from abc import ABCMeta, abstractmethod
+from typing import Iterable, Optional
+
+from fuzzowski.constants import BIG_ENDIAN, LITTLE_ENDIAN
+from fuzzowski.exception import FuzzowskiRuntimeError
+
+
+class Completion(object, metaclass=ABCMeta):
+    """
+    A Completion tells recv_all() when the data received is a complete reply, so it returns without waiting for the
+    recv timeout. Completions are set in the Target (for every request), in a Request (s_completion()) or in a Response
+    class (Response.completion).
+    判断响应是否接收完整，接收完整后recv_all()立即返回，不再等待超时
+    """
+
+    @abstractmethod
+    def is_complete(self, data: bytes) -> bool:
+        """
+        Args:
+            data: All the data received until now
+
+        Returns: True if data is a complete reply
+        """
+        pass
+
+    def __repr__(self):
+        args = ', '.join(f'{key}={value!r}' for key, value in self.__dict__.items() if not key.startswith('_'))
+        return f'{self.__class__.__name__}({args})'
+
+
+class FixedLength(Completion):
+    """The reply is complete when length bytes were received"""
+
+    def __init__(self, length: int):
+        if length <= 0:
+            raise FuzzowskiRuntimeError(f'Invalid length for {self.__class__.__name__}: {length}')
+        self.length = length
+
+    def is_complete(self, data: bytes) -> bool:
+        return len(data) >= self.length
+
+
+class LengthPrefix(Completion):
+    """
+    The reply has a length field: it is complete when offset + size + the value of the field + adjust bytes were
+    received. E.g. LengthPrefix(4, 2) for the MBAP header of MODBUS/TCP, whose length counts the bytes after it.
+    """
+
+    def __init__(self, offset: int, size: int, endian: str = BIG_ENDIAN, adjust: int = 0):
+        """
+        Args:
+            offset: Offset of the length field
+            size: Size of the length field, in bytes
+            endian: (Optional, def=BIG_ENDIAN) Endianness of the length field
+            adjust: (Optional, def=0) Bytes to add to the length (negative if it counts bytes before it)
+        """
+        if offset < 0 or size <= 0 or endian not in (BIG_ENDIAN, LITTLE_ENDIAN):
+            raise FuzzowskiRuntimeError(f'Invalid length field for {self.__class__.__name__}: '
+                                        f'offset={offset}, size={size}, endian={endian}')
+        self.offset = offset
+        self.size = size
+        self.endian = endian
+        self.adjust = adjust
+        self._byteorder = 'big' if endian == BIG_ENDIAN else 'little'
+
+    def is_complete(self, data: bytes) -> bool:
+        end = self.offset + self.size
+        if len(data) < end:
+            return False
+        length = int.from_bytes(data[self.offset:end], self._byteorder)
+        return len(data) >= end + length + self.adjust
+
+
+class ContentLength(Completion):
+    """
+    The reply is an HTTP response (e.g. of IPP): it is complete when the headers and Content-Length bytes of body were
+    received, or the last chunk of a chunked body. A response without length ends when the peer closes the connection
+    """
+    _header_end = b'\r\n\r\n'
+    _content_length_re = re.compile(rb'\r\ncontent-length:[ \t]*(\d+)', re.I)
+    _chunked_re = re.compile(rb'\r\ntransfer-encoding:[^\r\n]*chunked', re.I)
+
+    def is_complete(self, data: bytes) -> bool:
+        header_end = data.find(self._header_end)
+        if header_end < 0:
+            return False
+        headers = data[:header_end]
+        match = self._content_length_re.search(headers)
+        if match is not None:
+            return len(data) >= header_end + len(self._header_end) + int(match.group(1))
+        if self._chunked_re.search(headers):
+            body = data[header_end + len(self._header_end):]
+            return body.startswith(b'0\r\n\r\n') or body.endswith(b'\r\n0\r\n\r\n')
+        return False
+
+
+class Delimiter(Completion):
+    """The reply is complete when the delimiter was received (e.g. b'\\r\\n\\r\\n', or the prompt of a shell)"""
+
+    def __init__(self, delimiter: bytes, at_end: bool = False):
+        """
+        Args:
+            delimiter: Bytes that end a reply
+            at_end: (Optional, def=False) Only complete if the data received ends with the delimiter
+        """
+        if not delimiter:
+            raise FuzzowskiRuntimeError(f'Empty delimiter for {self.__class__.__name__}')
+        self.delimiter = delimiter
+        self.at_end = at_end
+
+    def is_complete(self, data: bytes) -> bool:
+        if self.at_end:
+            return data.endswith(self.delimiter)
+        return self.delimiter in data
+
+
+class RegexMatch(Completion):
+    """The reply is complete when the regex matches the data received"""
+
+    def __init__(self, regex: bytes, flags: int = 0):
+        try:
+            self.regex = re.compile(regex, flags)
+        except (re.error, TypeError) as e:
+            raise FuzzowskiRuntimeError(f'Invalid regex for {self.__class__.__name__}: {regex!r}. {e}')
+
+    def is_complete(self, data: bytes) -> bool:
+        return self.regex.search(data) is not None
+
+
+class PeerClose(Completion):
+    """
+    The reply is complete when the peer closes (or half-closes) the connection, or when the recv timeout expires.
+    This is what recv_all() does without completions, set it in a Request to not use the completions of the Target
+    """
+
+    def is_complete(self, data: bytes) -> bool:
+        return False
+
+
+def is_complete(data: bytes, completions: Optional[Iterable[Completion]]) -> bool:
+    """
+    Returns: True if any of the completions considers data a complete reply
+    """
+    if not completions or not data:
+        return False
+    return any(completion.is_complete(data) for completion in completions)
+
+
+def completion_from_string(spec: str) -> Completion:
+    """
+    Creates a Completion from a command line string:
+        length:<n>                                      FixedLength
+        prefix:<offset>:<size>[:<adjust>[:little]]      LengthPrefix
+        http                                            ContentLength
+        delim:<delimiter>                               Delimiter (with escapes, e.g. delim:\\r\\n\\r\\n)
+        regex:<regex>                                   RegexMatch
+        close                                           PeerClose
+
+    Returns: The Completion
+    """
+    kind, _, arg = spec.partition(':')
+    kind = kind.lower()
+    try:
+        if kind == 'length':
+            return FixedLength(int(arg))
+        elif kind == 'prefix':
+            fields = arg.split(':')
+            if not 2 <= len(fields) <= 4:
+                raise ValueError('prefix:<offset>:<size>[:<adjust>[:little]]')
+            endian = BIG_ENDIAN
+            if len(fields) == 4:
+                if fields[3].lower() not in ('big', 'little'):
+                    raise ValueError(f'invalid endianness {fields[3]}')
+                endian = LITTLE_ENDIAN if fields[3].lower() == 'little' else BIG_ENDIAN
+            adjust = int(fields[2]) if len(fields) > 2 else 0
+            return LengthPrefix(int(fields[0]), int(fields[1]), endian, adjust)
+        elif kind == 'http' and not arg:
+            return ContentLength()
+        elif kind == 'delim':
+            return Delimiter(codecs.escape_decode(arg.encode('utf-8'))[0])
+        elif kind == 'regex':
+            return RegexMatch(arg.encode('utf-8'))
+        elif kind == 'close' and not arg:
+            return PeerClose()
+    except ValueError as e:
+        raise FuzzowskiRuntimeError(f'Invalid completion {spec}: {e}')
+    raise FuzzowskiRuntimeError(f'Invalid completion {spec}. Use length:<n>, prefix:<offset>:<size>, http, '
+                                f'delim:<delimiter>, regex:<regex> or close')
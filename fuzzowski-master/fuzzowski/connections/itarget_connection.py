@@ -1,5 +1,7 @@
 import abc
 
+from ..mutants.mutation_library import join_segments
+
 
 class ITargetConnection(object):
     """
@@ -9,6 +11,8 @@ class ITargetConnection(object):
     """
     __metaclass__ = abc.ABCMeta
 
+    first_recv_time = None  # time.monotonic() when the first data of the last recv_all() arrived, None if nothing
+
     @abc.abstractmethod
     def close(self):
         """
@@ -27,6 +31,16 @@ class ITargetConnection(object):
         """
         raise NotImplementedError
 
+    def is_alive(self):
+        """
+        Checks, without blocking, if an open connection can still be used (e.g. the peer did not close it). Used to
+        reuse a connection between test cases. By default connections are never reused.
+
+        :rtype bool
+        :return: True if the connection can be used again
+        """
+        return False
+
     @abc.abstractmethod
     def recv(self, max_bytes):
         """
@@ -40,12 +54,16 @@ class ITargetConnection(object):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def recv_all(self, max_bytes):
+    def recv_all(self, max_bytes, completions=None, timeout=None):
         """
-        Receive up to max_bytes data, trying to receive everything coming.
+        Receive up to max_bytes data, trying to receive everything coming. Sets first_recv_time.
 
         :param max_bytes: Maximum number of bytes to receive.
         :type max_bytes: int
+        :param completions: Completions (see completion.py) of the reply. Return as soon as one of them matches.
+        :type completions: list
+        :param timeout: Seconds to wait in each recv, instead of the timeout of the connection.
+        :type timeout: float
 
         :return: Received data. bytes('') if no data is received.
         """
@@ -63,6 +81,18 @@ class ITargetConnection(object):
         """
         raise NotImplementedError
 
+    def send_segments(self, segments):
+        """
+        Send data given as a list of segments (bytes-like objects or RepeatedSequences) to the target. Connections that
+        support gather I/O send the segments without joining them, by default they are joined and sent with send().
+
+        :param segments: List of segments of the data to send.
+
+        :rtype int
+        :return: Number of bytes actually sent.
+        """
+        return self.send(join_segments(segments))
+
     @abc.abstractproperty
     def info(self):
         """Return description of connection info.
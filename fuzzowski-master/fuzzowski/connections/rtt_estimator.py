@@ -0,0 +1,65 @@
+from typing import Optional
+
+from fuzzowski.exception import FuzzowskiRuntimeError
+
+
+class RttEstimator(object):
+    """
+    Estimates the time a target takes to reply to a request, the way TCP estimates its retransmission timeout
+    (RFC 6298): a smoothed round trip time (SRTT) and its variation (RTTVAR) are updated with every reply, and the
+    recv timeout is SRTT + 4 * RTTVAR, bounded by a floor and a ceiling.
+    参考TCP的RTO算法，根据响应时间估算每个请求的接收超时
+
+    A sample longer than outlier_factor times SRTT is counted as outlier_factor times SRTT, so a single slow reply
+    (e.g. the target hanging on a fuzzed request) does not blow the timeout up.
+    """
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, floor: float = 0.05, ceiling: float = 5.0, outlier_factor: float = 4.0):
+        """
+        Args:
+            floor: (Optional, def=0.05) Minimum timeout, in seconds
+            ceiling: (Optional, def=5.0) Maximum timeout, in seconds
+            outlier_factor: (Optional, def=4.0) Samples are capped at outlier_factor * SRTT
+        """
+        if not 0 < floor <= ceiling or outlier_factor < 1:
+            raise FuzzowskiRuntimeError(f'Invalid adaptive timeout: floor={floor}, ceiling={ceiling}, '
+                                        f'outlier_factor={outlier_factor}')
+        self.floor = floor
+        self.ceiling = ceiling
+        self.outlier_factor = outlier_factor
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.samples = 0
+
+    def add_sample(self, rtt: float):
+        """
+        Updates the estimation with the time a reply took
+
+        Args:
+            rtt: Seconds from the end of the send to the first byte of the reply
+        """
+        rtt = max(rtt, 0.0)
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            rtt = min(rtt, self.outlier_factor * self.srtt) if self.srtt > 0 else rtt
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.samples += 1
+
+    @property
+    def timeout(self) -> Optional[float]:
+        """The recv timeout, in seconds. None until the first sample"""
+        if self.srtt is None:
+            return None
+        return min(self.ceiling, max(self.floor, self.srtt + self.K * self.rttvar))
+
+    def __repr__(self):
+        if self.srtt is None:
+            return f'<{self.__class__.__name__} no samples>'
+        return f'<{self.__class__.__name__} srtt={self.srtt:.4f}s rttvar={self.rttvar:.4f}s ' \
+               f'timeout={self.timeout:.4f}s ({self.samples} samples)>'
@@ -2,9 +2,12 @@
 Forked from BooFuzz [https://github.com/jtpereyda/boofuzz]
 """
 import math
+import os
+import select
 import ssl
 import struct
 import sys
+import time
 # import httplib
 import socket
 import errno
@@ -12,11 +15,25 @@ import errno
 
 from .. import helpers
 from .itarget_connection import ITargetConnection
+from .completion import is_complete
 from .. import ip_constants
 from .. import exception
+from ..mutants.mutation_library import iter_segments
 
 ETH_P_IP = 0x0800  # Ethernet protocol: Internet Protocol packet, see Linux if_ether.h docs for more details.
 
+# Maximum number of buffers of a single sendmsg call (IOV_MAX)
+try:
+    _MAX_SEGMENTS = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _MAX_SEGMENTS = -1
+if _MAX_SEGMENTS <= 0:
+    _MAX_SEGMENTS = 1024
+# Segments of this size or bigger are never joined with others when there are too many segments
+_BIG_SEGMENT = 4096
+# Maximum number of reads to discard the data left in a connection before reusing it
+_MAX_DISCARDS = 16
+
 
 def _seconds_to_second_microsecond_struct(seconds):
     """Convert floating point seconds value to second/useconds struct used by socket library."""
@@ -26,6 +43,64 @@ def _seconds_to_second_microsecond_struct(seconds):
     return struct.pack('ll', whole_seconds, whole_microseconds)
 
 
+def _truncate_segments(segments, max_bytes):
+    """
+    Cut a list of segments to max_bytes. The segment that crosses the limit is sliced with a memoryview, so nothing is
+    copied, and the RepeatedSequences are given in chunks (see iter_segments()) only up to the limit.
+
+    Args:
+        segments: List of segments (bytes-like objects or RepeatedSequences)
+        max_bytes: Maximum number of bytes
+
+    Returns:
+        list: The segments (bytes-like objects) of the first max_bytes bytes
+    """
+    truncated = []
+    total = 0
+    for segment in iter_segments(segments):
+        length = len(segment)
+        if total + length > max_bytes:
+            truncated.append(memoryview(segment)[:max_bytes - total])
+            return truncated
+        truncated.append(segment)
+        total += length
+    return truncated
+
+
+def _coalesce_segments(segments, max_segments):
+    """
+    Reduce a list of segments to at most max_segments, the limit of buffers of sendmsg. Empty segments are dropped,
+    and if there are still too many, the runs of small segments are joined (big segments are never copied).
+
+    Args:
+        segments: List of segments (bytes-like objects)
+        max_segments: Maximum number of segments
+
+    Returns:
+        list: The segments, with the same data
+    """
+    segments = [segment for segment in segments if len(segment) > 0]
+    if len(segments) <= max_segments:
+        return segments
+
+    coalesced = []
+    small = []
+    for segment in segments:
+        if len(segment) < _BIG_SEGMENT:
+            small.append(segment)
+            continue
+        if small:
+            coalesced.append(b"".join(small))
+            small = []
+        coalesced.append(segment)
+    if small:
+        coalesced.append(b"".join(small))
+
+    if len(coalesced) > max_segments:
+        return [b"".join(segments)]
+    return coalesced
+
+
 class SocketConnection(ITargetConnection):
     """ITargetConnection implementation using sockets.
 
@@ -107,6 +182,35 @@ class SocketConnection(ITargetConnection):
         """
         self._sock.close()
 
+    def is_alive(self):
+        """
+        Checks, without blocking, if the connection can still be used: a TCP connection is stale if the peer closed or
+        reset it, which is seen with a MSG_PEEK recv when the socket is readable. Data left by the peer (e.g. the end
+        of a late reply) is discarded, so it is not taken as the reply of the next request.
+        UDP and raw sockets are always alive. SSL sockets do not support MSG_PEEK, they are stale if readable.
+
+        Returns:
+            bool: True if the connection can be used again
+        """
+        if self._sock is None or self._sock.fileno() < 0:
+            return False
+        if self.proto not in ['tcp', 'ssl']:
+            return True
+        try:
+            for _ in range(_MAX_DISCARDS):
+                if not select.select([self._sock], [], [], 0)[0]:
+                    break
+                if self.proto == 'ssl':
+                    return False
+                if not self._sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT):
+                    return False  # Closed by the peer
+                self._sock.recv(ip_constants.DEFAULT_MAX_RECV, socket.MSG_DONTWAIT)
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            return False  # Reset by the peer
+        return True
+
     def open(self):
         """
         Opens connection to the target. Make sure to call close!
@@ -205,14 +309,40 @@ class SocketConnection(ITargetConnection):
 
         return data
 
-    def recv_all(self, max_bytes):
-        chunk = self.recv(max_bytes)
-        data = chunk
-        while chunk and len(data) < max_bytes:
-            chunk = self.recv(max_bytes - len(data))
-            data += chunk
+    def recv_all(self, max_bytes, completions=None, timeout=None):
+        """
+        Receive up to max_bytes data from the target, until the peer closes the connection, the recv timeout expires
+        or one of the completions considers the data a complete reply.
+
+        Args:
+            max_bytes (int): Maximum number of bytes to receive.
+            completions (list): Completions of the reply (see completion.py).
+            timeout (float): Seconds to wait in each recv. Default: recv_timeout
+
+        Returns:
+            Received data.
+        """
+        if timeout is not None:
+            self._set_recv_timeout(timeout)
+        try:
+            chunk = self.recv(max_bytes)
+            self.first_recv_time = time.monotonic() if chunk else None
+            data = chunk
+            while chunk and len(data) < max_bytes and not is_complete(data, completions):
+                chunk = self.recv(max_bytes - len(data))
+                data += chunk
+        finally:
+            if timeout is not None:
+                self._set_recv_timeout(self._recv_timeout)
         return data
 
+    def _set_recv_timeout(self, seconds):
+        """Sets the timeout of the next recvs, with settimeout() if the socket has one (TCP) or SO_RCVTIMEO"""
+        if self._sock.gettimeout() is not None:
+            self._sock.settimeout(seconds)
+        else:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, _seconds_to_second_microsecond_struct(seconds))
+
     def send(self, data):
         """
         Send data to the target. Only valid after calling open!
@@ -229,13 +359,62 @@ class SocketConnection(ITargetConnection):
         except KeyError:
             pass  # data = data
 
+        return self._transmit(data=data)
+
+    def send_segments(self, segments):
+        """
+        Send data given as a list of segments to the target, with gather I/O (socket.sendmsg), so the segments are
+        never joined. Only valid after calling open!
+        Some protocols will truncate; see self.MAX_PAYLOADS. The segment in the limit is cut with a memoryview.
+        The RepeatedSequences (repeated blocks) are sent in chunks of one buffer of repetitions, and TCP sends the
+        segments with as many sendmsg calls as needed, so they are never built.
+        使用sendmsg发送多个片段，不进行拼接。截断时使用memoryview，不复制数据。
+
+        Args:
+            segments: List of segments (bytes-like objects or RepeatedSequences) of the data to send.
+
+        Returns:
+            int: Number of bytes actually sent.
+        """
+        if self.proto in self.MAX_PAYLOADS:
+            segments = _truncate_segments(segments, self.MAX_PAYLOADS[self.proto])
+        else:
+            segments = [segment for segment in iter_segments(segments) if len(segment) > 0]
+
+        # SSL sockets do not support sendmsg
+        if self.proto == "ssl" or not hasattr(self._sock, "sendmsg"):
+            return self._transmit(data=b"".join(segments))
+        if self.proto != "tcp":
+            # Each call sends a datagram, the segments must fit in one
+            return self._transmit(segments=_coalesce_segments(segments, _MAX_SEGMENTS))
+
+        num_sent = 0
+        for start in range(0, len(segments), _MAX_SEGMENTS):
+            batch = segments[start:start + _MAX_SEGMENTS]
+            sent = self._transmit(segments=batch)
+            num_sent += sent
+            if sent < sum(map(len, batch)):
+                break  # Partial send, like send()
+        return num_sent
+
+    def _transmit(self, data=None, segments=None):
+        """
+        Send data, or a list of segments with sendmsg, to the target.
+
+        Args:
+            data: Data to send.
+            segments: List of segments to send, if data is None.
+
+        Returns:
+            int: Number of bytes actually sent.
+        """
         try:
             if self.proto in ["tcp", "ssl"]:
-                num_sent = self._sock.send(data)
+                address = None
             elif self.proto == "udp":
-                num_sent = self._sock.sendto(data, (self.host, self.port))
+                address = (self.host, self.port)
             elif self.proto == "raw-l2":
-                num_sent = self._sock.sendto(data, (self.host, 0))
+                address = (self.host, 0)
             elif self.proto == "raw-l3":
                 # Address tuple: (interface string,
                 #                 Ethernet protocol number,
@@ -243,9 +422,19 @@ class SocketConnection(ITargetConnection):
                 #                 hatype (recv only),
                 #                 Ethernet address)
                 # See man 7 packet for more details.
-                num_sent = self._sock.sendto(data, (self.host, self.ethernet_proto, 0, 0, self.l2_dst))
+                address = (self.host, self.ethernet_proto, 0, 0, self.l2_dst)
             else:
                 raise exception.FuzzowskiRuntimeError("INVALID PROTOCOL SPECIFIED: %s" % self.proto)
+
+            if segments is not None:
+                if address is None:
+                    num_sent = self._sock.sendmsg(segments)
+                else:
+                    num_sent = self._sock.sendmsg(segments, [], 0, address)
+            elif address is None:
+                num_sent = self._sock.send(data)
+            else:
+                num_sent = self._sock.sendto(data, address)
         except socket.error as e:
             if e.errno == errno.ECONNABORTED:
                 raise(exception.FuzzowskiTargetConnectionAborted(socket_errno=e.errno, socket_errmsg=e.strerror),
@@ -1,7 +1,33 @@
+import time
+from typing import Dict
+
+from .. import exception
 from ..ip_constants import DEFAULT_MAX_RECV
 from ..loggers import FuzzLoggerText
+from .rtt_estimator import RttEstimator
+from .socket_connection import _truncate_segments
 from copy import deepcopy
 
+# Bytes of the data sent in segments that are logged, so the segments are not joined to log them
+LOG_SEND_MAX_BYTES = 4096
+
+
+def log_send_prefix(segments) -> bytes:
+    """
+    Returns: The first LOG_SEND_MAX_BYTES bytes of a list of segments, the data of send_segments() that is logged
+    """
+    return b"".join(_truncate_segments(segments, LOG_SEND_MAX_BYTES))
+
+
+def log_send_info(num_sent: int, segments) -> str:
+    """
+    Returns: The message logged after sending a list of segments, it tells if the data logged was cut
+    """
+    if num_sent <= LOG_SEND_MAX_BYTES:
+        return f"{num_sent} bytes sent"
+    return f"{num_sent} bytes sent in {len(segments)} segments (only the first {LOG_SEND_MAX_BYTES} bytes logged)"
+
+
 class Target(object):
     """Target descriptor container.
 
@@ -15,12 +41,33 @@ class Target(object):
 
     Args:
         connection (itarget_connection.ITargetConnection): Connection to system under test.
+        completions (list): Completions of the replies of the target (see completion.py), used by recv_all() when
+            the request does not define its own.
+        adaptive_timeout (bool): Learn the time the target takes to reply to each request, and wait only that long
+            in recv_all() instead of the recv timeout of the connection (see RttEstimator). Default False.
+        timeout_floor (float): Minimum adaptive timeout, in seconds. Default 0.05.
+        timeout_ceiling (float): Maximum adaptive timeout, in seconds. Default 5.0.
+        timeout_outlier_factor (float): Replies slower than this times the smoothed RTT count as this. Default 4.0.
+        reuse_connection (bool): Keep the connection open between test cases (see release()), reopening it only if
+            the target closed or reset it. Default False.
     """
 
-    def __init__(self, connection, procmon=None, procmon_options=None, netmon=None):
+    def __init__(self, connection, procmon=None, procmon_options=None, netmon=None, completions=None,
+                 adaptive_timeout=False, timeout_floor=0.05, timeout_ceiling=5.0, timeout_outlier_factor=4.0,
+                 reuse_connection=False):
         self._fuzz_data_logger = None
 
         self._target_connection = connection
+        self.reuse_connection = reuse_connection
+        self._is_open = False
+        self._reused = False  # The connection was reused and nothing was sent yet
+        self.completions = list(completions) if completions else []
+        self.adaptive_timeout = adaptive_timeout
+        self._rtt_options = (timeout_floor, timeout_ceiling, timeout_outlier_factor)
+        if adaptive_timeout:
+            RttEstimator(*self._rtt_options)  # Check the options
+        self.rtt_estimators: Dict[str, RttEstimator] = {}  # RTT of the replies to each request, by request name
+        self._last_send_time = None
         self.procmon = procmon
         self.netmon = netmon
 
@@ -39,19 +86,70 @@ class Target(object):
         :return: None
         """
         self._fuzz_data_logger.log_info('Closing target connection...')
+        self._is_open = False
+        self._reused = False
         self._target_connection.close()
         self._fuzz_data_logger.log_info('Connection closed.')
 
     def open(self):
         """
         Opens connection to the target. Make sure to call close!
+        With reuse_connection, the connection kept open by release() is used if it is still alive
 
         :return: None
         """
+        if self.reuse_connection and self._is_open:
+            if self._target_connection.is_alive():
+                self._fuzz_data_logger.log_info('Reusing target connection.')
+                self._reused = True
+                return
+            self._fuzz_data_logger.log_info('Target connection closed by the target, reopening...')
+            self._discard_connection()
         self._fuzz_data_logger.log_info('Opening target connection ({0})...'.format(self._target_connection.info))
         self._target_connection.open()
+        self._is_open = True
+        self._reused = False
         self._fuzz_data_logger.log_info('Connection opened.')
 
+    def release(self):
+        """
+        Ends the use of the connection by a test case: it is closed, or kept open for the next test case if
+        reuse_connection is set
+
+        :return: None
+        """
+        if not self.reuse_connection:
+            self.close()
+
+    def _discard_connection(self):
+        """Closes a connection that is no longer usable, ignoring errors"""
+        self._is_open = False
+        self._reused = False
+        try:
+            self._target_connection.close()
+        except Exception:
+            pass
+
+    def _send_reopening(self, send, data):
+        """
+        Sends with the send function of the connection. If a reused connection was reset before anything was sent in
+        it, the connection is opened again and the data is sent once more
+        """
+        try:
+            num_sent = send(data)
+        except (exception.FuzzowskiTargetConnectionReset, exception.FuzzowskiTargetConnectionAborted) as e:
+            if not self._reused:
+                raise
+            self._fuzz_data_logger.log_info('Reused target connection was reset, reopening...')
+            self._discard_connection()
+            try:
+                self.open()
+            except Exception:
+                raise e  # The test case fails as with the reset, not with the error of the new connection
+            num_sent = send(data)
+        self._reused = False
+        return num_sent
+
     def recv(self, max_bytes=DEFAULT_MAX_RECV):
         """
         Receive up to max_bytes data from the target.
@@ -72,26 +170,50 @@ class Target(object):
 
         return data
 
-    def recv_all(self, max_bytes=DEFAULT_MAX_RECV):
+    def recv_all(self, max_bytes=DEFAULT_MAX_RECV, completions=None, request_name=None):
         """
-        Receive up to max_bytes data from the target. Trying to receive everything
+        Receive up to max_bytes data from the target. Trying to receive everything, or until one of the completions
+        matches the data received
 
         Args:
             max_bytes (int): Maximum number of bytes to receive.
+            completions (list): Completions of the reply. Default: The completions of the Target
+            request_name (str): Name of the request replied. With adaptive_timeout, its learned timeout is used and
+                the RTT of the reply updates it
 
         Returns:
             Received data.
         """
+        estimator = self.rtt_estimator(request_name) if request_name is not None else None
+        timeout = estimator.timeout if estimator is not None else None
+
         if self._fuzz_data_logger is not None:
-            self._fuzz_data_logger.log_info("Receiving...")
+            self._fuzz_data_logger.log_info("Receiving..." if timeout is None
+                                            else f"Receiving (adaptive timeout {timeout:.3f}s)...")
+
+        if completions is None:
+            completions = self.completions
+        data = self._target_connection.recv_all(max_bytes=max_bytes, completions=completions, timeout=timeout)
 
-        data = self._target_connection.recv_all(max_bytes=max_bytes)
+        if data and estimator is not None and self._last_send_time is not None \
+                and self._target_connection.first_recv_time is not None:
+            estimator.add_sample(self._target_connection.first_recv_time - self._last_send_time)
 
         if self._fuzz_data_logger is not None:
             self._fuzz_data_logger.log_recv(data)
 
         return data
 
+    def rtt_estimator(self, request_name):
+        """
+        Returns: The RttEstimator of the replies to the request, None if adaptive_timeout is not set
+        """
+        if not self.adaptive_timeout:
+            return None
+        if request_name not in self.rtt_estimators:
+            self.rtt_estimators[request_name] = RttEstimator(*self._rtt_options)
+        return self.rtt_estimators[request_name]
+
     def send(self, data):
         """
         Send data to the target. Only valid after calling open!
@@ -105,11 +227,32 @@ class Target(object):
         if self._fuzz_data_logger is not None:
             self._fuzz_data_logger.log_send(data)
 
-        num_sent = self._target_connection.send(data=data)
+        num_sent = self._send_reopening(self._target_connection.send, data)
+        self._last_send_time = time.monotonic()
 
         if self._fuzz_data_logger is not None:
             self._fuzz_data_logger.log_info("{0} bytes sent".format(num_sent))
 
+    def send_segments(self, segments):
+        """
+        Send data given as a list of segments to the target, with gather I/O if the connection supports it. Only the
+        first LOG_SEND_MAX_BYTES bytes are logged. Only valid after calling open!
+
+        Args:
+            segments: List of segments (bytes-like objects or RepeatedSequences) of the data to send.
+
+        Returns:
+            None
+        """
+        if self._fuzz_data_logger is not None:
+            self._fuzz_data_logger.log_send(log_send_prefix(segments))
+
+        num_sent = self._send_reopening(self._target_connection.send_segments, segments)
+        self._last_send_time = time.monotonic()
+
+        if self._fuzz_data_logger is not None:
+            self._fuzz_data_logger.log_info(log_send_info(num_sent, segments))
+
     def set_fuzz_data_logger(self, fuzz_data_logger):
         """
         Set this object's fuzz data logger -- for sent and received fuzz data.
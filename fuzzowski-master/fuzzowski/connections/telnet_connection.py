@@ -2,6 +2,7 @@ import math
 import ssl
 import struct
 import sys
+import time
 # import httplib
 import socket
 import errno
@@ -96,19 +97,20 @@ class TelnetConnection(ITargetConnection):
         except OSError as e:
             raise exception.FuzzowskiTargetConnectionFailedError(errno.errorcode(e.errno))
 
-    def recv(self, max_bytes):
+    def recv(self, max_bytes, timeout=None):
         """
         Receive up to max_bytes data from the target.
 
         Args:
             max_bytes (int): Maximum number of bytes to receive.
+            timeout (float): Seconds to wait for the prompt. Default: self.timeout
 
         Returns:
             Received data.
         """
         try:
             # return self._client.read_eager()
-            return self._client.read_until(b'>', timeout=self.timeout)  # TODO: Implementation Dependant
+            return self._client.read_until(b'>', timeout=self.timeout if timeout is None else timeout)  # TODO: Implementation Dependant
 
         except socket.timeout:
             self._active_session = False
@@ -132,8 +134,10 @@ class TelnetConnection(ITargetConnection):
 
         return data
 
-    def recv_all(self, max_bytes):
-        return self.recv(max_bytes)
+    def recv_all(self, max_bytes, completions=None, timeout=None):
+        data = self.recv(max_bytes, timeout=timeout)  # recv() already reads until the prompt
+        self.first_recv_time = time.monotonic() if data else None
+        return data
 
     def send(self, data):
         """
@@ -1,6 +1,7 @@
 from fuzzowski.monitors.imonitor import IMonitor
 from fuzzowski import Session
 from fuzzowski.connections import ITargetConnection
+from fuzzowski.connections.completion import ContentLength
 
 class IPPMon(IMonitor):
     get_printer_attribs_headers = ("POST {} HTTP/1.1\r\n"
@@ -66,7 +67,7 @@ class IPPMon(IMonitor):
             conn.open()
             headers = self.get_printer_attribs_headers.format(self.path, conn.info).encode()
             conn.send(headers + self.get_printer_attribs_body)
-            recv = conn.recv_all(10000)
+            recv = conn.recv_all(10000, completions=[ContentLength()])
             if len(recv) == 0:
                 self.logger.log_error("Get Printer Attributes Failed!!")
                 result = False
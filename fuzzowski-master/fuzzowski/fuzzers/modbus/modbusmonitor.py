@@ -1,5 +1,6 @@
 from fuzzowski.monitors.imonitor import IMonitor
 from fuzzowski.connections import ITargetConnection
+from fuzzowski.connections.completion import LengthPrefix
 
 # --------------------------------------------------------------- #
 SlaveID = 1 # Modbus TCP Unit Identifier: 1..247
@@ -60,7 +61,7 @@ class modbusMonitor(IMonitor):
         try:
             conn.open()
             conn.send(self.get_modbus_device_id_nse) # or get_modbus_slave_id
-            data = conn.recv_all(10000)
+            data = conn.recv_all(10000, completions=[LengthPrefix(4, 2)])  # MBAP length
             if len(data) == 0:
                 self.logger.log_error("MODBUS error response, getting MODBUS device information Failed!!")
                 result = False
@@ -7,6 +7,7 @@ class Graph(object):
         self.graph_dict: Dict[Any, List] = dict()
         self.root = '_root_'
         self.graph_dict[self.root] = []
+        self.version = 0  # Incremented every time an edge is added, to know when the paths changed
 
     def connect(self, src: object, dst=None, callback=None):
 
@@ -31,6 +32,7 @@ class Graph(object):
 
         if edge.dst not in self.graph_dict:
             self.graph_dict[edge.dst] = []
+        self.version += 1
 
     def contains(self, src: object, dst: object) -> bool:
         """
@@ -81,6 +83,30 @@ class Graph(object):
         else:  # leaf
             yield path
 
+    def canonical_paths(self, preferred_paths: List[List[Edge]] = ()) -> Dict[Any, List[Edge]]:
+        """
+        Chooses one path for each node, so a node reachable from several paths can be visited only once.
+        The nodes of the preferred paths take the first preferred path where they are. The rest take the path where
+        they are reached with fewer edges, the shortest path if there are several, and the first one if there is a tie
+
+        Args:
+            preferred_paths: Paths chosen by the user, as yielded by path_iterator()
+
+        Returns: A dictionary with the path of each node
+        """
+        canonical = {}
+        for path in preferred_paths:
+            for edge in path:
+                canonical.setdefault(edge.dst, path)
+        shortest = {}
+        for path in self.path_iterator():
+            for position, edge in enumerate(path):
+                if edge.dst not in shortest or (position, len(path)) < shortest[edge.dst][0]:
+                    shortest[edge.dst] = ((position, len(path)), path)
+        for node, (_, path) in shortest.items():
+            canonical.setdefault(node, path)
+        return canonical
+
     def path_exists(self, src: object, dst: object):
         found = False
         for edge in self.edges_from(src):
@@ -0,0 +1,63 @@
+import hashlib
+import math
+
+
+class BloomFilter(object):
+    """
+    Set of items with a fixed memory size that can give false positives (an item not added may be reported as added)
+    but never false negatives.
+    布隆过滤器：固定内存的集合，可能误判已存在，但不会漏判
+
+    The size of the bit array is calculated for the capacity and error rate given, and bounded by max_bytes. Each item
+    is hashed once with BLAKE2b and the k positions are derived from two halves of the digest (double hashing).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            capacity: Number of items expected
+            error_rate: (Optional, def=0.001) False positive rate when capacity items were added
+            max_bytes: (Optional, def=64MB) Maximum size of the bit array. If the capacity and error rate need more,
+                       the error rate will be higher
+        """
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_bits = max(8, min(num_bits, max_bytes * 8))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item: bytes):
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: bytes) -> bool:
+        """
+        Adds an item to the filter
+
+        Returns: True if the item was not in the filter
+        """
+        added = False
+        bits = self._bits
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        if added:
+            self._count += 1
+        return added
+
+    def __contains__(self, item: bytes) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        """Number of different items added (the ones mistaken for added items are not counted)"""
+        return self._count
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {len(self)} items, {self.num_bits} bits, {self.num_hashes} hashes>'
@@ -0,0 +1,249 @@
+"""
+Checksum kernels used by the helpers and the Checksum block.
+
+The lookup tables are built once, when the module is imported, and the Internet checksum (ipv4, udp) is calculated
+on the whole message with integer arithmetic instead of word by word in Python.
+
+SegmentedChecksum calculates a checksum over a list of segments (e.g. the rendered items of a block). It keeps the
+state of the segments before and after the ones that changed since the last call, so fuzzing one field of a big block
+only reads the field again, not the whole block.
+"""
+import zlib
+from functools import lru_cache
+from typing import List, Sequence, Union
+
+
+def _make_crc16_table(poly: int = 0xa001) -> tuple:
+    table = []
+    for byte in range(256):
+        crc = 0
+        for _ in range(8):
+            if (byte ^ crc) & 1:
+                crc = (crc >> 1) ^ poly
+            else:
+                crc >>= 1
+            byte >>= 1
+        table.append(crc)
+    return tuple(table)
+
+
+# CRC-16 poly: p(x) = x**16 + x**15 + x**2 + 1
+CRC16_TABLE = _make_crc16_table()
+
+ADLER32_BASE = 65521
+
+
+def crc16(data: Union[bytes, str], value: int = 0) -> int:
+    """
+    CRC-16 of data, with the table precomputed
+
+    Args:
+        data: Data over which to calculate crc (a str is taken as a sequence of byte values)
+        value: Initial CRC value
+
+    Returns: The CRC-16 of data
+    """
+    if isinstance(data, str):
+        data = data.encode('latin-1')
+    table = CRC16_TABLE
+    for byte in data:
+        value = table[byte ^ (value & 0xff)] ^ (value >> 8)
+    return value
+
+
+def ones_complement_sum(data: bytes) -> int:
+    """
+    16 bit one's complement sum of data, as big endian words, padded with a zero byte if its length is odd.
+    16位反码和
+
+    As 2**16 is 1 modulo 0xffff, the sum of the words is the value of the whole message modulo 0xffff, which is
+    calculated by int in linear time. The only difference with the folded sum is that a non zero sum is 0xffff, not 0.
+
+    Args:
+        data: Message (bytes or any bytes-like object, e.g. a memoryview)
+
+    Returns: The folded sum, not complemented, 0 only if all the words are 0
+    """
+    value = int.from_bytes(data, 'big')
+    total = value % 0xffff
+    if len(data) & 1:
+        total = (total << 8) % 0xffff  # The last byte is the most significant one of its word
+    if total == 0 and value:
+        return 0xffff
+    return total
+
+
+def internet_checksum(data: bytes) -> int:
+    """
+    Internet checksum of data (RFC 1071), as used by IPv4 and UDP
+
+    Returns: The complement of the one's complement sum of data
+    """
+    return ~ones_complement_sum(data) & 0xffff
+
+
+def add_ones_complement(total: int, value: int, offset: int = 0) -> int:
+    """
+    Adds the one's complement sum of a part of a message to the sum of the rest
+
+    Args:
+        total: Sum of the rest of the message
+        value: Sum of the part, calculated as if it started the message
+        offset: Offset of the part in the message. If it is odd, the bytes of the words of the part are swapped
+
+    Returns: The sum of the whole message
+    """
+    if offset & 1:
+        value = ((value << 8) | (value >> 8)) & 0xffff
+    total += value
+    return (total & 0xffff) + (total >> 16)
+
+
+def adler32_combine(adler1: int, adler2: int, length2: int) -> int:
+    """
+    Adler-32 of the concatenation of two messages, from the Adler-32 of each one (as adler32_combine() of zlib)
+
+    Args:
+        adler1: Adler-32 of the first message
+        adler2: Adler-32 of the second message
+        length2: Length of the second message
+
+    Returns: The Adler-32 of the concatenation
+    """
+    remainder = length2 % ADLER32_BASE
+    sum1 = adler1 & 0xffff
+    sum2 = remainder * sum1 % ADLER32_BASE
+    sum1 = (sum1 + (adler2 & 0xffff) + ADLER32_BASE - 1) % ADLER32_BASE
+    sum2 = (sum2 + (adler1 >> 16) + (adler2 >> 16) + ADLER32_BASE - remainder) % ADLER32_BASE
+    return sum1 | (sum2 << 16)
+
+
+@lru_cache(maxsize=64)
+def _crc32_shift(length: int) -> tuple:
+    """
+    The CRC-32 register after a message of length bytes is a linear function of the register before it, plus the
+    CRC-32 of the message. The function is stored as the images of the 32 bits, calculated over a run of zeros.
+    """
+    zeros = bytes(length)
+    base = zlib.crc32(zeros)
+    return tuple(zlib.crc32(zeros, 1 << bit) ^ base for bit in range(32))
+
+
+def crc32_combine(crc1: int, crc2: int, length2: int) -> int:
+    """
+    CRC-32 of the concatenation of two messages, from the CRC-32 of each one (as crc32_combine() of zlib)
+
+    Args:
+        crc1: CRC-32 of the first message
+        crc2: CRC-32 of the second message
+        length2: Length of the second message
+
+    Returns: The CRC-32 of the concatenation
+    """
+    shift = _crc32_shift(length2)
+    bit = 0
+    while crc1:
+        if crc1 & 1:
+            crc2 ^= shift[bit]
+        crc1 >>= 1
+        bit += 1
+    return crc2
+
+
+def _same(a: bytes, b: bytes) -> bool:
+    return a is b or a == b
+
+
+class SegmentedChecksum(object):
+    """
+    Checksum of a message given as a list of segments, updated incrementally between calls.
+    分段计算校验和，每次只重新计算变化的分段
+
+    The segments are compared with the ones of the last call. The state after the unchanged segments at the start is
+    reused, and the state of the unchanged segments at the end is kept and combined with the rest, so only the
+    segments that changed are read again.
+
+    Supported algorithms:
+        crc32: zlib.crc32()
+        adler32: zlib.adler32()
+        ones_complement: ones_complement_sum() (not complemented, see internet_checksum())
+    """
+    algorithms = ('crc32', 'adler32', 'ones_complement')
+
+    def __init__(self, algorithm: str):
+        if algorithm == 'crc32':
+            self._initial = 0
+            self._update = lambda state, data, offset: zlib.crc32(data, state)
+            self._combine = lambda state1, length1, state2, length2: crc32_combine(state1, state2, length2)
+        elif algorithm == 'adler32':
+            self._initial = 1
+            self._update = lambda state, data, offset: zlib.adler32(data, state)
+            self._combine = lambda state1, length1, state2, length2: adler32_combine(state1, state2, length2)
+        elif algorithm == 'ones_complement':
+            self._initial = 0
+            self._update = lambda state, data, offset: add_ones_complement(state, ones_complement_sum(data), offset)
+            self._combine = lambda state1, length1, state2, length2: add_ones_complement(state1, state2, length1)
+        else:
+            raise ValueError(f'Unsupported algorithm: {algorithm}')
+        self.algorithm = algorithm
+        self.reset()
+
+    def reset(self):
+        """
+        Discards the cached state
+        """
+        self._segments: List[bytes] = []  # segments of the last call
+        self._states = [self._initial]  # _states[i] is the state after _segments[:i]
+        self._offsets = [0]  # _offsets[i] is the length of _segments[:i]
+        self._suffix = None  # (first segment, state, length) of the unchanged segments at the end
+        self._value = self._initial
+
+    def __call__(self, segments: Sequence[bytes]) -> int:
+        """
+        Args:
+            segments: The message, split in segments
+
+        Returns: The checksum of the concatenation of the segments
+        """
+        count = len(segments)
+        last = self._segments
+        if len(last) != count:
+            self.reset()
+            start, end = 0, count
+        else:
+            start = 0
+            while start < count and _same(segments[start], last[start]):
+                start += 1
+            if start == count:
+                return self._value
+            end = count
+            while end > start and _same(segments[end - 1], last[end - 1]):
+                end -= 1
+
+        # The states are known up to the first change, or up to the segment where they stopped being calculated
+        start = min(start, len(self._states) - 1)
+        del self._states[start + 1:], self._offsets[start + 1:]
+
+        suffix = self._suffix
+        if suffix is None or suffix[0] < end:
+            # The cached end changed, calculate the unchanged segments at the end again
+            state, length = self._initial, 0
+            for segment in segments[end:]:
+                state = self._update(state, segment, length)
+                length += len(segment)
+            suffix = self._suffix = (end, state, length) if end < count else None
+        if suffix is not None:
+            end = suffix[0]
+
+        state, offset = self._states[-1], self._offsets[-1]
+        for segment in segments[start:end]:
+            state = self._update(state, segment, offset)
+            offset += len(segment)
+            self._states.append(state)
+            self._offsets.append(offset)
+        if suffix is not None:
+            state = self._combine(state, offset, suffix[1], suffix[2])
+
+        self._segments = list(segments)
+        self._value = state
+        return state
@@ -1,4 +1,3 @@
-from functools import reduce
 from itertools import groupby
 import ctypes
 import errno
@@ -16,6 +15,7 @@ from prompt_toolkit import HTML
 
 from .. import ip_constants
 from .. import constants
+from . import checksums
 
 test_step_info = {
     'test_case': {
@@ -177,24 +177,7 @@ def crc16(string, value=0):
     @param string: Data over which to calculate crc.
     @param value: Initial CRC value.
     """
-    crc16_table = []
-    for byte in range(256):
-        crc = 0
-
-        for _ in range(8):
-            if (byte ^ crc) & 1:
-                crc = (crc >> 1) ^ 0xa001  # polly
-            else:
-                crc >>= 1
-
-            byte >>= 1
-
-        crc16_table.append(crc)
-
-    for ch in string:
-        value = crc16_table[ord(ch) ^ (value & 0xff)] ^ (value >> 8)
-
-    return value
+    return checksums.crc16(string, value)
 
 
 def crc32(string):
@@ -271,13 +254,7 @@ def ipv4_checksum(msg: bytes):
     :return: IPv4 checksum of msg.
     :rtype: int
     """
-    # Pad with 0 byte if needed
-    if len(msg) % 2 == 1:
-        msg += b"\x00"
-
-    msg_words = map(_collate_bytes, msg[0::2], msg[1::2])
-    total = reduce(_ones_complement_sum_carry_16, msg_words, 0)
-    return ~total & 0xffff
+    return checksums.internet_checksum(msg)
 
 
 def _udp_checksum_pseudo_header(src_addr: bytes, dst_addr: bytes, msg_len: int):
@@ -331,9 +308,9 @@ def udp_checksum(msg: bytes, src_addr: bytes, dst_addr: bytes):
     # "Truncate" the message as it appears in the checksum.
     msg = msg[0:ip_constants.UDP_MAX_LENGTH_THEORETICAL]
 
-    return ipv4_checksum(
-        _udp_checksum_pseudo_header(src_addr, dst_addr, len(msg)) +
-        msg)
+    total = checksums.ones_complement_sum(_udp_checksum_pseudo_header(src_addr, dst_addr, len(msg)))
+    # The pseudo-header has an even length, the words of msg are not shifted
+    return ~checksums.add_ones_complement(total, checksums.ones_complement_sum(msg)) & 0xffff
 
 
 def hex_str(s):
@@ -2,4 +2,5 @@ from .fuzz_logger import FuzzLogger
 from .fuzz_logger_csv import FuzzLoggerCsv
 from .fuzz_logger_text import FuzzLoggerText
 from .fuzz_logger_file import FuzzLoggerFile
+from .fuzz_logger_buffer import FuzzLoggerBuffer
 from .ifuzz_logger import IFuzzLogger
@@ -0,0 +1,54 @@
+from . import ifuzz_logger_backend
+
+
+class FuzzLoggerBuffer(ifuzz_logger_backend.IFuzzLoggerBackend):
+    """
+    This class keeps the FuzzLogger data in memory until it is flushed to another logger. Test cases that run at
+    the same time (e.g. in parallel targets) log to their own buffer, and flush it once they end, so the log of each
+    test case is not mixed with the others.
+    将日志缓存在内存中，测试用例结束后再写入其他日志
+    """
+
+    def __init__(self):
+        self._entries = []  # (method name, kwargs)
+
+    def open_test_step(self, description):
+        self._entries.append(('open_test_step', {'description': description}))
+
+    def log_check(self, description):
+        self._entries.append(('log_check', {'description': description}))
+
+    def log_error(self, description):
+        self._entries.append(('log_error', {'description': description}))
+
+    def log_recv(self, data):
+        self._entries.append(('log_recv', {'data': data}))
+
+    def log_send(self, data):
+        self._entries.append(('log_send', {'data': data}))
+
+    def log_info(self, description):
+        self._entries.append(('log_info', {'description': description}))
+
+    def open_test_case(self, test_case_id, name, index, *args, **kwargs):
+        self._entries.append(('open_test_case', {'test_case_id': test_case_id, 'name': name, 'index': index}))
+
+    def log_fail(self, description=""):
+        self._entries.append(('log_fail', {'description': description}))
+
+    def log_pass(self, description=""):
+        self._entries.append(('log_pass', {'description': description}))
+
+    def log_warn(self, description):
+        self._entries.append(('log_warn', {'description': description}))
+
+    def flush(self, fuzz_logger):
+        """
+        Writes the data logged until now to another logger, and empties the buffer
+
+        Args:
+            fuzz_logger (IFuzzLogger): The logger, e.g. the FuzzLogger of the Session
+        """
+        entries, self._entries = self._entries, []
+        for method, kwargs in entries:
+            getattr(fuzz_logger, method)(**kwargs)
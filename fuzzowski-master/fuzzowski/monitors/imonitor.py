@@ -15,6 +15,7 @@ class IMonitor(metaclass=abc.ABCMeta):
     def __init__(self, session: Session, *args, **kwargs):
         self.session = session
         self.logger = self.session.logger # We save the logger to call it easier
+        self.target = None  # The target monitored, None for the target of the session (see Session.add_target())
 
     def get_connection_copy(self) -> ITargetConnection:
         """
@@ -22,7 +23,8 @@ class IMonitor(metaclass=abc.ABCMeta):
         Returns:
             The connection to the target
         """
-        conn = deepcopy(self.session.target._target_connection)
+        target = self.target if self.target is not None else self.session.target
+        conn = deepcopy(target._target_connection)
         return conn
 
     def run(self, test_case: TestCase):
@@ -43,7 +45,7 @@ class IMonitor(metaclass=abc.ABCMeta):
                 self.logger.log_info(f"Monitor {self.name()} succeeded")
         except Exception as e:
             # Ignore exceptions
-            self.session.logger.log_error(f"The monitor threw an exception: {str(e)}")
+            self.logger.log_error(f"The monitor threw an exception: {str(e)}")
 
     @staticmethod
     @abc.abstractmethod
@@ -1,9 +1,19 @@
+import bisect
+import itertools
+
 from fuzzowski.exception import FuzzowskiRuntimeError
 from ..mutant import Mutant
-from typing import List, Generator
+from ..covering_array import CoveringArray
+from typing import List, Generator, Tuple, Optional
 
 
 class Block(Mutant):
+    # Cached counts, discarded by _mutations_changed() when an item is pushed or the mutations of an item change
+    _mutation_count = None  # num_mutations
+    _enabled_mutation_count = None  # num_enabled_mutations
+    _mutation_index_cache = None  # _mutation_index()
+    _combinations_checked = False  # True if the levels of the combinations were checked after the last change
+
     def __init__(self, name: str, request: 'Request', group: str = None, encoder: callable = None,
                  dep: str = None, dep_value: object = None, dep_values: List = None, dep_compare: str = "=="):
         """
@@ -38,49 +48,200 @@ class Block(Mutant):
         self._mutant_index = 0  # current mutation index.
         self._disabled = False  # Blocks cannot be disabled
 
-        self._mutation_gen = self._mutation_generator()
+        # Render cache: rendered value of each item of the stack, and the offsets of their spans in the rendered stack
+        # 渲染缓存：只有被标记为dirty的item以及volatile的item才会被重新渲染
+        self._positions = {}  # id(item) => position of the item in the stack
+        self._dirty = set()  # positions of the items changed since the last render
+        self._volatile_positions = None  # positions of the items that must be rendered every time
+        self._chunks = None  # last rendered value of each item, None if the cache is not built
+        self._offsets = None  # _offsets[i]:_offsets[i + 1] is the span of stack[i] in _stack_rendered
+        self._stack_rendered = b""
+        self._rendering = False  # True while the cached render is running, to detect recursive renders (Size)
+
+        # Combination mode, see combine(). Several mutants are mutated at once following a covering array
+        # 组合模式：按覆盖数组同时变异多个变种
+        self._combination_strength = 0  # 0 mutates one item at a time
+        self._combination_names = None  # names of the mutants combined, None for all the fuzzable primitives
+        self._combinations = None  # CoveringArray of the last levels calculated
+        self._combined_mutants: List[Mutant] = []
+        self._combined_levels: List[int] = []  # actual level of each combined mutant (0 is the original value)
+
+        self._step_gen = self._step_generator()
+        self._mutation_gen = self._render_steps(self._step_gen)
 
     @property
     def original_value(self):
-        original_value = b""
+        return b"".join(item.original_value for item in self.stack)
 
-        for item in self.stack:
-            original_value += item.original_value
-
-        return original_value
+    @property
+    def _volatile(self) -> bool:
+        """
+        A block is volatile if it depends on another field or contains volatile items
+        """
+        return bool(self.dep) or len(self._get_volatile_positions()) > 0
 
     def mutation_generator(self, mutant_index=0) -> Generator[bytes, None, None]:
+        """
+        Returns the mutations generator of the block. If mutant_index is None, the generator continues from the actual
+        state of the block, otherwise the block is moved to mutant_index first.
+        """
         # self.reset()
-        self.goto(mutant_index)
+        if mutant_index is not None:
+            self.goto(mutant_index)
         return self._mutation_gen
 
-    def _mutation_generator(self):
-        # if self.mutant_index != 0:
-        #     yield self.render()  # We want to render the first value of the generator when we go with goto
-
-        # Iterate over all fuzzable mutants, choosing one to be the actual mutant each time
-        # 遍历所有的可以fuzz的变种，每次选择一个进行fuzz
-        for item in self.stack:  # First pass - Take any mutable item
-            if item.fuzzable and item.num_mutations > 0:
-                # Update request with actual mutant
-                if not isinstance(item, Block) and self.request is not None:
-                    self.request.mutant = item  # 看着是多余的一句话
-                self.actual_mutant = item
-                self.mutant_generator = item.mutation_generator()
-
-                # For each mutation, render everything and yield it
-                for mutation in self.mutant_generator:
-                    self._mutant_index += 1
-                    yield self.render()
+    def step_generator(self, mutant_index=0) -> Generator[int, None, None]:
+        """
+        Like mutation_generator(), but it yields the block mutant_index of each step instead of rendering the block.
+        """
+        if mutant_index is not None:
+            self.goto(mutant_index)
+        return self._step_gen
 
-        # TODO: If a group is attached, repeat the process above for each mutation of the group
-        # TODO: 这是他们以后要完成的事情，表明这个项目在这里需要改进. 如果一个组被连接，对该组的每个突变重复上述过程
+    def _step_generator(self, start_position: int = 0, resume: bool = False, group_index: int = 0):
+        """
+        Generator of the block mutations. It only changes the state of the items, nothing is rendered.
+        If a group is attached, all the mutations of the items are repeated for each value of the group.
 
-        # After finishing, update Request removing the mutant
+        Args:
+            start_position: Position in the stack of the first item to mutate, or first row of the combinations in
+                            combination mode
+            resume:         If True, the item in start_position is not reset, its mutations continue from its actual
+                            state (used by goto)
+            group_index:    Index of the first value of the group to use
+        """
+        group = self._get_group()
+        num_group_values = len(group._mutations) if group is not None else 1
+        combinations = self.combinations
+        for group_index in range(group_index, num_group_values):
+            if group is not None:
+                self._set_group_value(group, group_index)
+
+            if combinations is not None:
+                for row in range(start_position, len(combinations)):
+                    self._set_combination(combinations[row])
+                    self._mutant_index += 1
+                    yield self._mutant_index
+                start_position = 0
+                continue
+
+            # Iterate over all fuzzable mutants, choosing one to be the actual mutant each time
+            # 遍历所有的可以fuzz的变种，每次选择一个进行fuzz
+            for position in range(start_position, len(self.stack)):  # First pass - Take any mutable item
+                item = self.stack[position]
+                if item.fuzzable and item.num_mutations > 0:
+                    # Update request with actual mutant
+                    if not isinstance(item, Block) and self.request is not None:
+                        self.request.mutant = item  # 看着是多余的一句话
+                    self.actual_mutant = item
+                    self.mutant_generator = item.step_generator(None if resume else 0)
+                    resume = False
+
+                    # For each mutation of the item, advance the block
+                    for _ in self.mutant_generator:
+                        self._mutant_index += 1
+                        yield self._mutant_index
+            start_position = 0
+
+        # After finishing, update Request removing the mutant (and restoring the group value)
         # 完成之后，移除变体并更新Request
         self.request.mutant = None
         self.reset()
 
+    def combine(self, strength: int = 2, mutant_names: List[str] = None):
+        """
+        Changes how the block is mutated: instead of mutating one item at a time, several mutants are mutated at once,
+        so the interactions between fields (e.g. a wrong length with a long string) are tested. Each test case is a row
+        of a covering array (see CoveringArray) where each mutant takes its original value or one of its mutations,
+        and every combination of values of any `strength` mutants appears in some test case. The number of test cases
+        is around the product of the mutations of the `strength` biggest mutants, not the product of all of them.
+        组合变异模式，每个测试用例同时变异多个变种
+
+        Args:
+            strength:       Number of mutants whose combinations are all covered (2 = pairwise). 0 goes back to
+                            mutating one item at a time
+            mutant_names:   (Optional, def=None) Names of the mutants to combine. If None, all the fuzzable
+                            primitives of the block (at any depth)
+        """
+        if strength < 0:
+            raise FuzzowskiRuntimeError(f'Invalid combination strength: {strength}')
+        if mutant_names is not None:
+            fuzzable_names = {mutant.name for mutant in self.list_fuzzable_mutants()}
+            unknown = [name for name in mutant_names if name not in fuzzable_names]
+            if unknown:
+                raise FuzzowskiRuntimeError(f'Block "{self.name}" has no fuzzable mutants named: {", ".join(unknown)}')
+        self._combination_strength = strength
+        self._combination_names = None if mutant_names is None else list(mutant_names)
+        self._combinations = None
+        self._mutations_changed()
+        self.goto(0)
+
+    @property
+    def combinations(self) -> Optional[CoveringArray]:
+        """
+        Returns: The covering array followed in combination mode (see combine()), None if the block mutates one item
+                 at a time. It is built again if the number of mutations of the mutants combined changes
+        """
+        if not self._combination_strength:
+            return None
+        if self._combinations is not None and self._combinations_checked:
+            return self._combinations
+        mutants = [mutant for mutant in self.list_fuzzable_mutants() if mutant.num_mutations > 0 and
+                   (self._combination_names is None or mutant.name in self._combination_names)]
+        levels = [mutant.num_mutations + 1 for mutant in mutants]  # Level 0 is the original value
+        if self._combinations is None or mutants != self._combined_mutants \
+                or tuple(levels) != self._combinations.levels:
+            self._combinations = CoveringArray(levels, self._combination_strength)
+            self._combined_mutants = mutants
+            self._combined_levels = [mutant.mutant_index for mutant in mutants]
+        self._combinations_checked = True
+        return self._combinations
+
+    def _set_combination(self, row: Tuple[int, ...]):
+        """
+        Moves each combined mutant to its level in a row of the covering array. Only the mutants whose level changed
+        are moved, and the first mutant not in its original value is set as the mutant of the request.
+
+        Args:
+            row: Level of each combined mutant
+        """
+        mutant = None
+        for position, level in enumerate(row):
+            item = self._combined_mutants[position]
+            if self._combined_levels[position] != level:
+                item.goto(level)
+                self._combined_levels[position] = level
+            if mutant is None and level != 0:
+                mutant = item
+        if mutant is None and self._combined_mutants:
+            mutant = self._combined_mutants[0]
+        self.request.mutant = mutant
+        self.actual_mutant = mutant
+
+    def _get_group(self) -> Optional[Mutant]:
+        """
+        Returns: The Group attached to this block, None if there is no group
+        """
+        if self.group is None:
+            return None
+        group = self.request.names.get(self.group)
+        if group is None:
+            raise FuzzowskiRuntimeError(f'Group "{self.group}" of block "{self.name}" does not exist')
+        return group
+
+    def _set_group_value(self, group: Mutant, group_index: int):
+        """
+        Sets the group to one of its values while the items of the block are mutated. Only the group is marked as
+        dirty, so the renders reuse everything else.
+        设置组的值，渲染时只更新组本身
+
+        Args:
+            group: The group attached to this block
+            group_index: Index of the value of the group
+        """
+        self.group_idx = group_index
+        group._value = group._mutations[group_index]
+
     def render(self, replace_node: str = None, replace_value: bytes = None, original: bool = False) -> bytes:
         """
         Step through every item on this blocks stack and render it. Subsequent blocks recursively render their stacks.
@@ -102,8 +263,17 @@ class Block(Mutant):
 
         # Otherwise, render and encode as usual.
         # 否则，像往常一样进行渲染并编码
-        for item in self.stack:
-            self._rendered += item.render(replace_node=replace_node, replace_value=replace_value, original=original)
+        if self._rendering or original is True or (replace_node is not None and replace_value is not None):
+            # Renders that do not reflect the actual state (and recursive renders) do not use the cache
+            self._rendered = b"".join(
+                item.render(replace_node=replace_node, replace_value=replace_value, original=original)
+                for item in self.stack)
+        else:
+            self._rendering = True
+            try:
+                self._rendered = self._render_stack()
+            finally:
+                self._rendering = False
 
         # add the completed block to the request dictionary.
         # 将完成的block加入至请求字典中。
@@ -117,6 +287,78 @@ class Block(Mutant):
 
         return self._rendered
 
+    def _render_stack(self) -> bytes:
+        """
+        Renders the stack using the render cache. Only the dirty and volatile items are rendered again, and if just
+        one of them changed its span is spliced in the cached value.
+
+        Returns: The rendered stack
+        """
+        if self._chunks is None:
+            self._dirty.clear()
+            self._get_volatile_positions()
+            self._chunks = [item.render() for item in self.stack]
+            self._stack_rendered = b"".join(self._chunks)
+            self._offsets = [0] + list(itertools.accumulate(map(len, self._chunks)))
+            return self._stack_rendered
+
+        positions = self._dirty.union(self._volatile_positions)
+        self._dirty = set()
+        changed = [position for position in sorted(positions) if self._update_chunk(position)]
+
+        if len(changed) == 1:
+            position = changed[0]
+            start, end = self._offsets[position], self._offsets[position + 1]
+            chunk = self._chunks[position]
+            self._stack_rendered = b"".join((self._stack_rendered[:start], chunk, self._stack_rendered[end:]))
+            delta = len(chunk) - (end - start)
+            if delta != 0:
+                for i in range(position + 1, len(self._offsets)):
+                    self._offsets[i] += delta
+        elif len(changed) > 1:
+            self._stack_rendered = b"".join(self._chunks)
+            self._offsets = [0] + list(itertools.accumulate(map(len, self._chunks)))
+
+        return self._stack_rendered
+
+    def _update_chunk(self, position: int) -> bool:
+        """
+        Renders the item in the position of the stack and updates its cached value
+
+        Returns: True if the rendered value of the item changed
+        """
+        chunk = self.stack[position].render()
+        if chunk is self._chunks[position] or chunk == self._chunks[position]:
+            return False
+        self._chunks[position] = chunk
+        return True
+
+    def _invalidate(self, item: Mutant):
+        """
+        Marks an item of the stack as dirty, and this block as dirty in its parent, so the next render updates the
+        path from the item to the Request
+
+        Args:
+            item: The item of the stack whose value changed
+        """
+        self._dirty.add(self._positions[id(item)])
+        if self._parent is not None:
+            self._parent._invalidate(self)
+
+    def _get_volatile_positions(self) -> List[int]:
+        if self._volatile_positions is None:
+            self._volatile_positions = [position for position, item in enumerate(self.stack) if item._volatile]
+        return self._volatile_positions
+
+    def _reset_render_cache(self):
+        """
+        Discards the render cache of this block and its parents (the stack changed)
+        """
+        self._chunks = None
+        self._volatile_positions = None
+        if self._parent is not None:
+            self._parent._reset_render_cache()
+
     def _render_dep(self):
         """
         等于便比较不等于，不等于便比较等于 ...都置空，返回岂不是一样的。。。self._rendered = b""
@@ -159,23 +401,70 @@ class Block(Mutant):
     @property
     def num_mutations(self):
         """
-        Determine the number of repetitions we will be making.
+        Determine the number of repetitions we will be making. It is cached until the items change (see
+        _mutations_changed())
         确定我们要重复的次数
         @rtype:  int
         @return: Number of mutated forms this primitive can take.
         """
+        if self._mutation_count is not None:
+            return self._mutation_count
+
+        combinations = self.combinations
+        num_mutations = len(combinations) if combinations is not None else self._stack_num_mutations
+
+        # if this block is associated with a group, then multiply out the number of possible mutations.
+        # 如果该块关联了一个组，变异数量乘以组的值的数量
+        group = self._get_group()
+        if group is not None:
+            num_mutations *= len(group._mutations)
+
+        self._mutation_count = num_mutations
+        return num_mutations
+
+    @property
+    def num_enabled_mutations(self) -> int:
+        """
+        Number of mutations whose test cases are not disabled. A test case is disabled when the mutant of the request
+        is disabled (see TestCase.disabled), so the mutations of disabled primitives are not counted. In combination
+        mode the mutant of each test case depends on the row of the covering array, all the combinations are counted
+        """
+        if self._enabled_mutation_count is not None:
+            return self._enabled_mutation_count
+
+        combinations = self.combinations
+        if combinations is not None:
+            num_mutations = len(combinations)
+        else:
+            num_mutations = sum(item.num_enabled_mutations for item in self.stack if item.fuzzable)
+        group = self._get_group()
+        if group is not None:
+            num_mutations *= len(group._mutations)
+
+        self._enabled_mutation_count = num_mutations
+        return num_mutations
+
+    def _mutations_changed(self):
+        """
+        Discards the cached counts of the block and notifies the blocks containing it
+        """
+        self._mutation_count = None
+        self._enabled_mutation_count = None
+        self._mutation_index_cache = None
+        self._combinations_checked = False
+        super()._mutations_changed()
 
+    @property
+    def _stack_num_mutations(self) -> int:
+        """
+        Returns: The number of mutations of the items of the stack, for a single value of the group
+        """
         num_mutations = 0
 
         for item in self.stack:
             if item.fuzzable:
                 num_mutations += item.num_mutations
 
-        # if this block is associated with a group, then multiply out the number of possible mutations.
-        # TODO: Multiply when adding groups
-        # if self.group:
-        #    num_mutations *= len(self.request.names[self.group].values)
-
         return num_mutations
 
     def push(self, item: Mutant):
@@ -183,7 +472,11 @@ class Block(Mutant):
         Push an arbitrary item onto this blocks stack.
         往块堆栈中压入一个任意的item
         """
+        item._parent = self
+        self._positions[id(item)] = len(self.stack)
         self.stack.append(item)
+        self._reset_render_cache()
+        self._mutations_changed()
 
     def reset(self):
         """
@@ -202,30 +495,143 @@ class Block(Mutant):
         for item in self.stack:
             if item.fuzzable:
                 item.reset()
+        self._combined_levels = [0] * len(self._combined_mutants)
+
+        group = self._get_group()
+        if group is not None:
+            group.reset()
 
     def goto(self, mutant_index: int):
         # goto超过了已存在的数量
         if mutant_index > self.num_mutations:
             raise FuzzowskiRuntimeError(f"Mutant tried to get mutation "
                                         f"{mutant_index} > num_mutations ({self.num_mutations})")
-        elif mutant_index == 0:
-            self._reset()
-            self._mutation_gen = self._mutation_generator()
+        self._reset()
+        if mutant_index == 0:
+            self._step_gen = self._step_generator()
         else:
-            # Iterate through mutations until reaching the desired mutant_index
-            # 迭代越过直至达到想要的下标。 即在goto过程中，一直执行next直至goto后的参数
-            self.reset()
-            i = 0
-            self._mutation_gen = self._mutation_generator()
-            while i < mutant_index:
-                next(self._mutation_gen)  # The mutation_generator will change everything
-                i += 1
+            # Jump straight to the item that holds the mutation, and move it to its local index. This way a goto
+            # only costs the depth of the tree, and nothing is rendered until the generator is used
+            # 直接跳转至包含该变异的item，不再逐个执行next直至goto后的参数
+            combinations = self.combinations
+            group, group_index, stack_index = self._get_group(), 0, mutant_index
+            if group is not None:
+                # The mutations of the stack are repeated for each group value
+                group_mutations = len(combinations) if combinations is not None else self._stack_num_mutations
+                group_index, stack_index = divmod(mutant_index - 1, group_mutations)
+                stack_index += 1
+                self._set_group_value(group, group_index)
+            if combinations is not None:
+                # The row of the covering array is calculated from its index
+                self._set_combination(combinations[stack_index - 1])
+                self._mutant_index = mutant_index
+                self._step_gen = self._step_generator(stack_index, group_index=group_index)
+                self._mutation_gen = self._render_steps(self._step_gen)
+                return
+            position, local_index = self._locate_mutation(stack_index)
+            item = self.stack[position]
+            item.goto(local_index)
+            if not isinstance(item, Block):
+                self.request.mutant = item
+            self.actual_mutant = item
+            self._mutant_index = mutant_index
+            self._step_gen = self._step_generator(position, resume=True, group_index=group_index)
+        self._mutation_gen = self._render_steps(self._step_gen)
+
+    def mutation_offset(self, mutant: Mutant) -> Optional[int]:
+        """
+        Number of mutations of the block before the first mutation of the mutant specified
+
+        Args:
+            mutant: A mutant inside this block (at any depth)
+
+        Returns: The number of mutations before the ones of the mutant, or None if the mutant is not inside the block
+                 or it has no mutations
+        """
+        combinations = self.combinations
+        if combinations is not None:
+            # Combined mutants are mutated together from the first combination
+            return 0 if len(combinations) > 0 and mutant in self._combined_mutants else None
+
+        offset = 0
+        for item in self.stack:
+            if not (item.fuzzable and item.num_mutations > 0):
+                continue
+            if item is mutant:
+                return offset
+            if isinstance(item, Block):
+                item_offset = item.mutation_offset(mutant)
+                if item_offset is not None:
+                    return offset + item_offset
+            offset += item.num_mutations
+        return None
+
+    def mutation_runs(self) -> List[Tuple[Mutant, int, int]]:
+        """
+        Splits the mutations of the block in runs of consecutive mutations of the same mutant, in the order of the
+        generator. Blocks in combination mode are a single run, as all their mutants change in every mutation.
+        按生成顺序将块的变异划分为同一变种的连续区间
+
+        Returns: A list of tuples (mutant, start, length): the block mutant_index start + 1 .. start + length are the
+                 mutations of the mutant
+        """
+        combinations = self.combinations
+        if combinations is not None:
+            runs = [(self, 0, len(combinations))] if len(combinations) > 0 else []
+        else:
+            runs = []
+            offset = 0
+            for item in self.stack:
+                if not (item.fuzzable and item.num_mutations > 0):
+                    continue
+                if isinstance(item, Block):
+                    runs.extend((mutant, offset + start, length) for mutant, start, length in item.mutation_runs())
+                else:
+                    runs.append((item, offset, item.num_mutations))
+                offset += item.num_mutations
+
+        group = self._get_group()
+        if group is not None and runs:
+            # The mutations of the stack are repeated for each value of the group
+            group_mutations = self.num_mutations // len(group._mutations)
+            runs = [(mutant, group_index * group_mutations + start, length)
+                    for group_index in range(len(group._mutations)) for mutant, start, length in runs]
+        return runs
+
+    def _mutation_index(self) -> Tuple[List[int], List[int]]:
+        """
+        Prefix-sum index over the mutations of the items of the stack, in the same order used by the generator.
+
+        Returns: A tuple (positions, ends), where positions contains the stack position of each mutable item and
+                 ends[i] is the block mutant_index of the last mutation of the item stack[positions[i]]
+        """
+        if self._mutation_index_cache is None:
+            positions = [position for position, item in enumerate(self.stack)
+                         if item.fuzzable and item.num_mutations > 0]
+            ends = list(itertools.accumulate(self.stack[position].num_mutations for position in positions))
+            self._mutation_index_cache = (positions, ends)
+        return self._mutation_index_cache
+
+    def _locate_mutation(self, mutant_index: int) -> Tuple[int, int]:
+        """
+        Maps a mutant_index of the stack (1.._stack_num_mutations) to the item that generates it
+
+        Args:
+            mutant_index: The mutant_index in the mutations of the stack, for a single value of the group
+
+        Returns: A tuple (position, local_index), with the position of the item in the stack and the mutant_index
+                 that item must take
+        """
+        positions, ends = self._mutation_index()
+        i = bisect.bisect_left(ends, mutant_index)
+        local_index = mutant_index - (ends[i - 1] if i > 0 else 0)
+        return positions[i], local_index
 
     def __repr__(self):
         return "<%s %s>" % (self.__class__.__name__, self.name)
 
     def __len__(self):
-        if self.encoder is not None:
+        if self.encoder is not None or not self.dep:
             return len(self.render())
         else:
             return sum(len(item.render()) for item in self.stack)
@@ -239,95 +645,3 @@ class Block(Mutant):
                 if item.fuzzable:
                     fuzzable_items.append(item)
         return fuzzable_items
-
-    """
-    def _mutate(self):
-        mutated = False
-
-        # are we done with this block?
-        if self._fuzz_complete:
-            return False
-
-        #
-        # mutate every item on the stack for every possible group value.
-        #
-        if self.group:
-            group_count = self.request.names[self.group].num_mutations()
-
-            # update the group value to that at the current index.
-            self.request.names[self.group]._value = self.request.names[self.group].values[self.group_idx]
-
-            # mutate every item on the stack at the current group value.
-            for item in self.stack:
-                if item.fuzzable and item.mutate():
-                    mutated = True
-
-                    if not isinstance(item, Block):
-                        self.request.mutant = item
-                    break
-
-            # if the possible mutations for the stack are exhausted.
-            if not mutated:
-                # increment the group value index.
-                self.group_idx += 1
-
-                # if the group values are exhausted, we are done with this block.
-                if self.group_idx == group_count:
-                    # restore the original group value.
-                    self.request.names[self.group].reset()
-
-                # otherwise continue mutating this group/block.
-                else:
-                    # update the group value to that at the current index.
-                    self.request.names[self.group]._value = self.request.names[self.group].values[self.group_idx]
-
-                    # this the mutate state for every item in this blocks stack.
-                    # NOT THE BLOCK ITSELF THOUGH! (hence why we didn't call self.reset())
-                    for item in self.stack:
-                        if item.fuzzable:
-                            item.reset()
-
-                    # now mutate the first field in this block before continuing.
-                    # (we repeat a test case if we don't mutate something)
-                    for item in self.stack:
-                        if item.fuzzable and item.mutate():
-                            mutated = True
-
-                            if not isinstance(item, Block):
-                                self.request.mutant = item
-
-                            break
-        #
-        # no grouping, mutate every item on the stack once.
-        #
-        else:
-            for item in self.stack:
-                if item.fuzzable and item.mutate():
-                    mutated = True
-
-                    if not isinstance(item, Block):
-                        self.request.mutant = item
-
-                    break
-
-        # if this block is dependant on another field, then manually update that fields value appropriately while we
-        # mutate this block. we'll restore the original value of the field prior to continuing.
-        if mutated and self.dep:
-            # if a list of values was specified, use the first item in the list.
-            if self.dep_values:
-                self.request.names[self.dep]._value = self.dep_values[0]
-
-            # if a list of values was not specified, assume a single value is present.
-            else:
-                self.request.names[self.dep]._value = self.dep_value
-
-        # we are done mutating this block.
-        if not mutated:
-            self._fuzz_complete = True
-
-            # if we had a dependency, make sure we restore the original value.
-            if self.dep:
-                self.request.names[self.dep].reset()
-
-        return mutated
-    """
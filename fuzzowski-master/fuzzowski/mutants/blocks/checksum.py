@@ -8,7 +8,9 @@ from fuzzowski.exception import FuzzowskiRuntimeError
 from ..mutant import Mutant
 from ...constants import LITTLE_ENDIAN
 from ..blocks.request import Request
-from ...helpers import helpers
+from .block import Block
+from ...helpers import helpers, checksums
+from ... import ip_constants
 
 
 def _may_recurse(f):
@@ -24,6 +26,9 @@ def _may_recurse(f):
 
 
 class Checksum(Mutant):
+    # The checksum depends on the rendered value of the target block
+    _volatile = True
+
     checksum_lengths = {
         "crc32": 4,
         "adler32": 4,
@@ -33,6 +38,14 @@ class Checksum(Mutant):
         "udp": 2
     }
 
+    # Algorithms calculated with a checksums.SegmentedChecksum, updated incrementally from the last checksum
+    segmented_algorithms = {
+        "crc32": "crc32",
+        "adler32": "adler32",
+        "ipv4": "ones_complement",
+        "udp": "ones_complement"
+    }
+
     def __init__(self, block_name: str, request: Request, algorithm: Union[str, callable] = "crc32",
                  output_format: str = "binary", length: int = 0, endian: chr = LITTLE_ENDIAN, fuzzable: bool = True,
                  name: str = None, ipv4_src_block_name: str = None, ipv4_dst_block_name: str = None):
@@ -93,6 +106,11 @@ class Checksum(Mutant):
 
         self._rendered = self._get_dummy_value()
 
+        if type(self._algorithm) is str and self._algorithm in self.segmented_algorithms:
+            self._segmented = checksums.SegmentedChecksum(self.segmented_algorithms[self._algorithm])
+        else:
+            self._segmented = None
+
         # Set the recursion flag before calling a method that may cause a recursive loop.
         self._recursion_flag = False
 
@@ -109,9 +127,9 @@ class Checksum(Mutant):
         elif self._recursion_flag:  # 在result中返回的flag标志位
             self._rendered = self._get_dummy_value()
         else:
-            self._rendered = self._checksum(data=self._render_block(self._block_name),
-                                            ipv4_src=self._render_block(self._ipv4_src_block_name),
-                                            ipv4_dst=self._render_block(self._ipv4_dst_block_name))
+            self._rendered = self._checksum_segments(segments=self._render_block_segments(self._block_name),
+                                                     ipv4_src=self._render_block(self._ipv4_src_block_name),
+                                                     ipv4_dst=self._render_block(self._ipv4_dst_block_name))
 
         self._rendered = self._format(self._rendered)
         return self._rendered
@@ -140,6 +158,58 @@ class Checksum(Mutant):
     def _render_block(self, block_name):
         return self._request.names[block_name].render() if block_name is not None else None
 
+    @_may_recurse
+    def _render_block_segments(self, block_name):
+        """
+        Renders the block and returns its rendered items, so the checksum is only updated with the ones that changed
+
+        Returns: A list of segments whose concatenation is the rendered block
+        """
+        block = self._request.names[block_name]
+        data = block.render()
+        if isinstance(block, Block) and block.encoder is None and not block.dep and block._chunks is not None \
+                and data is block._stack_rendered:
+            # The value comes from the render cache of the block
+            return block._chunks
+        return [data]
+
+    def _checksum_segments(self, segments, ipv4_src, ipv4_dst):
+        """
+        Calculate and return the checksum (in raw bytes) of the concatenation of the segments, the same as
+        _checksum(b"".join(segments)). crc32, adler32, ipv4 and udp are updated from the state of the last checksum,
+        only reading the segments that changed.
+
+        Args:
+            segments: The data on which to calculate the checksum, split in segments
+            ipv4_src: IPv4 source address, for udp
+            ipv4_dst: IPv4 destination address, for udp
+
+        Returns: The checksum
+        """
+        if self._segmented is None:
+            return self._checksum(b"".join(segments), ipv4_src, ipv4_dst)
+
+        if self._algorithm == "udp":
+            length = sum(map(len, segments))
+            if length > ip_constants.UDP_MAX_LENGTH_THEORETICAL:
+                # The message is truncated for the checksum, it is calculated at once
+                return self._checksum(b"".join(segments), ipv4_src, ipv4_dst)
+            pseudo_header = helpers._udp_checksum_pseudo_header(ipv4_src, ipv4_dst, length)
+            total = checksums.add_ones_complement(checksums.ones_complement_sum(pseudo_header),
+                                                  self._segmented(segments))
+            return struct.pack(self._endian + "H", ~total & 0xffff)
+
+        value = self._segmented(segments)
+        if self._algorithm == "ipv4":
+            check = struct.pack(self._endian + "H", ~value & 0xffff)
+        else:
+            check = struct.pack(self._endian + "L", value & 0xFFFFFFFF)
+
+        if self._length:
+            return check[:self._length]
+        else:
+            return check
+
     def _checksum(self, data: bytes, ipv4_src, ipv4_dst):
         """
         Calculate and return the checksum (in raw bytes) of data.
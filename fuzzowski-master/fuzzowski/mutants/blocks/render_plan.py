@@ -0,0 +1,245 @@
+import itertools
+from typing import List, Dict, Tuple, Optional
+
+from ..mutant import Mutant
+from .block import Block
+from .checksum import Checksum
+from .repeat import Repeat
+from .size import Size
+from ..mutation_library import RepeatedSequence, join_segments
+
+
+class RenderPlan(object):
+    # Kinds of segments
+    LEAF = 0  # Its rendered value only depends on its value, it is rendered again only when the value changes
+    DYNAMIC = 1  # Rendered every time with its own render() (variables, repeats, encoded blocks, ...)
+    SIZE = 2  # Size fixup, replaced after all the segments are rendered
+    CHECKSUM = 3  # Checksum fixup, replaced after the sizes
+    LATE_SIZE = 4  # Size of variable width (ascii) not contained in any fixup target, calculated at the end
+    REPEAT = 5  # Repeat, kept as a RepeatedSequence in the segments returned
+
+    def __init__(self, request: 'Request'):
+        """
+        Flat render plan of a Request, created with Request.compile().
+        Request的扁平渲染计划，由Request.compile()创建
+
+        The mutant tree is flattened into a linear list of segments (the leaves of the tree) and the span of every
+        Block is recorded as a range of segments, so all the name references of Sizes and Checksums are resolved
+        only once. Rendering takes two passes: first all segments are emitted, with a dummy value in the place of each
+        Size and Checksum, then the lengths and checksums are calculated from the spans and put in their place.
+
+        Sizes with binary output and Checksums targeting blocks of the request are replaced, as their width is fixed.
+        Sizes with ascii output are calculated at the end, if they are not part of the data of any other fixup (e.g. a
+        Content-Length header). Anything else (blocks with encoders or dependencies, references to other requests...)
+        is rendered with its own render() method, which gives exactly the same result as Request.render().
+
+        Args:
+            request: The request to compile
+        """
+        self.request = request
+        self._segments: List[Mutant] = []
+        self._spans: Dict[int, Tuple[int, int]] = {}  # id(mutant) => (first segment, last segment + 1)
+        self._flatten(request)
+
+        self._kinds: List[int] = []
+        self._targets: List[Optional[Tuple]] = []  # spans used by each fixup (target, ipv4_src, ipv4_dst)
+        self._placeholders: Dict[int, bytes] = {}  # position => dummy value rendered in the first pass
+        for position, item in enumerate(self._segments):
+            kind, targets = self._classify(item)
+            self._kinds.append(kind)
+            self._targets.append(targets)
+
+        # Sizes of variable width can only be calculated at the end if no other fixup depends on them
+        fixup_spans = [span for targets in self._targets if targets is not None for span in targets if span]
+        for position, kind in enumerate(self._kinds):
+            if kind == self.LATE_SIZE and any(start <= position < end for start, end in fixup_spans):
+                self._kinds[position], self._targets[position] = self.DYNAMIC, None
+
+        for position, item in enumerate(self._segments):
+            kind = self._kinds[position]
+            if kind == self.SIZE:
+                self._placeholders[position] = item._get_dummy_value()
+            elif kind == self.CHECKSUM:
+                self._placeholders[position] = item._format(item._get_dummy_value())
+            elif kind == self.LATE_SIZE:
+                self._placeholders[position] = b''
+
+        self._size_positions = [p for p, kind in enumerate(self._kinds) if kind == self.SIZE]
+        self._late_size_positions = [p for p, kind in enumerate(self._kinds) if kind == self.LATE_SIZE]
+        # None if checksums depend on each other in a loop, and the plan can not be used
+        self._checksum_positions = self._sort_checksums()
+
+        self._chunks: List[bytes] = [b''] * len(self._segments)
+        self._tokens: List[object] = [self] * len(self._segments)  # last value rendered of each LEAF segment
+
+    @property
+    def compiled(self) -> bool:
+        """
+        Returns: False if the request could not be compiled and render() just calls Request.render()
+        """
+        return self._checksum_positions is not None
+
+    def __len__(self):
+        return len(self._segments)
+
+    def _flatten(self, block: Block):
+        for item in block.stack:
+            start = len(self._segments)
+            if isinstance(item, Block) and not item.dep and item.encoder is None:
+                self._flatten(item)
+            else:
+                self._segments.append(item)
+            self._spans[id(item)] = (start, len(self._segments))
+
+    def _span_of(self, name: Optional[str]) -> Optional[Tuple[int, int]]:
+        """
+        Returns: The span of the mutant of the request with the name specified, None if it is not part of the plan
+        """
+        mutant = self.request.names.get(name)
+        return self._spans.get(id(mutant)) if mutant is not None else None
+
+    def _classify(self, item: Mutant) -> Tuple[int, Optional[Tuple]]:
+        """
+        Returns: the kind of segment for the item and the spans of its targets if it is a fixup
+        """
+        if isinstance(item, Size) and item.request is self.request:
+            target = self._span_of(item.block_name)
+            if target is not None:
+                return (self.SIZE if item.format == 'binary' else self.LATE_SIZE), (target,)
+        elif isinstance(item, Checksum) and item._request is self.request:
+            target = self._span_of(item._block_name)
+            ipv4_src = self._span_of(item._ipv4_src_block_name)
+            ipv4_dst = self._span_of(item._ipv4_dst_block_name)
+            if target is not None and (ipv4_src is not None or item._ipv4_src_block_name is None) \
+                    and (ipv4_dst is not None or item._ipv4_dst_block_name is None):
+                return self.CHECKSUM, (target, ipv4_src, ipv4_dst)
+        elif isinstance(item, Repeat):
+            return self.REPEAT, None
+        if item._volatile:
+            return self.DYNAMIC, None
+        return self.LEAF, None
+
+    def _sort_checksums(self) -> Optional[List[int]]:
+        """
+        Sort the checksums so the ones contained in the data of other checksums are calculated first.
+
+        Returns: The positions of the checksums in order, or None if there is a dependency loop
+        """
+        checksums = [p for p, kind in enumerate(self._kinds) if kind == self.CHECKSUM]
+        depends = {p: {other for other in checksums if other != p and
+                       any(span is not None and span[0] <= other < span[1] for span in self._targets[p])}
+                   for p in checksums}
+        ordered = []
+        while depends:
+            ready = sorted(p for p, deps in depends.items() if not deps)
+            if not ready:
+                return None
+            for p in ready:
+                del depends[p]
+            for deps in depends.values():
+                deps.difference_update(ready)
+            ordered.extend(ready)
+        return ordered
+
+    def render(self) -> bytes:
+        """
+        Render the request using the plan. The result is the same as Request.render()
+
+        Returns: The rendered request
+        """
+        return join_segments(self.render_segments())
+
+    def render_segments(self) -> List:
+        """
+        Render the request using the plan, without joining the result. The segments are the cached rendered values of
+        the items (nothing is copied), so they can be transmitted with gather I/O (socket.sendmsg). A Repeat is a
+        RepeatedSequence of the rendered block, its repetitions are never built: the connections send it in chunks
+        (see iter_segments()).
+        不拼接渲染结果，返回各个片段（缓存的渲染值，不复制），可以直接用sendmsg发送
+
+        Returns: The list of segments of the rendered request (bytes and RepeatedSequences), their concatenation
+                 (see join_segments()) is the same as Request.render()
+        """
+        if self._checksum_positions is None:
+            return [self.request.render()]
+
+        # First pass: emit every segment, with dummy values for the fixups
+        chunks = self._chunks
+        tokens = self._tokens
+        fuzzed = set()
+        for position, item in enumerate(self._segments):
+            kind = self._kinds[position]
+            if kind == self.LEAF:
+                value = item._value
+                if value is not tokens[position]:
+                    tokens[position] = value
+                    chunks[position] = item.render()
+            elif kind == self.DYNAMIC:
+                chunks[position] = item.render()
+            elif kind == self.REPEAT:
+                # Only the length is needed to calculate the fixups, the repetitions are not built
+                chunks[position] = item.render_repeated()
+            elif item._should_render_fuzz_value():
+                chunks[position] = item.render()
+                fuzzed.add(position)
+            else:
+                chunks[position] = self._placeholders[position]
+
+        offsets = [0] + list(itertools.accumulate(map(len, chunks)))
+        segments = list(chunks)
+
+        # Second pass: replace the dummy values of sizes, and then checksums, with the real ones
+        for position in self._size_positions:
+            if position in fuzzed:
+                continue
+            value = self._size_value(position, offsets)
+            if len(value) != len(segments[position]):
+                # The value does not fit in the place reserved for it, the plan can not be used
+                return [self.request.render()]
+            segments[position] = value
+
+        for position in self._checksum_positions:
+            if position in fuzzed:
+                continue
+            item = self._segments[position]
+            target, ipv4_src, ipv4_dst = self._targets[position]
+            data = self._expand(segments[target[0]:target[1]])
+            ipv4_src, ipv4_dst = (b"".join(self._expand(segments[span[0]:span[1]])) if span is not None else None
+                                  for span in (ipv4_src, ipv4_dst))
+            value = item._format(item._checksum_segments(segments=data, ipv4_src=ipv4_src, ipv4_dst=ipv4_dst))
+            if len(value) != len(segments[position]):
+                return [self.request.render()]
+            segments[position] = value
+
+        # Finally, the sizes of variable width. No other fixup contains them, so the offsets are still valid
+        for position in self._late_size_positions:
+            if position not in fuzzed:
+                segments[position] = self._size_value(position, offsets)
+
+        return segments
+
+    @staticmethod
+    def _expand(segments: List) -> List[bytes]:
+        """
+        Returns: The segments with each RepeatedSequence replaced by its repetitions (references to the same segment),
+                 to calculate the checksums of the data that contains them
+        """
+        expanded = []
+        for segment in segments:
+            if isinstance(segment, RepeatedSequence):
+                expanded.extend([segment.sequence] * segment.count)
+            else:
+                expanded.append(segment)
+        return expanded
+
+    def _size_value(self, position: int, offsets: List[int]) -> bytes:
+        """
+        Returns: The rendered value of the Size in the position, calculated from the span of its target
+        """
+        item = self._segments[position]
+        start, end = self._targets[position][0]
+        return item._render(item.offset + item._inclusive_length_of_self + offsets[end] - offsets[start])
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.request.name}: {len(self._segments)} segments, ' \
+               f'{len(self._size_positions) + len(self._late_size_positions)} sizes, {len(self._checksum_positions or [])} checksums>'
@@ -1,9 +1,12 @@
 from fuzzowski.exception import FuzzowskiRuntimeError
 from fuzzowski.mutants.primitives import BitField
 from ..mutant import Mutant
+from ..mutation_library import RepeatedSequence
 
 
 class Repeat(Mutant):
+    # The repetitions depend on the rendered value of the target block
+    _volatile = True
 
     def __init__(self, block_name: str, request: 'Request', min_reps: int = 0, max_reps: int = None,
                  step: int = 1, variable_name: str = None, include: bool = False, fuzzable: bool = True,
@@ -74,44 +77,55 @@ class Repeat(Mutant):
             self._fuzzable = False
         self._disabled = False
 
-    def _mutate(self):
-        """
-        Modifies the Mutant
-        修改突变
-        Set the mutant to the next mutation, increasing the mutant_index and upgrading the value
+        self._repeated = None  # Last RepeatedSequence rendered
+        self._repeated_value = b''  # and its value, reused while the block and the repetitions do not change
 
-        Returns: True if it was mutated correctly, false if there are no mutations left or the mutant is
-                如果突变正确，那么为真，如果没有剩余或者突变。。。。
+    @property
+    def _repetitions(self) -> int:
         """
-        ret_value = super()._mutate()
-
-        if ret_value is True:
+        Returns: The actual number of repetitions of the block
+        """
+        if self.variable:
             # If the variable is set, it will repeat variable times
             # 如果设置了variable，那么便会循环variable次
-            if self.variable:
-                num_repeats = max(0, self.variable._value - 1) if self.include else self.variable._value
-                # repeat的次数，如果被包含，那么便在0和variable-1中取一个最大值。否则就直接赋值
-                # TODO:留下疑问。
-                self._value = num_repeats * self.block.render()
-            else:
-                num_repeats = self._value  # Mutate will take self._mutations[self.mutant_index]
-                self._value = num_repeats * self.block.render()
+            # repeat的次数，如果被包含，那么便在0和variable-1中取一个最大值。否则就直接赋值
+            return max(0, self.variable._value - 1) if self.include else max(0, self.variable._value)
+        if self._mutant_index == 0:
+            return 0  # The original value renders to nothing
+        return self._value  # Mutate will take self._mutations[self.mutant_index]
 
-        return ret_value
+    def render_repeated(self) -> RepeatedSequence:
+        """
+        Render the Repeat as a descriptor of the rendered block repeated, without building the repetitions. Its length
+        is the length of the rendered Repeat, and build() returns the rendered value.
+        以描述符的形式渲染，不生成重复的数据
+
+        Returns: The descriptor (rendered block, number of repetitions)
+        """
+        return RepeatedSequence(self.block.render(), self._repetitions)
 
     def render(self, replace_node: str = None, replace_value: bytes = None, original: bool = False) -> bytes:
         """
         Nothing fancy on render, simply return the value.
+        The repetitions are only built again when the rendered block or the number of repetitions change.
         """
         if replace_node is not None and replace_value is not None and replace_node == self.name:
             self._rendered = replace_value
         elif original is True:
             self._rendered = self._original_value
-        elif self.variable:
-            num_repeats = max(0, self.variable._value - 1) if self.include else self.variable._value
-            self._value = self.block.render() * num_repeats
-            self._rendered = self._render(self._value)
         else:
-            self._rendered = self._render(self._value)
+            repeated = self.render_repeated()
+            # The render cache of the block returns the same object if it did not change, so the comparison of the
+            # descriptors is usually an identity check
+            if self._repeated != repeated:
+                self._repeated_value = self._render(repeated.build())
+            self._repeated = repeated
+            self._rendered = self._repeated_value
 
         return self._rendered
+
+    def __len__(self) -> int:
+        """
+        Returns: The length of the rendered Repeat, calculated without building the repetitions
+        """
+        return len(self.render_repeated())
@@ -1,16 +1,21 @@
 import collections
 import re
+from typing import List
 
 from fuzzowski.exception import FuzzowskiRuntimeError
 from ..mutant import Mutant
 from .block import Block
 from .. import blocks
 from fuzzowski.responses.response import Response
+from fuzzowski.connections.completion import Completion
 
 
 class Request(Block):
     _mutant_name = Mutant.name_re.pattern.strip("^$")
     _path_name_re = re.compile(f'^(?P<request>{_mutant_name})(?:[.](?P<mutant>{_mutant_name}))?$')
+    # Incremented every time the number of mutations (or the enabled ones) of the request changes, so the counts cached
+    # outside the request (e.g. the total of a Session) know when they are outdated
+    _count_generation = 0
 
     def __init__(self, name):
         """
@@ -32,6 +37,15 @@ class Request(Block):
         # self.variables: Mapping[str, int] = dict()
         self.variables = blocks.VARIABLES
         self.responses = []
+        self.completions = []  # Completions of the reply, see reply_completions
+        self._render_plan = None  # Compiled RenderPlan, see compile()
+
+    def _mutations_changed(self):
+        """
+        Discards the cached counts of the request, and increments its generation
+        """
+        self._count_generation += 1
+        super()._mutations_changed()
 
     def push(self, item: Mutant):
         """
@@ -62,7 +76,7 @@ class Request(Block):
         # otherwise, the pushed item goes onto the stack of the last opened block.
         # 否则，将item压入至最后一个开放的块中
         if not self.block_stack:  # No blocks open in block_stack
-            self.stack.append(item)  # Adds the item to the Request stack
+            super().push(item)  # Adds the item to the Request stack
         else:
             self.block_stack[-1].push(item)  # Adds the item to the last opened block
 
@@ -70,6 +84,23 @@ class Request(Block):
         if isinstance(item, Block):
             self.block_stack.append(item)
 
+    def compile(self) -> 'RenderPlan':
+        """
+        Compile the request into a flat RenderPlan, resolving the references of all Sizes and Checksums once.
+        The plan is cached until the request stack changes.
+        将请求编译为扁平的渲染计划
+
+        Returns: The RenderPlan of the request. plan.render() returns the same as render()
+        """
+        if self._render_plan is None:
+            from .render_plan import RenderPlan  # render_plan imports Size and Checksum, which import this module
+            self._render_plan = RenderPlan(self)
+        return self._render_plan
+
+    def _reset_render_cache(self):
+        super()._reset_render_cache()
+        self._render_plan = None
+
     def pop(self):
         """
         The last open block was closed, so pop it off of the block stack.
@@ -128,6 +159,21 @@ class Request(Block):
         if response not in self.responses:
             self.responses.append(response)
 
+    def add_completion(self, completion: Completion):
+        if completion not in self.completions:
+            self.completions.append(completion)
+
+    @property
+    def reply_completions(self) -> List[Completion] or None:
+        """
+        The completions that tell when the reply to this request is complete: the ones added with add_completion() and
+        the ones of the responses. None if there are none, so the completions of the Target are used
+        响应完整性判断：请求自身的和responses声明的
+        """
+        completions = self.completions + [response.completion for response in self.responses
+                                          if response.completion is not None]
+        return completions or None
+
     def parse_response(self, data: bytes) -> Response or None:
         if len(self.responses) == 0:
             return None
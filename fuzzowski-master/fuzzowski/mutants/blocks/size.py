@@ -2,6 +2,7 @@ from functools import wraps
 from ...constants import LITTLE_ENDIAN
 from ..primitives.bit_field import BitField
 from ..blocks.request import Request
+from ..blocks.repeat import Repeat
 
 
 def _may_recurse(f):
@@ -16,6 +17,8 @@ def _may_recurse(f):
 
 
 class Size(BitField):
+    # The size depends on the rendered value of the target block
+    _volatile = True
 
     def __init__(self, block_name: str, request: Request, offset: int = 0, length: int = 4,
                  endian: chr = LITTLE_ENDIAN, output_format: str = "binary", inclusive: bool = False,
@@ -83,7 +86,7 @@ class Size(BitField):
                 return self._rendered
 
         # Rest of the cases
-        if self._fuzzable and (self.mutant_index != 0) and not self._fuzz_complete:
+        if self._should_render_fuzz_value():
             # In this case, we render the mutated value
             self._rendered = self._render(self._value)
         elif self._recursion_flag:  # If activated, we are in a recursion loop so we need to stop it
@@ -95,6 +98,9 @@ class Size(BitField):
 
         return self._rendered
 
+    def _should_render_fuzz_value(self) -> bool:
+        return self._fuzzable and (self.mutant_index != 0) and not self._fuzz_complete
+
     def _render_replaced_value(self, replaced_value: bytes) -> bytes:
         """
         Render the length of the replaced_value passed as argument, taking other parameters into account
@@ -136,7 +142,11 @@ class Size(BitField):
         返回的是目标块的实际长度。
         """
         # length = len(self.request.names[self.block_name])
-        length = int(len(self.request.get_mutant(self.block_name)))  # 通过get_mutant方法，给其传递name参数以便获得实际的request中的block
+        # 通过get_mutant方法，给其传递name参数以便获得实际的request中的block
+        # The rendered bytes are measured: len() of a primitive counts the characters of a str mutation, not the bytes
+        # of its encoding. The length of a Repeat is calculated without building the repetitions
+        mutant = self.request.get_mutant(self.block_name)
+        length = len(mutant) if isinstance(mutant, Repeat) else len(mutant.render())
 
         return length
 
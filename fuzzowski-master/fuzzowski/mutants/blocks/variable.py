@@ -4,6 +4,9 @@ from .request import Request
 
 
 class Variable(Mutant):
+    # The value depends on the variables of the request
+    _volatile = True
+
     def __init__(self, name: str, request: Request, value: bytes, fuzzable: bool = False):
         """
         A variable that takes the value of a variable set in the request
@@ -0,0 +1,99 @@
+import functools
+import math
+import operator
+from collections.abc import Sequence
+from typing import List, Tuple
+
+from ..exception import FuzzowskiRuntimeError
+
+
+def _next_prime(number: int) -> int:
+    """
+    Returns: The smallest prime greater or equal than number
+    """
+    candidate = max(number, 2)
+    while any(candidate % divisor == 0 for divisor in range(2, int(math.sqrt(candidate)) + 1)):
+        candidate += 1
+    return candidate
+
+
+class CoveringArray(Sequence):
+    """
+    Covering array of strength t over factors with different numbers of levels: every combination of levels of any t
+    factors appears in at least one row. Rows are calculated from their index when they are accessed, nothing is
+    stored, so any row can be reached in constant time.
+    t-覆盖数组（默认两两组合），按下标计算每一行
+
+    The rows are built with a polynomial construction over GF(p), where p is a prime not smaller than the levels of the
+    second biggest factor (nor the number of factors - 1). Row (a, c) is the polynomial
+    q(x) = c[0] + c[1]*x + ... + c[t-2]*x**(t-2) + a*x**(t-1), the biggest factor takes the level a and each other
+    factor the value of q in a different point of GF(p). Any t evaluations of q are a bijection of its coefficients,
+    so all the combinations appear. Levels out of the range of a factor are folded over its levels.
+
+    The array has max(n1, p) * p**(t-1) rows, where n1 is the levels of the biggest factor: around n1 * n2 rows for
+    pairwise arrays, instead of the product of all the levels. If the full product is smaller, it is used instead.
+    """
+
+    def __init__(self, levels: Sequence[int], strength: int = 2):
+        """
+        Args:
+            levels: Number of levels of each factor
+            strength: Number of factors whose combinations are all covered (2 = pairwise)
+        """
+        if strength < 1:
+            raise FuzzowskiRuntimeError(f'Invalid covering array strength: {strength}')
+        if any(level < 1 for level in levels):
+            raise FuzzowskiRuntimeError(f'Every factor of a covering array needs at least one level: {levels}')
+        self.levels = tuple(levels)
+        self.strength = strength
+
+        # The biggest factor is the special one, the rest are evaluations of the polynomial
+        order = sorted(range(len(self.levels)), key=lambda factor: -self.levels[factor])
+        self._first = order[0] if order else None
+        self._others = order[1:]
+        self._prime = _next_prime(max([self.levels[factor] for factor in self._others] + [len(self._others)]))
+        self._first_levels = max(self.levels[self._first], self._prime) if order else 0
+        # _powers[i][k] = point(i) ** k mod p, the point of each factor is its position in _others
+        self._powers = [[pow(point, k, self._prime) for k in range(strength)] for point in range(len(self._others))]
+
+        product = functools.reduce(operator.mul, self.levels, 1) if self.levels else 0
+        polynomial = self._first_levels * self._prime ** (strength - 1)
+        self._full_product = len(self.levels) <= strength or product <= polynomial
+        self._length = product if self._full_product else polynomial
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index) -> Tuple[int, ...]:
+        """
+        Returns: The row in the index, a tuple with the level of each factor (0..levels - 1)
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('CoveringArray index out of range')
+
+        row: List[int] = [0] * len(self.levels)
+        if self._full_product:
+            # Mixed radix, the last factor changes first
+            for factor in reversed(range(len(self.levels))):
+                index, row[factor] = divmod(index, self.levels[factor])
+            return tuple(row)
+
+        prime = self._prime
+        coefficients, a = divmod(index, self._first_levels)
+        row[self._first] = a % self.levels[self._first]
+        digits = []
+        for _ in range(self.strength - 1):
+            coefficients, digit = divmod(coefficients, prime)
+            digits.append(digit)
+        digits.append(a % prime)
+        for factor, powers in zip(self._others, self._powers):
+            value = sum(digit * power for digit, power in zip(digits, powers)) % prime
+            row[factor] = value % self.levels[factor]
+        return tuple(row)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} strength {self.strength}, {len(self.levels)} factors, {len(self)} rows>'
@@ -159,6 +159,23 @@ class IMutant(object, metaclass=ABCMeta):
         """
         pass
 
+    @abstractmethod
+    def step_generator(self, mutant_index: int = 0) -> Generator[int, None, None]:
+        """
+        Creates a generator that changes the Mutant like mutation_generator(), but does not render anything. It only
+        advances the state, the bytes are produced when render() is called
+        创建一个只改变Mutant状态而不进行渲染的生成器
+
+        Args:
+            mutant_index: It initializes the mutant_index at the specified value. If None, it continues from the
+                          actual state
+
+        Returns:
+            Generator: A generator of the mutant_index after each step
+
+        """
+        pass
+
     @abstractmethod
     def goto(self, mutant_index: int):
         """
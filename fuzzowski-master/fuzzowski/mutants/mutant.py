@@ -1,8 +1,11 @@
 from ..exception import FuzzowskiRuntimeError
 from .imutant import IMutant
-from typing import Generator, Union
+from typing import Generator, List, Tuple, Union
 import re
 
+# Value of a mutant that moved to a mutation whose value was not read yet (see Mutant._value)
+_PENDING = object()
+
 
 class Mutant(IMutant):
     """
@@ -12,6 +15,15 @@ class Mutant(IMutant):
 
     name_re = re.compile('^[A-Za-z0-9_]+$')
 
+    # Block containing this mutant, set by Block.push(). It is notified every time the value changes, so it knows
+    # which part of its rendered value must be updated
+    _parent = None
+    # True if render() depends on something else than the value of the mutant (other blocks, variables...). The
+    # containing blocks will render volatile mutants every time instead of reusing their last rendered value
+    _volatile = False
+    # Generator used by next(), it is created the first time it is needed
+    _mutation_gen = None
+
     def __init__(self, value: bytes, name: str = None, fuzzable: bool = True, mutations: list = None):
         """
         Initializes the Mutant class, most Primitives and Blocks should override this
@@ -25,7 +37,7 @@ class Mutant(IMutant):
         super().__init__()
 
         if mutations is None:
-            mutations = []
+            mutations = ()  # shared by all the mutants without mutations
         self._fuzzable = fuzzable  # flag controlling whether or not the given mutant is to be fuzzed.
         # 确定是否进行该变种的fuzz的标志
         self.name = name
@@ -49,8 +61,6 @@ class Mutant(IMutant):
 
         self._disabled = False  # If the node is _disabled, its mutations should not be used
         # 目测跟其他概念（节点）有关。。如果一个节点不使用。那么它的变体也不应该被使用
-        self._mutation_gen = self.mutation_generator()
-        # 创建突变生成器
 
     def __iter__(self):
         self.reset()
@@ -58,6 +68,9 @@ class Mutant(IMutant):
         return self
 
     def __next__(self):
+        if self._mutation_gen is None:
+            # 创建突变生成器，从当前状态继续
+            self._mutation_gen = self.mutation_generator(None)
         return next(self._mutation_gen)
 
     def __repr__(self):
@@ -71,6 +84,24 @@ class Mutant(IMutant):
         """
         return len(self._value)
 
+    @property
+    def _value(self):
+        """
+        Current value of the mutant. Setting it marks the mutant as dirty in the blocks containing it.
+        The value of a mutation is only taken from the mutations library when it is read, so stepping through
+        mutations does not build them
+        """
+        value = self._current_value
+        if value is _PENDING:
+            value = self._current_value = self._mutations[self._mutant_index - 1]
+        return value
+
+    @_value.setter
+    def _value(self, value):
+        self._current_value = value
+        if self._parent is not None:
+            self._parent._invalidate(self)
+
     @property
     def name(self) -> str:
         return self._name
@@ -94,6 +125,7 @@ class Mutant(IMutant):
     @disabled.setter
     def disabled(self, value: bool):
         self._disabled = value
+        self._mutations_changed()
 
     @property
     def mutant_index(self) -> int:
@@ -103,10 +135,34 @@ class Mutant(IMutant):
     def num_mutations(self) -> int:
         return len(self._mutations) if self._fuzzable else 0
 
+    @property
+    def num_enabled_mutations(self) -> int:
+        """
+        Returns: The number of mutations whose test cases are not disabled
+        """
+        return 0 if self._disabled else self.num_mutations
+
+    def _mutations_changed(self):
+        """
+        Notifies the blocks containing the mutant that its number of mutations (or the enabled ones) changed, so they
+        discard their cached counts. It must be called every time the mutations library or the disabled flag changes
+        """
+        if self._parent is not None:
+            self._parent._mutations_changed()
+
     @property
     def original_value(self) -> bytes:
         return self._render(self._original_value)
 
+    def mutation_buckets(self) -> List[Tuple[str, int]]:
+        """
+        Splits the mutations in groups of the same kind, in the order of the mutant_index. Samplers use them as strata
+        so every kind of mutation is represented
+
+        Returns: A list of tuples (bucket name, number of mutations)
+        """
+        return [('mutations', self.num_mutations)] if self.num_mutations > 0 else []
+
     def reset(self):
         """
         Resets the mutant to the original state
@@ -137,9 +193,9 @@ class Mutant(IMutant):
             self.reset()
             return False
 
-        # update the current value from the fuzz library.
+        # update the current value from the fuzz library. It is read from the library when it is used.
         # 更新fuzz库中的当前值
-        self._value = self._mutations[self.mutant_index]
+        self._value = _PENDING
 
         # increment the mutation count.
         # 突变体的数量增加
@@ -148,17 +204,27 @@ class Mutant(IMutant):
         return True
 
     def mutation_generator(self, mutant_index: int = 0) -> Generator[bytes, None, None]:
+        return self._render_steps(self.step_generator(mutant_index))
+
+    def _render_steps(self, steps: Generator[int, None, None]) -> Generator[bytes, None, None]:
+        """
+        Renders the mutant after each step of a step generator
+        """
+        for _ in steps:
+            yield self.render()
+
+    def step_generator(self, mutant_index: int = 0) -> Generator[int, None, None]:
         if mutant_index is not None:
             self.reset()
             self.goto(mutant_index)
-        return self._mutation_generator()
+        return self._step_generator()
 
-    def _mutation_generator(self):
+    def _step_generator(self):
         # if self.mutant_index != 0:
         #     yield self.render()  # We want to render the first value of the generator when we go with goto
         # 当我们使用goto方法时，我们想要设置生成器的第一个值 对应shell中的goto方法
         while self._mutate():
-            yield self.render()
+            yield self._mutant_index
 
     def goto(self, mutant_index: int):
         if mutant_index > self.num_mutations:
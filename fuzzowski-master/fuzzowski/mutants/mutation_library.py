@@ -0,0 +1,196 @@
+import bisect
+import itertools
+from collections.abc import Sequence
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Union
+
+# Size of the buffer of repetitions of a RepeatedSequence given in chunks
+CHUNK_SIZE = 65536
+
+
+class RepeatedSequence(NamedTuple):
+    """
+    Descriptor of a long mutation: ``sequence`` repeated ``count`` times, optionally truncated to ``max_len`` and
+    followed by ``suffix``. The value is only built when build() is called, so libraries can hold thousands of long
+    strings without keeping them in memory.
+    """
+    sequence: Union[str, bytes]
+    count: int
+    max_len: int = -1
+    suffix: Union[str, bytes, None] = None
+
+    def __len__(self) -> int:
+        length = len(self.sequence) * self.count
+        if self.max_len != -1:
+            length = min(length, self.max_len)
+        return length + (len(self.suffix) if self.suffix else 0)
+
+    def build(self) -> Union[str, bytes]:
+        """
+        Returns: The value described
+        """
+        count = self.count
+        if self.max_len != -1 and len(self.sequence) > 0:
+            # Do not build more repetitions than the ones that survive the truncation
+            count = min(count, -(-self.max_len // len(self.sequence)))
+        value = self.sequence * count
+        if self.max_len != -1:
+            value = value[:self.max_len]
+        if self.suffix:
+            value += self.suffix
+        return value
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Union[str, bytes]]:
+        """
+        Yields the value described in chunks, without building it: one buffer of about chunk_size with the most
+        repetitions of the sequence that fit is yielded again and again, followed by the rest and the suffix.
+        以分块的形式生成值，重复使用同一个缓冲区，不生成完整的值
+
+        Args:
+            chunk_size: (Optional, def=CHUNK_SIZE) Size of the buffer of repetitions
+
+        Returns: The chunks, their concatenation is build()
+        """
+        length = len(self) - (len(self.suffix) if self.suffix else 0)
+        if length > 0:
+            buffer = self.sequence * min(self.count, max(1, chunk_size // len(self.sequence)))
+            for _ in range(length // len(buffer)):
+                yield buffer
+            if length % len(buffer):
+                yield buffer[:length % len(buffer)]
+        if self.suffix:
+            yield self.suffix
+
+
+def iter_segments(segments: Iterable) -> Iterator:
+    """
+    Yields the segments of a rendered request (see RenderPlan.render_segments()) as bytes-like objects, giving each
+    RepeatedSequence in chunks (see RepeatedSequence.chunks()), so the repetitions are never built
+
+    Args:
+        segments: Bytes-like objects and RepeatedSequence descriptors
+
+    Returns: The bytes-like segments
+    """
+    for segment in segments:
+        if isinstance(segment, RepeatedSequence):
+            yield from segment.chunks()
+        else:
+            yield segment
+
+
+def join_segments(segments: Iterable) -> bytes:
+    """
+    Returns: The concatenation of the segments of a rendered request, with the RepeatedSequences built
+    """
+    return b"".join(iter_segments(segments))
+
+
+class MutationLibrary(Sequence):
+    """
+    Read-only sequence that concatenates several mutation lists without copying them.
+    不复制列表而将多个变异列表连接起来的只读序列
+
+    Items are looked up by offset across the lists and RepeatedSequence descriptors are built only when their index is
+    accessed. The lists are referenced, not copied, so a library (or the lists inside it) can be shared across
+    instances. Libraries can be nested.
+    """
+
+    def __init__(self, *mutation_lists: Sequence):
+        self._lists = [mutations for mutations in mutation_lists if len(mutations) > 0]
+        self._ends = list(itertools.accumulate(len(mutations) for mutations in self._lists))
+
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('MutationLibrary index out of range')
+
+        position = bisect.bisect_right(self._ends, index)
+        start = self._ends[position - 1] if position > 0 else 0
+        value = self._lists[position][index - start]
+        if isinstance(value, RepeatedSequence):
+            return value.build()
+        return value
+
+    def __iter__(self):
+        for mutations in self._lists:
+            for value in mutations:
+                yield value.build() if isinstance(value, RepeatedSequence) else value
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {len(self)} mutations>'
+
+
+class UniqueMutations(Sequence):
+    """
+    Mutation list that ignores the values already added, keeping the order of insertion.
+    忽略已添加值、保持插入顺序的变异列表
+
+    Membership is checked with a set, so adding values does not scan the list.
+    """
+
+    def __init__(self, values: Iterable = ()):
+        self._values = []
+        self._seen = set()
+        for value in values:
+            self.add(value)
+
+    def add(self, value) -> bool:
+        """
+        Append the value if it was not added before
+
+        Returns: True if the value was appended
+        """
+        if value in self._seen:
+            return False
+        self._seen.add(value)
+        self._values.append(value)
+        return True
+
+    def __contains__(self, value) -> bool:
+        return value in self._seen
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {len(self)} mutations>'
+
+
+class GeneratedMutations(Sequence):
+    """
+    Mutation list whose values are generated from their index when they are accessed, nothing is stored.
+    按下标在访问时生成值的变异列表，不保存任何值
+
+    The generator function must be deterministic, so the same index always gives the same mutation.
+    """
+
+    def __init__(self, length: int, generate: Callable[[int], Any]):
+        self._length = length
+        self._generate = generate
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('GeneratedMutations index out of range')
+        return self._generate(index)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {len(self)} mutations>'
@@ -1,7 +1,10 @@
+import functools
 import struct
-from typing import Union, List, Tuple
+import sys
+from typing import Union, List, Tuple, Iterable, Optional, Dict
 
 from ..mutant import Mutant
+from ..mutation_library import MutationLibrary, UniqueMutations
 from ...constants import LITTLE_ENDIAN
 
 
@@ -65,11 +68,26 @@ def string_to_bytes(s: str) -> bytes:
     return bytes(b_list)
 
 
+@functools.lru_cache(maxsize=None)
+def _int_struct(bit_width: int, endian: chr) -> Optional[struct.Struct]:
+    """
+    Returns: The precompiled struct to pack unsigned integers of bit_width bits, None if there is no struct format for it
+    """
+    code = {8: 'B', 16: 'H', 32: 'I', 64: 'Q'}.get(bit_width)
+    if code is None:
+        return None
+    return struct.Struct(('<' if endian == LITTLE_ENDIAN else '>') + code)
+
+
 class BitField(Mutant):
+    # Default integer boundaries by max_num, shared by all the fields with the same max_num
+    # 按max_num缓存的默认整数边界，所有相同max_num的字段共享
+    _default_boundaries: Dict[int, UniqueMutations] = {}
+
     def __init__(self, value: int, width: int, max_num: int = None,
                  endian: chr = LITTLE_ENDIAN, output_format: str = "binary", signed: bool = False,
                  full_range: bool = False, fuzzable: bool = True, name: str = None,
-                 mutations: Union[List[int], Tuple[int]] = ()):
+                 mutations: Union[List[int], Tuple[int], range] = ()):
         """
         The bit field primitive represents a number of variable length and is used to define all other integer types.
 
@@ -83,7 +101,8 @@ class BitField(Mutant):
             full_range:     (Optional, def=False) If enabled the field mutates through *all* possible values.
             fuzzable:       (Optional, def=True) Enable/disable fuzzing of this primitive
             name:           (Optional, def=None) Specifying a name gives you direct access to a primitive
-            mutations:      (Optional, def=()) Specify the list of mutations to override the default ones
+            mutations:      (Optional, def=()) Specify the list of mutations to override the default ones. Ranges are
+                            kept as they are, so a sweep over a big range does not build a list
         """
         # super().__init__(value, name, fuzzable)
 
@@ -104,33 +123,67 @@ class BitField(Mutant):
         self._name = name
         self.cyclic_index = 0  # when cycling through non-mutating values
 
-        self._mutations = list(mutations)
-        self._mutation_gen = self.mutation_generator()
         self._disabled = False
 
         if not self.max_num:
             self.max_num = binary_string_to_int("1" + "0" * width)
         assert isinstance(self.max_num, (int,)), "max_num must be an integer!"
 
-        if self.full_range:
-            # add all possible values.
-            for i in range(0, self.max_num):
-                self._mutations.append(i)
+        # The mutations are a MutationLibrary of three parts: the user mutations, the full range of values and the
+        # integer boundaries. Ranges are never expanded into lists, so any field can be swept with full_range
+        # 变异由三部分组成：用户变异、完整取值范围和整数边界。范围不会展开为列表
+        self._user_mutations = mutations if isinstance(mutations, range) else tuple(mutations)
+        self._full_range = range(0, self.max_num) if self.full_range else range(0)
+        if not self.full_range and len(mutations) == 0:
+            # try only "smart" values.
+            # 仅尝试一些指定的值
+            self._boundaries = self._get_default_boundaries(self.max_num)
         else:
-            if len(mutations) == 0:
-                # try only "smart" values.
-                # 仅尝试一些指定的值
-                # TODO:需要搞懂是用来做什么的
-                self.add_integer_boundaries(0)
-                self.add_integer_boundaries(self.max_num // 2)
-                self.add_integer_boundaries(self.max_num // 3)
-                self.add_integer_boundaries(self.max_num // 4)
-                self.add_integer_boundaries(self.max_num // 8)
-                self.add_integer_boundaries(self.max_num // 16)
-                self.add_integer_boundaries(self.max_num // 32)
-                self.add_integer_boundaries(self.max_num)
-
-            # TODO: Add injectable arbitrary bit fields
+            self._boundaries = ()
+
+        # TODO: Add injectable arbitrary bit fields
+        self._build_mutations()
+        self.reset()
+
+    @classmethod
+    def _get_default_boundaries(cls, max_num: int) -> UniqueMutations:
+        """
+        Returns: The default integer boundaries of the fields with max_num, shared by all of them
+        """
+        boundaries = cls._default_boundaries.get(max_num)
+        if boundaries is None:
+            # TODO:需要搞懂是用来做什么的
+            boundaries = cls._default_boundaries[max_num] = UniqueMutations(
+                case for integer in (0, max_num // 2, max_num // 3, max_num // 4, max_num // 8, max_num // 16,
+                                     max_num // 32, max_num)
+                for case in cls._integer_boundaries(integer, max_num))
+        return boundaries
+
+    @staticmethod
+    def _integer_boundaries(integer: int, max_num: int) -> Iterable[int]:
+        """
+        Returns: The integer and its border cases that fall within the valid range [0, max_num)
+        """
+        for i in range(-10, 10):
+            case = integer + i
+            # ensure the border case falls within the valid range for this field.
+            # 确保边界情况落入该字段的有效范文内。
+            if 0 <= case < max_num:
+                yield case
+
+    def _build_mutations(self):
+        """
+        Compose the mutation library from its parts
+        """
+        full_range = self._full_range
+        if len(self._user_mutations) + full_range.stop + len(self._boundaries) > sys.maxsize:
+            # The length of a sequence can not exceed sys.maxsize (QWord with full_range), the values after it can not
+            # be reached anyway
+            full_range = range(0, sys.maxsize - len(self._user_mutations) - len(self._boundaries))
+        parts = [part for part in (self._user_mutations, full_range, self._boundaries) if len(part) > 0]
+        # A single part is used as it is, there is nothing to compose
+        self._mutations = parts[0] if len(parts) == 1 else MutationLibrary(*parts)
+        self._mutations_changed()
 
     @property
     def original_value(self) -> bytes:
@@ -143,13 +196,15 @@ class BitField(Mutant):
         Args:
             integer: int to append to fuzz heuristics
         """
-        for i in range(-10, 10):
-            case = integer + i
-            # ensure the border case falls within the valid range for this field.
-            # 确保边界情况落入该字段的有效范文内。
-            if 0 <= case < self.max_num:
-                if case not in self._mutations:
-                    self._mutations.append(case)
+        boundaries = self._boundaries
+        if not isinstance(boundaries, UniqueMutations) or boundaries is self._default_boundaries.get(self.max_num):
+            # The default boundaries are shared with other fields, add the new ones to a copy
+            boundaries = self._boundaries = UniqueMutations(boundaries)
+        user_mutations = self._user_mutations if isinstance(self._user_mutations, range) else set(self._user_mutations)
+        for case in self._integer_boundaries(integer, self.max_num):
+            if case not in user_mutations and case not in self._full_range:
+                boundaries.add(case)
+        self._build_mutations()
 
     def _render(self, value: int):
         # TODO: Fix UnicodeDecodeError while rendering int.
@@ -177,52 +232,65 @@ class BitField(Mutant):
             str: value converted to a byte string
         """
         if output_format == "binary":
-            bit_stream = ""
-            rendered = b""
-
-            # pad the bit stream to the next byte boundary.
-            if bit_width % 8 == 0:
-                bit_stream += int_to_binary_string(value, bit_width)
-            else:
-                bit_stream = "0" * (8 - (bit_width % 8))
-                bit_stream += int_to_binary_string(value, bit_width)
-
-            # convert the bit stream from a string of bits into raw bytes.
-            for i in range(len(bit_stream) // 8):
-                chunk_min = 8 * i
-                chunk_max = chunk_min + 8
-                chunk = bit_stream[chunk_min:chunk_max]
-                # print(chunk)
-                # print(struct.pack("B", binary_string_to_int(chunk)))
-                rendered += struct.pack("B", binary_string_to_int(chunk))  # .decode()
-
-            # if necessary, convert the endianness of the raw bytes.
-            if endian == LITTLE_ENDIAN:
-                bytes_list = list(rendered)
-                bytes_list.reverse()
-                rendered = bytes(bytes_list)
-
-            _rendered = rendered
+            # Only the lower bit_width bits are rendered (two's complement for negative values), padded to whole bytes
+            # 只渲染低bit_width位（负数为补码），并补齐到整字节
+            mask = (1 << bit_width) - 1
+            packer = _int_struct(bit_width, endian)
+            if packer is not None:
+                return packer.pack(value & mask)
+            return (value & mask).to_bytes((bit_width + 7) // 8, 'little' if endian == LITTLE_ENDIAN else 'big')
+        elif signed and (value >> (bit_width - 1)) & 1:
+            # negative signed integer (first bit is 1): the lower bits are counted from the minimum value
+            # 有符号负数（最高位为1）
+            return b'%d' % ((value & ((1 << (bit_width - 1)) - 1)) - (1 << (bit_width - 1)))
         else:
-            # Otherwise we have ascii/something else
-            # if the sign flag is raised and we are dealing with a signed integer (first bit is 1).
-            if signed and int_to_binary_string(value, bit_width)[0] == "1":
-                max_num = binary_string_to_int("1" + "0" * (bit_width - 1))
-                # chop off the sign bit.
-                val = value & binary_string_to_int("1" * (bit_width - 1))
+            # unsigned integer or positive signed integer.
+            return b'%d' % value
 
-                # account for the fact that the negative scale works backwards.
-                val = max_num - val - 1
+    @staticmethod
+    def render_ints(values: Iterable[int], output_format, bit_width, endian, signed) -> List[bytes]:
+        """
+        Convert a batch of values to byte strings, as render_int() does with each of them.
+        批量将数值转为字节字符串，结果与逐个调用render_int()相同
 
-                # toss in the negative sign.
-                _rendered = "%d" % ~val
+        Args:
+            values: Values to convert
+            output_format (str): "binary" or "ascii"
+            bit_width (int): Width of output in bits.
+            endian: BIG_ENDIAN or LITTLE_ENDIAN
+            signed (bool):
 
-            # unsigned integer or positive signed integer.
-            else:
-                _rendered = "%d" % value
-        if isinstance(_rendered, str):
-            _rendered = _rendered.encode()
-        return _rendered
+        Returns:
+            List[bytes]: values converted to byte strings
+        """
+        if output_format == "binary":
+            mask = (1 << bit_width) - 1
+            packer = _int_struct(bit_width, endian)
+            if packer is not None:
+                # struct.iter_unpack() the other way round: pack them all at once and split the result
+                masked = [value & mask for value in values]
+                packed = struct.pack(f'{packer.format[0]}{len(masked)}{packer.format[1]}', *masked)
+                size = packer.size
+                return [packed[i:i + size] for i in range(0, len(packed), size)]
+            length, byteorder = (bit_width + 7) // 8, 'little' if endian == LITTLE_ENDIAN else 'big'
+            return [(value & mask).to_bytes(length, byteorder) for value in values]
+        return [BitField.render_int(value, output_format, bit_width, endian, signed) for value in values]
+
+    def render_mutations(self, start: int = 0, stop: int = None) -> List[bytes]:
+        """
+        Render the mutations of the field from start to stop at once, without moving the field.
+        一次性渲染从start到stop的变异，不改变当前的变异位置
+
+        Args:
+            start: (Optional, def=0) Index in the mutations library of the first mutation
+            stop: (Optional, def=None) Index after the last mutation, the end of the library if None
+
+        Returns:
+            List[bytes]: The rendered mutations
+        """
+        stop = len(self._mutations) if stop is None else min(stop, len(self._mutations))
+        values = (self._mutations[i] for i in range(start, stop))
+        return self.render_ints(values, self.format, self.width, self.endian, self.signed)
 
     def __len__(self):
         if self.format == "binary":
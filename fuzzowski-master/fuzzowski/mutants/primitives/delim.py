@@ -1,7 +1,56 @@
+from typing import Dict, Tuple, Union
+
 from fuzzowski.mutants.mutant import Mutant
 
 
 class Delim(Mutant):
+    # Substitutions and exclusion of the delimiter, the same for every Delim
+    _generic_mutations: Tuple[bytes, ...] = (
+        b"",
+        b" ",
+        b"\t",
+        b"\t" * 2,
+        b"\t" * 100,
+        b"\t " * 100,
+        b"\t\r\n" * 100,
+        b"!",
+        b"@",
+        b"#",
+        b"$",
+        b"%",
+        b"^",
+        b"&",
+        b"*",
+        b"(",
+        b")",
+        b"-",
+        b"_",
+        b"+",
+        b"=",
+        b":",
+        b": " * 100,
+        b":7" * 100,
+        b";",
+        b"'",
+        b"\"",
+        b"/",
+        b"\\",
+        b"?",
+        b"<",
+        b">",
+        b".",
+        b",",
+        b"\r",
+        b"\n",
+        b"\r\n" * 64,
+        b"\r\n" * 128,
+        b"\r\n" * 512,
+    )
+
+    # Mutation tables already built, by delimiter value. They are shared by all the Delims with the same value
+    # 已经构建的变异表，相同分隔符的Delim共享同一个表
+    _mutation_tables: Dict[bytes, Tuple[bytes, ...]] = {}
+
     def __init__(self, value, fuzzable: bool = True, name: str = None):
         """
         Represent a delimiter such as :,\r,\n, ,=,>,< etc... Mutations include repetition, substitution and exclusion.
@@ -12,53 +61,18 @@ class Delim(Mutant):
             fuzzable:   (Optional, def=True) Enable/disable fuzzing of this primitive
             name:       (Optional, def=None) Specifying a name gives you direct access to a primitive
         """
-
-        mutations = [value * 2,
-                     value * 5,
-                     value * 10,
-                     value * 25,
-                     value * 100,
-                     value * 500,
-                     value * 1000,
-                     "",
-                     " ",
-                     "\t",
-                     "\t" * 2,
-                     "\t" * 100,
-                     "\t " * 100,
-                     "\t\r\n" * 100,
-                     "!",
-                     "@",
-                     "#",
-                     "$",
-                     "%",
-                     "^",
-                     "&",
-                     "*",
-                     "(",
-                     ")",
-                     "-",
-                     "_",
-                     "+",
-                     "=",
-                     ":",
-                     ": " * 100,
-                     ":7" * 100,
-                     ";",
-                     "'",
-                     "\"",
-                     "/",
-                     "\\",
-                     "?",
-                     "<",
-                     ">",
-                     ".",
-                     ",",
-                     "\r",
-                     "\n",
-                     "\r\n" * 64,
-                     "\r\n" * 128,
-                     "\r\n" * 512]
-
         # The Mutant behaviour is perfect for this one :)
-        super().__init__(value, name=name, fuzzable=fuzzable, mutations=mutations)
+        super().__init__(value, name=name, fuzzable=fuzzable, mutations=self._get_mutation_table(value))
+
+    @classmethod
+    def _get_mutation_table(cls, value: Union[bytes, str]) -> Tuple[bytes, ...]:
+        """
+        Returns: The mutations of a delimiter, already rendered, built the first time the value is used
+        """
+        if isinstance(value, str):
+            value = value.encode()
+        table = cls._mutation_tables.get(value)
+        if table is None:
+            repetitions = tuple(value * count for count in (2, 5, 10, 25, 100, 500, 1000))
+            table = cls._mutation_tables[value] = repetitions + cls._generic_mutations
+        return table
@@ -1,10 +1,13 @@
 import random
+import zlib
+
 from ..mutant import Mutant
+from ..mutation_library import GeneratedMutations
 
 
 class RandomData(Mutant):
     def __init__(self, value: bytes, min_length: int, max_length: int, max_mutations: int = 25, fuzzable: bool = True,
-                 step: int = None, name: str = None):
+                 step: int = None, name: str = None, seed: int = None):
         """
         Generate a random chunk of data while maintaining a copy of the original. A random length range
         can be specified.
@@ -12,6 +15,10 @@ class RandomData(Mutant):
         维护最初堆块的拷贝的同时生成一个充满数据的随机堆块。
         随机堆块的长度范围可以指定。
 
+        Each mutation is generated when it is reached from the seed and its index, so nothing is stored and mutation N
+        is the same in every run and every process.
+        每个变异都由种子和下标在使用时生成，不保存任何数据，第N个变异在任何运行与进程中都相同。
+
         Args:
             value:          Original value
             min_length:     Minimum length of random block
@@ -20,37 +27,39 @@ class RandomData(Mutant):
             fuzzable:       (Optional, def=True) Enable/disable fuzzing of this primitive
             step:           (Optional, def=None) If not null, step count between min and max reps, otherwise random
             name:           (Optional, def=None) Specifying a name gives you direct access to a primitive
+            seed:           (Optional, def=None) Seed of the random data, a checksum of the name if None
         """
         self.min_length = min_length
         self.max_length = max_length
         self.max_mutations = max_mutations
         self.step = step
         if self.step:
-            self.max_mutations = (self.max_length - self.min_length) / self.step + 1
+            self.max_mutations = (self.max_length - self.min_length) // self.step + 1
+        self.seed = seed if seed is not None else zlib.crc32(str(name).encode())
 
-        # Lets generate some random mutations
-        # 初始化随机的mutation
-        mutations = []
+        # The Mutant behaviour is perfect for this one :)
+        super().__init__(value, name=name, fuzzable=fuzzable,
+                         mutations=GeneratedMutations(self.max_mutations, self._generate_mutation))
 
-        for _ in range(self.max_mutations):
-            # select a random length for this string.
-            # _ 临时变量，只使用一次，不再使用，只起到计数的作用。
-            # 每一次为字符串选择一个长度
-            if not self.step:
-                length = random.randint(self.min_length, self.max_length)
-                # 如果没有指定步长，那么便在最大最小值之间随机选择一个
-            # select a length function of the mutant index and the step.
-            else:
-                length = self.min_length + self._mutant_index * self.step
-                # 如果指定了步长，那么便从最小长度开始根据步长进行迭代
+    def _generate_mutation(self, index: int) -> bytes:
+        """
+        Generate the random data of a mutation
 
-            # reset the value and generate a random string of the determined length.
-            # 重置值并根据指定的长度生成随机的字符串，长度在0-255之间
-            self._value = b""
-            for i in range(length):
-                self._value += bytes([random.randint(0, 255)])
+        Args:
+            index: Index of the mutation in the mutations library
 
-            mutations.append(self._value)
+        Returns: The random data, always the same for the same seed and index
+        """
+        rng = random.Random(f'{self.seed}:{index}')
+        if not self.step:
+            # select a random length for this string.
+            # 如果没有指定步长，那么便在最大最小值之间随机选择一个
+            length = rng.randint(self.min_length, self.max_length)
+        else:
+            # select a length function of the mutant index and the step.
+            # 如果指定了步长，那么便从最小长度开始根据步长进行迭代
+            length = self.min_length + index * self.step
 
-        # The Mutant behaviour is perfect for this one :)
-        super().__init__(value, name=name, fuzzable=fuzzable, mutations=mutations)
+        # generate a random string of the determined length, in one go
+        # 根据指定的长度一次性生成随机的字符串
+        return rng.getrandbits(8 * length).to_bytes(length, 'little') if length > 0 else b''
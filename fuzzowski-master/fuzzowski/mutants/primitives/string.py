@@ -1,9 +1,9 @@
 import random
 import glob
-import itertools
-from typing import Union, Iterable, List
+from typing import Union, Iterable, List, Tuple
 
 from ..mutant import Mutant
+from ..mutation_library import MutationLibrary, RepeatedSequence
 from ...exception import FuzzowskiRuntimeError
 
 
@@ -12,6 +12,8 @@ class String(Mutant):
     # store generic mutations as a class variable to avoid copying the structure across each instantiated primitive.
     # 将泛型突变存储为类变量，以避免跨每个实例化原语复制结构。
     _generic_long_mutations = []  # It will be filled in _init_ if it is empty 如果空，在init中填充
+    # Libraries of the generic mutation types, shared by all the instances using the same types
+    _generic_libraries = {}
 
     _generic_command_mutations = [  # 命令变异，尝试各种不同的，命令
         "|touch /tmp/fuzzowski",
@@ -255,6 +257,7 @@ class String(Mutant):
         类变量'_generic_*_mutations'包含所有实例的全局smart fuzz值列表。
         This allows us to avoid copying the near ~70MB generic_mutations data structure across each instantiated String.
         这允许我们避免跨每个实例化字符串复制近70MB的generic_mutations数据结构。
+        Long strings are stored as RepeatedSequence descriptors and only built when the mutation is reached.
 
         Args:
             value:          Original string value
@@ -297,25 +300,8 @@ class String(Mutant):
 
         self._mutation_types = list(mutation_types)  # Transform to a mutable list
 
-        # Specific mutations for each instance, based in the default value
-        self._instance_mutations = []  # Specific mutations of just this instance
-        self._instance_mutations.extend(
-            [(self._value * i)[:65535] for i in (2, 10, 100, 500, 1000, 2000, 5000, 10000, 50000)])
-        self._instance_mutations.extend(
-            [(self._value * i)[:65535] + b"\xfe" for i in (2, 10, 100, 500, 1000, 2000, 5000, 10000, 50000)])
-
-        # If filename is present, only the file lines will be used for mutations
-        self._filename = filename
-        self._file_mutations = []
-        if self._filename is not None:
-            self.set_filename(self._filename)
-
-        # If callback_addr is present, callback commands will be added to the mutations
-        self._callback_mutations = []
-        if callback_addr:
-            self.set_callback_commands(callback_addr)
-
-        # Set the _generic_long_mutations library if it was not filled already.
+        # Set the _generic_long_mutations library if it was not filled already. It must be filled before any
+        # generic library is built, as set_filename() and set_callback_commands() already build one.
         if len(self._generic_long_mutations) == 0:
             self._add_long_strings("C")
             self._add_long_strings("1")
@@ -347,18 +333,40 @@ class String(Mutant):
             self._add_long_strings("\xFF")  # expands to 4 characters under utf16
 
             # add some long strings with null bytes thrown in the middle of them.
+            # The positions are random but seeded with the length, so the strings are the same in every process
+            # 空字节的位置是随机的，但以长度作为种子，因此在每个进程中都相同
             for length in [128, 256, 1024, 2048, 4096, 32767, 0xFFFF]:
+                rng = random.Random(f'nulls:{length}')
                 s = "D" * length
                 # Number of null bytes to insert (random)
-                for i in range(random.randint(1, 10)):
+                for i in range(rng.randint(1, 10)):
                     # Location of random byte
-                    loc = random.randint(1, len(s))
+                    loc = rng.randint(1, len(s))
                     s = s[:loc] + "\x00" + s[loc:]
                 self._generic_long_mutations.append(s)
 
+        # Specific mutations for each instance, based in the default value
+        self._instance_mutations = []  # Specific mutations of just this instance
+        self._instance_mutations.extend(
+            [RepeatedSequence(self._value, i, max_len=65535)
+             for i in (2, 10, 100, 500, 1000, 2000, 5000, 10000, 50000)])
+        self._instance_mutations.extend(
+            [RepeatedSequence(self._value, i, max_len=65535, suffix=b"\xfe")
+             for i in (2, 10, 100, 500, 1000, 2000, 5000, 10000, 50000)])
+
+        # If filename is present, only the file lines will be used for mutations
+        self._filename = filename
+        self._file_mutations = []
+        if self._filename is not None:
+            self.set_filename(self._filename)
+
+        # If callback_addr is present, callback commands will be added to the mutations
+        self._callback_mutations = []
+        if callback_addr:
+            self.set_callback_commands(callback_addr)
+
         # Finally, obtain an iterable of all the mutation lists selected
         self._mutations = self.get_all_mutations()  # Contains all mutations
-        self._mutation_gen = self.mutation_generator()
 
     def set_filename(self, filename: str, replace: bool = False):
         """
@@ -385,6 +393,7 @@ class String(Mutant):
 
         # Update mutations list
         self._mutations = self.get_all_mutations()  # Contains all mutations
+        self._mutations_changed()
 
     def _add_long_strings(self, sequence: str):
         """
@@ -396,14 +405,14 @@ class String(Mutant):
         """
         strings = []
         for size in [128, 256, 512, 1024, 2048, 4096, 32768, 0xFFFF]:
-            strings.append(sequence * (size - 2))
-            strings.append(sequence * (size - 1))
-            strings.append(sequence * size)
-            strings.append(sequence * (size + 1))
-            strings.append(sequence * (size + 2))
+            strings.append(RepeatedSequence(sequence, size - 2))
+            strings.append(RepeatedSequence(sequence, size - 1))
+            strings.append(RepeatedSequence(sequence, size))
+            strings.append(RepeatedSequence(sequence, size + 1))
+            strings.append(RepeatedSequence(sequence, size + 2))
 
         for size in [5000, 10000, 20000, 99999, 100000, 500000, 1000000]:
-            strings.append(sequence * size)
+            strings.append(RepeatedSequence(sequence, size))
 
         for string in strings:
             self._generic_long_mutations.append(string)
@@ -431,11 +440,12 @@ class String(Mutant):
 
         # Update mutations list
         self._mutations = self.get_all_mutations()  # Contains all mutations
+        self._mutations_changed()
 
-    def get_all_mutations(self) -> List[List]:
+    def get_all_mutations(self) -> MutationLibrary:
         """
-        Returns an iterable containing all the mutation_lists. It does not copy the lists
-        Returns: A "chain" of all the iterables
+        Returns a library containing all the mutation_lists. It does not copy the lists
+        Returns: A MutationLibrary indexing all the selected lists
 
         """
         all_mutations = []
@@ -445,15 +455,40 @@ class String(Mutant):
             all_mutations.append(self._callback_mutations)
         if 'file' in self._mutation_types:
             all_mutations.append(self._file_mutations)
-        if 'commands' in self._mutation_types:
-            all_mutations.append(self._generic_command_mutations)
-        if 'long' in self._mutation_types:
-            all_mutations.append(self._generic_long_mutations)
-        if 'format' in self._mutation_types:
-            all_mutations.append(self._generic_format_mutations)
-        if 'misc' in self._mutation_types:
-            all_mutations.append(self._generic_misc_mutations)
-        return list(itertools.chain(*all_mutations))  # This will copy the lists... :(  需要改进
+        all_mutations.append(self._get_generic_library(self._mutation_types))
+        return MutationLibrary(*all_mutations)
+
+    def mutation_buckets(self) -> List[Tuple[str, int]]:
+        """
+        Returns: The number of mutations of each of the mutation types selected, in the order of get_all_mutations()
+        """
+        if not self._fuzzable:
+            return []
+        buckets = [('instance', self._instance_mutations), ('callback', self._callback_mutations),
+                   ('file', self._file_mutations), ('commands', self._generic_command_mutations),
+                   ('long', self._generic_long_mutations), ('format', self._generic_format_mutations),
+                   ('misc', self._generic_misc_mutations)]
+        return [(mutation_type, len(mutations)) for mutation_type, mutations in buckets
+                if mutation_type in self._mutation_types and len(mutations) > 0]
+
+    @classmethod
+    def _get_generic_library(cls, mutation_types: Iterable[str]) -> MutationLibrary:
+        """
+        Returns the library of the generic mutations selected in mutation_types, shared across all instances
+
+        Args:
+            mutation_types: Types of mutations selected
+
+        Returns: A MutationLibrary with the generic mutations
+        """
+        generic_lists = (('commands', cls._generic_command_mutations),
+                         ('long', cls._generic_long_mutations),
+                         ('format', cls._generic_format_mutations),
+                         ('misc', cls._generic_misc_mutations))
+        key = tuple(t for t, _ in generic_lists if t in mutation_types)
+        if key not in cls._generic_libraries:
+            cls._generic_libraries[key] = MutationLibrary(*(l for t, l in generic_lists if t in key))
+        return cls._generic_libraries[key]
 
     def _render(self, value) -> bytes:
         """
@@ -490,3 +525,4 @@ class String(Mutant):
 
         self._mutation_types = types_list
         self._mutations = self.get_all_mutations()  # Update mutations list
+        self._mutations_changed()
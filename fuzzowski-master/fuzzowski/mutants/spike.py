@@ -96,6 +96,18 @@ def s_initialize(name: str):
 def s_response(response_class: type, name: str, required_vars: List[str], optional_vars: List[str], *args, **kwargs):
     blocks.CURRENT.add_response(response_class(name, required_vars, optional_vars, *args, **kwargs))
 
+
+def s_completion(completion_class: type, *args, **kwargs):
+    """
+    Add a completion to the current request, so recv() returns as soon as the reply is complete instead of waiting
+    for the recv timeout. E.g. s_completion(LengthPrefix, 4, 2) or s_completion(Delimiter, b'\\r\\n\\r\\n')
+
+    Args:
+        completion_class: A Completion class (see fuzzowski.connections.completion)
+        *args: Arguments of the completion
+    """
+    blocks.CURRENT.add_completion(completion_class(*args, **kwargs))
+
 # ================================================================#
 # BLOCKS                                                          #
 # ================================================================#
@@ -0,0 +1,148 @@
+import itertools
+import threading
+from typing import Optional, Tuple, TYPE_CHECKING
+
+from fuzzowski import exception
+from fuzzowski.connections.target import Target
+from fuzzowski.loggers import FuzzLogger, FuzzLoggerBuffer
+from fuzzowski.testcase import TestCase
+
+if TYPE_CHECKING:
+    from fuzzowski.session import Session
+
+
+class _Worker(object):
+    """A target of a ParallelRunner, with its monitors and the logger of the test case it is running"""
+
+    def __init__(self, target: Target, monitors: list):
+        self.target = target
+        self.monitors = monitors
+        self.buffer = FuzzLoggerBuffer()
+        self.logger = FuzzLogger([self.buffer])
+        self.not_run: Optional[Tuple[int, TestCase]] = None  # (order, test case) not run as the session got paused
+        self.error: Optional[Exception] = None  # Uncontrolled exception that stopped the worker
+        self.test_cases_run = 0
+
+
+class ParallelRunner(object):
+    """
+    Runs the test cases of a Session in all its targets at the same time, with a thread for each target. Every thread
+    takes the next test case from the session as soon as its target is free, so the test cases are shared out as
+    with work stealing: faster targets run more test cases, and a target waiting to recover does not stop the others.
+    The payloads are rendered when a test case is taken, holding the lock of the session, as the requests are shared.
+    在所有目标上并行执行测试用例，每个目标一个线程，空闲的目标取下一个测试用例
+
+    Suspects, disabled elements and the progress are kept in the session, so they are saved in one session file. When
+    a target can not connect, the latest test case run in that target is the suspect, and only that target is
+    restarted (with its own restarter) and waited for. Each test case is logged when it ends, so the logs of the
+    targets are not mixed.
+
+    Paths with callbacks are not supported, nor paths where a request with Responses is followed by other requests,
+    as the variables set by the Responses are shared by all the targets and the payloads are rendered before the
+    responses are parsed. Neither is learning the RTT of the paths before fuzzing them (the adaptive timeouts of each
+    target are learned from the replies to the test cases).
+    """
+
+    def __init__(self, session: 'Session'):
+        """
+        Args:
+            session: The session, with the targets added with Session.add_target()
+        """
+        if session.opts.in_flight > 1:
+            raise exception.FuzzowskiRuntimeError('Parallel targets can not be used with test cases in flight')
+        if session.opts.sleep_time > 0 or session.opts.restart_interval > 0:
+            raise exception.FuzzowskiRuntimeError('Parallel targets can not be used with sleep_time or '
+                                                  'restart_interval')
+        for path in session.graph.path_iterator():
+            for edge in path:
+                if edge.callback is not None:
+                    raise exception.FuzzowskiRuntimeError(f'Parallel targets do not support callbacks '
+                                                          f'({edge.src.name}->{edge.dst.name})')
+            # The variables set by Responses are shared by the targets, and the payloads are rendered when a test
+            # case is taken, so the requests after a Response would use the value parsed in any target
+            for edge in path[:-1]:
+                if len(edge.dst.responses) > 0:
+                    raise exception.FuzzowskiRuntimeError(f'Parallel targets do not support Responses in requests '
+                                                          f'followed by others ({edge.dst.name})')
+        self.session = session
+        self.workers = [_Worker(target, session.target_monitors(target)) for target in session.targets]
+        self._order = itertools.count()
+        self._exhausted = False
+
+    def run_all(self):
+        """
+        Runs test cases from the actual one until the session is paused or the test cases are exhausted, like
+        Session.run_all(). If a target did not recover before the session got paused, the session goes back to the
+        test case it did not run.
+        """
+        session = self.session
+        self._exhausted = False
+        for worker in self.workers:
+            worker.not_run = None
+            worker.error = None
+            worker.target.set_fuzz_data_logger(worker.logger)
+            for monitor in worker.monitors:
+                monitor.logger = worker.logger
+        threads = [threading.Thread(target=self._work, args=(worker,), daemon=True,
+                                    name=f'Target {worker.target.target_connection.info}')
+                   for worker in self.workers]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            for worker in self.workers:
+                worker.target.set_fuzz_data_logger(session.logger)
+                for monitor in worker.monitors:
+                    monitor.logger = session.logger
+            session._forget_taken()
+
+        for worker in self.workers:
+            if worker.error is not None:
+                session.is_paused = True
+                raise worker.error
+
+        not_run = [worker.not_run for worker in self.workers if worker.not_run is not None]
+        if not_run:
+            session.goto(min(not_run, key=lambda order_test_case: order_test_case[0])[1].id)
+            session.is_paused = True
+        elif self._exhausted:
+            session.is_paused = True
+
+    def _work(self, worker: _Worker):
+        """Runs test cases in the target of the worker until the session is paused or the test cases are exhausted"""
+        session = self.session
+        while True:
+            with session.lock:
+                if self._exhausted or session.is_paused:
+                    return
+                test_case, exhausted = session._take_next()
+                # When the test cases are exhausted, the session is paused once all the targets end, so the targets
+                # can still be waited for
+                self._exhausted = self._exhausted or exhausted
+                if test_case is None:
+                    continue
+                order = next(self._order)
+
+            test_case.target = worker.target
+            test_case.logger = worker.logger
+            try:
+                run = test_case.run()
+                if run:
+                    session._mark_sent(test_case)
+                    worker.test_cases_run += 1
+                    for monitor in worker.monitors:
+                        monitor.run(test_case)
+            except Exception as e:
+                # Stop all the targets, the exception is raised by run_all()
+                worker.error = e
+                worker.not_run = (order, test_case)
+                session.is_paused = True
+                return
+            finally:
+                with session.lock:
+                    worker.buffer.flush(session.logger)
+            if not run:
+                worker.not_run = (order, test_case)
+                return
@@ -106,14 +106,21 @@ class SessionPrompt(CommandPrompt):
     # --------------------------------------------------------------- #
 
     def bottom_toolbar(self):
+        # The counts are cached by the session, they are only calculated again when the mutants change
+        total = f'of [<bttestn>{self.session.total_mutations}</bttestn>]'
+        enabled_mutations = self.session.num_enabled_mutations
+        if enabled_mutations != self.session.total_mutations:
+            total += f' ([<bttestn>{enabled_mutations}</bttestn>] enabled)'
         if self.session.test_case is not None:
-            toolbar_message = HTML(f'Test Case [<bttestn>{self.session.mutant_index}</bttestn>] '
-                                   f'of [<bttestn>{self.session.total_mutations}</bttestn>]'
+            timeout = ''
+            estimator = self.session.target.rtt_estimator(self.session.test_case.request_name)
+            if estimator is not None and estimator.timeout is not None:
+                timeout = f' Timeout <bttestn>{estimator.timeout:.3f}s</bttestn>'
+            toolbar_message = HTML(f'Test Case [<bttestn>{self.session.mutant_index}</bttestn>] {total}'
                                    f': Fuzzing Path <bttestn>{self.session.test_case.path_name}</bttestn> '
-                                   f' Mutant <bttestn>{self.session.test_case.short_name}</bttestn>')
+                                   f' Mutant <bttestn>{self.session.test_case.short_name}</bttestn>{timeout}')
         else:
-            toolbar_message = HTML(f'Test Case [<bttestn>{self.session.mutant_index}</bttestn>] '
-                                   f'of [<bttestn>{self.session.total_mutations}</bttestn>]')
+            toolbar_message = HTML(f'Test Case [<bttestn>{self.session.mutant_index}</bttestn>] {total}')
 
         return toolbar_message
 
@@ -190,6 +197,20 @@ class SessionPrompt(CommandPrompt):
         for k, v in self.session.opts.__dict__.items():
             print(f'  {str(k)} = {str(v)}')
 
+        if self.session.opts.deduplicate:
+            self._print_color('gold', '\nDeduplication:')
+            print(f'  Duplicated test cases skipped: {self.session.duplicates_skipped}')
+            print(f'  Payloads remembered: {len(self.session.sent_payloads or [])}')
+
+        if self.session.target.adaptive_timeout:
+            self._print_color('gold', '\nAdaptive Timeouts:')
+            for request_name, estimator in self.session.target.rtt_estimators.items():
+                if estimator.timeout is None:
+                    print(f'  {request_name}: not learned yet')
+                else:
+                    print(f'  {request_name}: timeout {estimator.timeout:.4f}s (SRTT {estimator.srtt:.4f}s, '
+                          f'RTTVAR {estimator.rttvar:.4f}s, {estimator.samples} samples)')
+
         self._print_color('gold', '\nSuspects:')
         self._cmd_suspects([])
 
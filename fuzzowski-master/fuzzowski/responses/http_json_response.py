@@ -4,10 +4,13 @@ from http.client import HTTPResponse
 from .response import Response
 import json
 from fuzzowski.exception import FuzzowskiRuntimeError
+from fuzzowski.connections.completion import ContentLength
 
 
 class HTTPJsonResponse(Response):
     """The Response object contains methods to parse the request, set the variables found and print the response"""
+    completion = ContentLength()
+
     def __init__(self, name: str, required_vars: List[str], optional_vars: List[str]):
         super().__init__(name, required_vars, optional_vars)
 
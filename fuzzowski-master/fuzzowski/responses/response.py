@@ -3,11 +3,14 @@ from typing import List, Mapping
 from abc import ABCMeta, abstractmethod
 
 from fuzzowski.exception import FuzzowskiRuntimeError
+from fuzzowski.connections.completion import Completion
 from fuzzowski.mutants import blocks
 
 
 class Response(object, metaclass=ABCMeta):
     """The Response object contains methods to parse the request, set the variables found and print the response"""
+    completion: Completion = None  # Subclasses that know when their reply is complete set it (see Request.completions)
+
     def __init__(self, name: str, required_vars: List[str], optional_vars: List[str]):
         self.name = name
         self.required_vars = required_vars
@@ -0,0 +1,4 @@
+from .ischeduler import IScheduler
+from .permutation_scheduler import PermutationScheduler, FeistelPermutation
+from .round_robin_scheduler import RoundRobinScheduler
+from .sample_scheduler import SampleScheduler
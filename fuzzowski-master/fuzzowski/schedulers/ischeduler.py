@@ -0,0 +1,68 @@
+import abc
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fuzzowski.session import Session
+
+
+class IScheduler(object, metaclass=abc.ABCMeta):
+    """
+    Describes a Scheduler Module interface.
+
+    A scheduler chooses the order in which the test cases of a Session are run, instead of the declaration order of
+    the paths and mutants. The schedule is a sequence of test case ids (1..session.num_mutations), the Session keeps
+    a cursor in it (saved in the session file) and moves to each test case with random access.
+    调度器决定测试用例的执行顺序
+    """
+
+    @abc.abstractmethod
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @staticmethod
+    @abc.abstractmethod
+    def name() -> str:
+        """Get name"""
+        pass
+
+    @staticmethod
+    @abc.abstractmethod
+    def help():
+        """ Get help string"""
+        pass
+
+    @abc.abstractmethod
+    def schedule(self, session: 'Session'):
+        """
+        Prepares the schedule for the test cases of the session. It is called every time the session starts iterating
+        the schedule, so it should do nothing if the test cases of the session did not change.
+
+        Args:
+            session: The session whose test cases are scheduled
+        """
+        pass
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        """Number of test cases in the schedule"""
+        pass
+
+    @abc.abstractmethod
+    def test_case_id(self, position: int) -> int:
+        """
+        Args:
+            position: Position in the schedule (0..len(self) - 1)
+
+        Returns: The id of the test case scheduled in that position
+        """
+        pass
+
+    def position_of(self, test_case_id: int) -> Optional[int]:
+        """
+        Args:
+            test_case_id: The id of a test case of the session
+
+        Returns: The position of the test case in the schedule, or None if it is not known (the session continues from
+                 its actual position)
+        """
+        return None
@@ -0,0 +1,42 @@
+from typing import Dict, Iterable
+
+from fuzzowski.exception import FuzzowskiRuntimeError
+from fuzzowski.mutants import Mutant
+from fuzzowski.mutants.blocks import Request
+
+
+class MutantWeights(object):
+    """
+    Weights of the mutants of a session, given as "key=weight" strings, where key is a path name (request.mutant), a
+    request name or the class name of the mutants (e.g. String). The most specific key wins and the default weight is
+    used for the rest. Weight 0 excludes the mutants.
+    """
+
+    def __init__(self, weights: Iterable[str], default: int = 1):
+        """
+        Args:
+            weights: Strings "key=weight"
+            default: Weight of the mutants without key
+
+        Raises:
+            FuzzowskiRuntimeError: If a weight is not valid
+        """
+        self.default = default
+        self.weights: Dict[str, int] = {}
+        for weight in weights:
+            key, _, value = weight.partition('=')
+            try:
+                self.weights[key] = int(value)
+            except ValueError:
+                raise FuzzowskiRuntimeError(f'Invalid weight: "{weight}". It must be key=weight, e.g. String=4')
+            if self.weights[key] < 0:
+                raise FuzzowskiRuntimeError(f'Invalid weight: "{weight}". It can not be negative')
+
+    def __call__(self, request: Request, mutant: Mutant) -> int:
+        """
+        Returns: The weight of a mutant of a request
+        """
+        for key in (f'{request.name}.{mutant.name}', request.name, type(mutant).__name__):
+            if key in self.weights:
+                return self.weights[key]
+        return self.default
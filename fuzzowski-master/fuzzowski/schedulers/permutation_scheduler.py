@@ -0,0 +1,123 @@
+from typing import Optional, TYPE_CHECKING
+
+from fuzzowski.exception import FuzzowskiRuntimeError
+from .ischeduler import IScheduler
+
+if TYPE_CHECKING:
+    from fuzzowski.session import Session
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(value: int) -> int:
+    """
+    splitmix64 finalizer, a fast 64 bit mixing function. Python's hash() is not used, as it changes between runs
+    """
+    value = (value + 0x9e3779b97f4a7c15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & _MASK64
+    return value ^ (value >> 31)
+
+
+class FeistelPermutation(object):
+    """
+    Seeded pseudo-random permutation of range(length), calculated element by element (nothing is stored).
+    带种子的伪随机置换，按下标计算
+
+    A balanced Feistel network permutes the integers of 2 * half_bits bits, the smallest domain with at least length
+    elements (less than 4 * length). The values outside range(length) are encrypted again (cycle walking) until one
+    falls inside, so the result is a bijection of range(length). The inverse walks the network backwards.
+    """
+    rounds = 6
+
+    def __init__(self, length: int, seed: int = 0):
+        """
+        Args:
+            length: Number of elements permuted
+            seed: Seed of the permutation. The same length and seed always give the same permutation
+        """
+        self.length = length
+        self.seed = seed
+        self._half_bits = max(1, (max(length - 1, 1).bit_length() + 1) // 2)
+        self._mask = (1 << self._half_bits) - 1
+        seed_key = _mix(seed & _MASK64)
+        self._keys = [_mix(seed_key + round_number) for round_number in range(self.rounds)]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self._half_bits, value & self._mask
+        for key in self._keys:
+            left, right = right, left ^ (_mix(right ^ key) & self._mask)
+        return (left << self._half_bits) | right
+
+    def _decrypt(self, value: int) -> int:
+        left, right = value >> self._half_bits, value & self._mask
+        for key in reversed(self._keys):
+            left, right = right ^ (_mix(left ^ key) & self._mask), left
+        return (left << self._half_bits) | right
+
+    def __getitem__(self, index: int) -> int:
+        """
+        Returns: The element of range(length) in the position index of the permutation
+        """
+        if not 0 <= index < self.length:
+            raise IndexError('FeistelPermutation index out of range')
+        value = self._encrypt(index)
+        while value >= self.length:
+            value = self._encrypt(value)
+        return value
+
+    def index(self, value: int) -> int:
+        """
+        Returns: The position of value in the permutation (the inverse of __getitem__)
+        """
+        if not 0 <= value < self.length:
+            raise ValueError(f'{value} is not in the permutation')
+        index = self._decrypt(value)
+        while index >= self.length:
+            index = self._decrypt(index)
+        return index
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.length} elements, seed {self.seed}>'
+
+
+class PermutationScheduler(IScheduler):
+    """
+    Runs all the test cases of the session in a seeded pseudo-random order, so stopping a campaign early does not leave
+    whole requests or mutants unexplored. The order is stable across runs for the same seed and test cases.
+    """
+
+    def __init__(self, seed: int or str = 0, *args, **kwargs):
+        try:
+            self.seed = int(seed)
+        except ValueError:
+            raise FuzzowskiRuntimeError(f'The seed of the {self.name()} scheduler must be an integer: {seed}')
+        self._permutation = FeistelPermutation(0, self.seed)
+
+    @staticmethod
+    def name() -> str:
+        return 'permutation'
+
+    @staticmethod
+    def help():
+        return "[<seed>] Run all the test cases in a pseudo-random order, always the same for the same seed " \
+               "(Default seed 0)"
+
+    def schedule(self, session: 'Session'):
+        num_mutations = session.num_mutations
+        if num_mutations != len(self._permutation):
+            self._permutation = FeistelPermutation(num_mutations, self.seed)
+
+    def __len__(self) -> int:
+        return len(self._permutation)
+
+    def test_case_id(self, position: int) -> int:
+        return self._permutation[position] + 1
+
+    def position_of(self, test_case_id: int) -> Optional[int]:
+        if not 0 < test_case_id <= len(self._permutation):
+            return None
+        return self._permutation.index(test_case_id - 1)
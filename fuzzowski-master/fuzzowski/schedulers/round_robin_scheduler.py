@@ -0,0 +1,136 @@
+import bisect
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from .ischeduler import IScheduler
+from .mutant_weights import MutantWeights
+
+if TYPE_CHECKING:
+    from fuzzowski.session import Session
+
+
+class RoundRobinScheduler(IScheduler):
+    """
+    Interleaves the mutations of all the fuzzable mutants of all the requests: the first mutation of every mutant,
+    then the second one, and so on. A mutant with weight w runs w mutations in each round, so the first rounds cover
+    the first (usually most productive) mutations of everything before going deep in any mutant.
+    轮询调度：依次执行每个变种的第1个变异，然后第2个……
+
+    Weights are given as "key=weight" (see MutantWeights), the default weight is 1 and weight 0 excludes the mutants.
+    Disabled requests and mutants are left out of the schedule.
+
+    Nothing is stored per test case. The mutations of each mutant are a run of consecutive test case ids (see
+    Block.mutation_runs()), and the rounds are split in segments where every run contributes the same number of test
+    cases, so a position is mapped to its test case (and back) with two binary searches.
+    """
+
+    def __init__(self, *weights: str, **kwargs):
+        self.weights = MutantWeights(weights)
+        self._signature = None
+        self._runs: List[Tuple[int, int, int]] = []  # (id of the first test case - 1, length, weight), sorted
+        self._run_starts: List[int] = []
+        self._rounds: List[int] = []  # First round of each segment
+        self._positions: List[int] = []  # First position of each segment
+        self._counts: List[int] = []  # Test cases in each round of the segment
+        self._length = 0
+        self._segment_cache: Dict[int, Tuple[List[int], List[int]]] = {}
+
+    @staticmethod
+    def name() -> str:
+        return 'roundrobin'
+
+    @staticmethod
+    def help():
+        return "[<key>=<weight> ...] Run the first mutation of every mutant, then the second one... A mutant runs " \
+               "<weight> mutations per round. key is request.mutant, request or a mutant type (Default weight 1, " \
+               "0 to exclude)"
+
+    def schedule(self, session: 'Session'):
+        runs = []
+        for path, request, offset in session._test_case_slots():
+            if request.disabled or request.num_mutations == 0:
+                continue
+            for mutant, start, length in request.mutation_runs():
+                weight = self.weights(request, mutant)
+                if weight > 0 and not mutant.disabled:
+                    runs.append((offset + start, length, weight))
+        signature = tuple(runs)
+        if signature == self._signature:
+            return
+        self._signature = signature
+        self._runs = sorted(runs)
+        self._run_starts = [start for start, _, _ in self._runs]
+        self._segment_cache = {}
+
+        # A run of length l and weight w has w test cases in the rounds before l // w, the remainder in that round
+        # and none after it. Between two of these breakpoints every run has a constant number of test cases per round
+        weight_ends: Dict[int, int] = {}
+        remainders: Dict[int, int] = {}
+        breakpoints = {0}
+        for _, length, weight in self._runs:
+            full_rounds, remainder = divmod(length, weight)
+            weight_ends[full_rounds] = weight_ends.get(full_rounds, 0) + weight
+            remainders[full_rounds] = remainders.get(full_rounds, 0) + remainder
+            breakpoints.add(full_rounds)
+            breakpoints.add(full_rounds + 1)
+        total_weight = sum(weight for _, _, weight in self._runs)
+
+        self._rounds, self._positions, self._counts = [], [], []
+        position = 0
+        breakpoints = sorted(breakpoints)
+        for first_round, next_round in zip(breakpoints, breakpoints[1:]):
+            total_weight -= weight_ends.get(first_round, 0)
+            count = total_weight + remainders.get(first_round, 0)
+            if count == 0:
+                continue
+            self._rounds.append(first_round)
+            self._positions.append(position)
+            self._counts.append(count)
+            position += count * (next_round - first_round)
+        self._length = position
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _segment(self, segment: int) -> Tuple[List[int], List[int]]:
+        """
+        Returns: A tuple (runs, prefixes) with the indexes of the runs that have test cases in the rounds of the
+                 segment, and the number of test cases of the round before each one
+        """
+        if segment not in self._segment_cache:
+            if len(self._segment_cache) > 8:
+                self._segment_cache.clear()
+            first_round = self._rounds[segment]
+            runs, prefixes = [], []
+            prefix = 0
+            for i, (_, length, weight) in enumerate(self._runs):
+                count = min(weight, length - first_round * weight)
+                if count > 0:
+                    runs.append(i)
+                    prefixes.append(prefix)
+                    prefix += count
+            self._segment_cache[segment] = (runs, prefixes)
+        return self._segment_cache[segment]
+
+    def test_case_id(self, position: int) -> int:
+        if not 0 <= position < self._length:
+            raise IndexError(f'Position {position} out of the schedule of {self._length} test cases')
+        segment = bisect.bisect_right(self._positions, position) - 1
+        round_offset, index = divmod(position - self._positions[segment], self._counts[segment])
+        runs, prefixes = self._segment(segment)
+        i = bisect.bisect_right(prefixes, index) - 1
+        start, _, weight = self._runs[runs[i]]
+        return start + (self._rounds[segment] + round_offset) * weight + index - prefixes[i] + 1
+
+    def position_of(self, test_case_id: int) -> Optional[int]:
+        run = bisect.bisect_right(self._run_starts, test_case_id - 1) - 1
+        if run < 0:
+            return None
+        start, length, weight = self._runs[run]
+        if test_case_id - start > length:
+            return None  # Excluded test case
+        round_number, index = divmod(test_case_id - start - 1, weight)
+        segment = bisect.bisect_right(self._rounds, round_number) - 1
+        runs, prefixes = self._segment(segment)
+        i = bisect.bisect_left(runs, run)
+        return (self._positions[segment] + (round_number - self._rounds[segment]) * self._counts[segment]
+                + prefixes[i] + index)
@@ -0,0 +1,141 @@
+import bisect
+import random
+from typing import List, Optional, Sequence, TYPE_CHECKING
+
+from fuzzowski.exception import FuzzowskiRuntimeError
+from .ischeduler import IScheduler
+from .mutant_weights import MutantWeights
+
+if TYPE_CHECKING:
+    from fuzzowski.session import Session
+
+
+def _apportion(total: int, weights: Sequence[int], caps: Sequence[int]) -> List[int]:
+    """
+    Splits total in integer shares proportional to the weights, none above its cap. The shares that reach their cap
+    are fixed and the rest is split again between the others, the remainders go to the biggest fractions.
+
+    Args:
+        total: Number to split, not more than sum(caps)
+        weights: Weight of each share (all > 0)
+        caps: Maximum of each share
+
+    Returns: The list of shares
+    """
+    shares = [0] * len(weights)
+    order = sorted(range(len(weights)), key=lambda i: caps[i] / weights[i])
+    total_weight = sum(weights)
+    # The shares with the smallest cap/weight ratio reach their cap first
+    capped = 0
+    while capped < len(order) and caps[order[capped]] * total_weight <= total * weights[order[capped]]:
+        i = order[capped]
+        shares[i] = caps[i]
+        total -= caps[i]
+        total_weight -= weights[i]
+        capped += 1
+    active = order[capped:]
+    if not active:
+        return shares
+
+    fractions = []
+    for i in active:
+        shares[i], fraction = divmod(total * weights[i], total_weight)
+        fractions.append((-fraction, i))
+    for _, i in sorted(fractions)[:total - sum(shares[i] for i in active)]:
+        shares[i] += 1
+    return shares
+
+
+class SampleScheduler(IScheduler):
+    """
+    Runs a sample of budget test cases of the whole session, for campaigns that can not run all of them. Every mutant
+    gets a share of the budget proportional to its weight, and the share is stratified over its mutation buckets
+    (e.g. the String mutation types, see Mutant.mutation_buckets()), so every kind of mutation is represented.
+    抽样调度：按权重在全部变种中分层抽取budget个测试用例
+
+    Weights are given as "key=weight" (see MutantWeights), the default weight is 1 and weight 0 excludes the mutants.
+    Disabled requests and mutants are left out of the sample.
+
+    The test cases are chosen in the index space of each mutant (Block.mutation_runs()) with systematic sampling from
+    a seeded random start. Nothing is enumerated, so building the sample depends on the budget and the number of
+    mutants, not on the number of test cases of the session. The same seed and session always give the same sample.
+    The sampled test cases run in the declaration order.
+    """
+
+    def __init__(self, budget: int or str, seed: int or str = 0, *weights: str, **kwargs):
+        try:
+            self.budget = int(budget)
+            self.seed = int(seed)
+        except ValueError:
+            raise FuzzowskiRuntimeError(f'The budget and the seed of the {self.name()} scheduler must be integers: '
+                                        f'{budget}, {seed}')
+        if self.budget < 0:
+            raise FuzzowskiRuntimeError(f'Invalid budget for the {self.name()} scheduler: {budget}')
+        self.weights = MutantWeights(weights)
+        self._signature = None
+        self._test_case_ids: List[int] = []
+
+    @staticmethod
+    def name() -> str:
+        return 'sample'
+
+    @staticmethod
+    def help():
+        return "<budget> [<seed> [<key>=<weight> ...]] Run a sample of <budget> test cases, stratified by mutant " \
+               "and mutation type. Each mutant gets a share of the budget proportional to its weight. key is " \
+               "request.mutant, request or a mutant type (Default seed 0, weight 1, 0 to exclude)"
+
+    def schedule(self, session: 'Session'):
+        runs = []
+        for path, request, offset in session._test_case_slots():
+            if request.disabled or request.num_mutations == 0:
+                continue
+            for mutant, start, length in request.mutation_runs():
+                weight = self.weights(request, mutant)
+                if weight > 0 and not mutant.disabled:
+                    buckets = [size for _, size in mutant.mutation_buckets()]
+                    if sum(buckets) != length:
+                        buckets = [length]  # e.g. combined mutants, their run is not the mutations of one mutant
+                    runs.append((offset + start, length, weight, tuple(buckets)))
+        signature = tuple(runs)
+        if signature == self._signature:
+            return
+        self._signature = signature
+
+        rng = random.Random(self.seed)
+        budget = min(self.budget, sum(length for _, length, _, _ in runs))
+        shares = _apportion(budget, [weight for _, _, weight, _ in runs], [length for _, length, _, _ in runs])
+        test_case_ids = []
+        for (start, length, weight, buckets), share in zip(runs, shares):
+            if share == 0:
+                continue
+            # One test case of each bucket, the rest of the share proportional to the size of the buckets
+            if share < len(buckets):
+                bucket_shares = [0] * len(buckets)
+                for i in rng.sample(range(len(buckets)), share):
+                    bucket_shares[i] = 1
+            else:
+                bucket_shares = [1 + extra for extra in _apportion(share - len(buckets), buckets,
+                                                                   [size - 1 for size in buckets])]
+            bucket_start = start
+            for size, bucket_share in zip(buckets, bucket_shares):
+                if bucket_share > 0:
+                    # Systematic sample: one test case every size / bucket_share, from a random start
+                    random_start = rng.randrange(size)
+                    test_case_ids.extend(bucket_start + (i * size + random_start) // bucket_share + 1
+                                         for i in range(bucket_share))
+                bucket_start += size
+        test_case_ids.sort()
+        self._test_case_ids = test_case_ids
+
+    def __len__(self) -> int:
+        return len(self._test_case_ids)
+
+    def test_case_id(self, position: int) -> int:
+        return self._test_case_ids[position]
+
+    def position_of(self, test_case_id: int) -> Optional[int]:
+        position = bisect.bisect_left(self._test_case_ids, test_case_id)
+        if position < len(self._test_case_ids) and self._test_case_ids[position] == test_case_id:
+            return position
+        return None
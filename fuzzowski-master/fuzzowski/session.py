@@ -1,18 +1,27 @@
+import bisect
+import collections
+import hashlib
 import os
 import pickle
+import threading
 import time
 import zlib
 
 from fuzzowski import Target, FuzzLogger, exception
 from fuzzowski.loggers import FuzzLoggerText
 from fuzzowski.restarters import IRestarter
+from fuzzowski.schedulers import IScheduler, SampleScheduler
 from . import helpers
+from .helpers.bloom_filter import BloomFilter
 from . import constants
 from fuzzowski.graph import Graph, Edge
 from fuzzowski.mutants.blocks import Request
 from fuzzowski.mutants import Mutant
-from typing import List, Generator, Dict
+from fuzzowski.mutants.mutation_library import iter_segments
+from typing import List, Generator, Dict, Tuple
 from .testcase import TestCase
+from .async_runner import AsyncRunner
+from .parallel_runner import ParallelRunner
 from fuzzowski.prompt.session_prompt import SessionPrompt
 
 
@@ -57,10 +66,37 @@ class Session(object):
                                 This is usually a helpful setting to enable, as targets may drop connections once a
                                 message is clearly invalid.
         target (Target):        Target for fuzz session. Target must be fully initialized. Default None.
+                                More targets can be added with add_target() to run the test cases in parallel.
         restarter (IRestarter): Restarter module initialized. Will call restart() when the target is down. Default None
         monitors (list of IMonitor): Monitor modules
         new_connection_between_requests: bool = True. Close and Open the connection to the target between packets
         transmit_full_path: bool = False. Transmit the next node of the graph when fuzzing a node
+        combination_strength (int): Mutate several mutants of each request at once, covering all the combinations of
+                                    mutations of any N mutants (2 = pairwise). Default 0, one mutant at a time.
+                                    See Block.combine()
+        combination_mutants (list of str): Path names (request.mutant) of the mutants to combine. Requests without
+                                           mutants in the list mutate one mutant at a time. Default None, all the
+                                           fuzzable mutants are combined
+        scheduler (IScheduler): Scheduler module initialized, it chooses the order of the test cases. Default None,
+                                the declaration order of the paths and mutants
+        sample_budget (int): Run only a sample of this number of test cases, stratified by mutant and mutation type
+                             (see SampleScheduler). It can not be used with a scheduler. Default 0, all test cases
+        sample_seed (int): Seed of the sample, the same seed always gives the same sample. Default 0
+        sample_weights (list of str): Weights of the mutants in the sample, as "key=weight" (see MutantWeights).
+                                      Default None, all the mutants weigh 1
+        deduplicate (bool): Skip the test cases whose fuzzed request renders the same bytes as a test case already sent
+                            in the same path. The payloads sent are remembered in a Bloom filter, so a few test cases
+                            may be skipped by mistake (about 0.1%). Default False
+        fuzz_requests_once (bool): Fuzz each request only in one path, instead of once in every path of the graph where
+                                   it is. Default False
+        canonical_paths (list of str): Paths where the requests are fuzzed with fuzz_requests_once, as the names of
+                                       the requests joined by "->" (e.g. "r1->r2->r3"). The requests of no path listed
+                                       are fuzzed in the path where they are reached first. Default None
+        in_flight (int): Number of test cases transmitting at the same time, each one in its own connection (see
+                         AsyncRunner). It needs a TCP or SSL SocketConnection, no callbacks and no Responses in
+                         requests followed by others, and can not be used with sleep_time or restart_interval.
+                         Default 1, one test case after another
+        case_timeout (float): With in_flight, seconds a test case can take before it is aborted. Default None
     """
 
     def __init__(self, graph: Graph = None,
@@ -81,7 +117,18 @@ class Session(object):
                  monitors: "list of IMonitor" = [],
                  new_connection_between_requests: bool = False,
                  transmit_full_path: bool = False,
-                 tests_number_to_keep: int = 1000
+                 tests_number_to_keep: int = 1000,
+                 combination_strength: int = 0,
+                 combination_mutants: List[str] = None,
+                 scheduler: IScheduler = None,
+                 sample_budget: int = 0,
+                 sample_seed: int = 0,
+                 sample_weights: List[str] = None,
+                 deduplicate: bool = False,
+                 fuzz_requests_once: bool = False,
+                 canonical_paths: List[str] = None,
+                 in_flight: int = 1,
+                 case_timeout: float = None
                  ):
         super().__init__()
 
@@ -103,8 +150,29 @@ class Session(object):
                                    ignore_transmission_errors=ignore_transmission_errors,  # TODO
                                    ignore_connection_issues_after_fuzz=ignore_connection_issues_after_fuzz,  # TODO
 
-                                   tests_number_to_keep=tests_number_to_keep
+                                   tests_number_to_keep=tests_number_to_keep,
+
+                                   # Mutation strategy
+                                   combination_strength=combination_strength,
+                                   combination_mutants=combination_mutants,
+                                   deduplicate=deduplicate,
+                                   fuzz_requests_once=fuzz_requests_once,
+                                   canonical_paths=canonical_paths,
+
+                                   # Concurrency
+                                   in_flight=in_flight,
+                                   case_timeout=case_timeout
                                    )
+        if in_flight < 1:
+            raise exception.FuzzowskiRuntimeError(f'Invalid number of test cases in flight: {in_flight}')
+        if in_flight > 1 and (sleep_time > 0 or restart_interval > 0):
+            raise exception.FuzzowskiRuntimeError('Test cases in flight can not be used with sleep_time or '
+                                                  'restart_interval')
+
+        # Totals of the graph, updated with the changes of each request (see _count_mutations())
+        self._slot_counts = None  # (graph version, {request: number of slots of the request in the graph})
+        self._request_counts = {}  # request => (count generation, num_mutations, num_enabled_mutations) in the totals
+        self._mutation_counts = [0, 0]  # [num_mutations, num_enabled_mutations]
 
         # Create Results Dir if it does not exist
         helpers.mkdir_safe(os.path.join(constants.RESULTS_DIR))
@@ -126,18 +194,19 @@ class Session(object):
         if self.session_filename is not None:
             self.logger.log_info('Using session file: {}'.format(self.session_filename))
 
-        self.target = target
-        if target is not None:
-            try:
-                self.add_target(target)
-            except exception.FuzzowskiRpcError as e:  # TODO: Change exception
-                self.logger.log_error(str(e))
-                raise
+        self.target = None
+        self.targets: List[Target] = []  # The target of the session and the targets added to run in parallel
+        self._restarters: Dict[Target, IRestarter] = {}
+        self._target_monitors: Dict[Target, list] = {}
+        self.lock = threading.RLock()  # Held to change the session state from the test cases of parallel targets
         self._requests = []
         if graph is not None:
             self.graph = graph
             if len(self.graph.graph_dict) == 0:
                 raise exception.FuzzowskiRuntimeError('The Graph must have at least 1 request!')
+            for path in self.graph.path_iterator():
+                for edge in path:
+                    self._set_combination(edge.dst)
         else:
             self.graph = Graph()
 
@@ -145,25 +214,43 @@ class Session(object):
         self.disabled_elements: Dict[str, 'Mutant'] = {}  # Dictionary of disabled Mutants or Requests
         self.latest_tests = []  # List of N test cases
         self.previous_test_possible = False
+        self._latest_by_target: Dict[Target, TestCase] = {}  # Latest test case of each parallel target not blamed yet
 
         self._restarter = restarter
+        if sample_budget:
+            if scheduler is not None:
+                raise exception.FuzzowskiRuntimeError('A sample budget can not be used with a scheduler')
+            scheduler = SampleScheduler(sample_budget, sample_seed, *(sample_weights or []))
+        self.scheduler = scheduler
 
         self.monitors = []
         for monitor_class in monitors:
             self.monitors.append(monitor_class(self))
             # TODO: How to pass arbitrary args to monitors? think a good way!
             #  Maybe passing all the args and let the monitor pick them?
+        self._monitor_classes = monitors
 
+        if target is not None:
+            try:
+                self.add_target(target)
+            except exception.FuzzowskiRpcError as e:  # TODO: Change exception
+                self.logger.log_error(str(e))
+                raise
 
         # Some variables that will be used during fuzzing
         self.last_send = None
         self.last_recv = None
         self.mutant_index = 0
+        self.schedule_position = 0  # Test cases of the schedule already generated, if there is a scheduler
+        self.sent_payloads = None  # BloomFilter of the fingerprints of the test cases sent, if deduplicate is set
+        self._sent_payloads_version = None  # Graph version sent_payloads was checked for
+        self._payloads_taken = set()  # Fingerprints of the test cases taken with _take_next() and not sent yet
+        self.duplicates_skipped = 0  # Test cases not sent because their payload was already sent
+        self._rtt_learned_paths = set()  # Paths sent without fuzzing to learn their RTT, see _learn_rtt()
         self._test_cases = None
         self.test_case = None
 
         self.is_paused = True
-        self.total_mutations = self.num_mutations
         self.prompt = None
         self.reset()
         # self.prompt = SessionPrompt(self) # Placed in start() to avoid tests failing due lack of input
@@ -177,9 +264,14 @@ class Session(object):
         Starts the prompt once the session is prepared
         """
         # self.logger.log_info("Starting Fuzzowski Session")
+        if self.opts.fuzz_requests_once:
+            path_names = {'->'.join(edge.dst.name for edge in path) for path in self.graph.path_iterator()}
+            for path_name in self.opts.canonical_paths or []:
+                if path_name not in path_names:
+                    raise exception.FuzzowskiRuntimeError(f'The canonical path {path_name} is not in the graph')
         self.prompt = SessionPrompt(self)
         self.reset()
-        self.goto(1)
+        self._goto_first()
         self.import_file(self.session_filename)
         self.prompt.start_prompt()
 
@@ -192,6 +284,7 @@ class Session(object):
         Returns: If the TestCase was run correctly (even with transmission errors) or not (due to Pausing without conn)
         """
         if self.test_case is not None:
+            self._learn_rtt(self.test_case)
             run = self.test_case.run()
             self.check_monitors()
             # self.process_errors()  # TODO: Move add suspects from different parts of the code to this function!
@@ -200,6 +293,23 @@ class Session(object):
             self.logger.log_info('Nothing to run yet.')
             return False
 
+    def _learn_rtt(self, test_case: TestCase):
+        """
+        With adaptive timeouts, sends the path of the test case without fuzzing if the RTT of any of its requests is
+        not known yet, so the fuzzed request is received with a timeout learned from the target. Each path is tried
+        once per session, requests that are never received keep the recv timeout of the connection
+        """
+        target = self.target
+        if target is None or not target.adaptive_timeout or test_case.path_name in self._rtt_learned_paths:
+            return
+        self._rtt_learned_paths.add(test_case.path_name)
+        if all(target.rtt_estimator(edge.dst.name).samples > 0 for edge in test_case.path):
+            return
+        try:
+            test_case.test()
+        except Exception as e:
+            self.logger.log_info(f'Could not learn the RTT of {test_case.path_name}: {type(e).__name__}. {str(e)}')
+
     # --------------------------------------------------------------- #
 
     def run_all(self):
@@ -212,7 +322,17 @@ class Session(object):
         self._test_cases or self.test_case should be set before calling this function
 
         This is usually called from the command prompt and the is_pause flag controlled from there.
+
+        With in_flight > 1, the test cases are run by an AsyncRunner, and with several targets by a ParallelRunner.
         """
+        if self.opts.deduplicate:
+            self._size_sent_payloads()
+        if len(self.targets) > 1:
+            ParallelRunner(self).run_all()
+            return
+        if self.opts.in_flight > 1:
+            AsyncRunner(self, self.opts.in_flight, self.opts.case_timeout).run_all()
+            return
         while not self.is_paused:
             self.run_next(force=False)
 
@@ -239,7 +359,15 @@ class Session(object):
         run = True
         if self.test_case is not None:
             if force or not self.test_case.disabled:
-                run = self.run()
+                fingerprint = self._fingerprint(self.test_case) if self.opts.deduplicate else None
+                if not force and fingerprint is not None and fingerprint in self.sent_payloads:
+                    self.duplicates_skipped += 1
+                    self.logger.log_info(f'Test case {self.test_case.id} skipped, its payload was already sent '
+                                         f'({self.duplicates_skipped} duplicates skipped)')
+                else:
+                    run = self.run()
+                    if run and fingerprint is not None:
+                        self.sent_payloads.add(fingerprint)
 
         if run:
             self.next()
@@ -247,6 +375,95 @@ class Session(object):
                 self.logger.log_info('Fuzzing test cases exhausted!')
                 self.is_paused = True
 
+    def _take_next(self) -> Tuple[TestCase or None, bool]:
+        """
+        Takes the actual test case to run it while the session goes on (in flight or in a parallel target), and goes
+        to the next test case, like run_next() does: disabled test cases and payloads already sent are skipped, and
+        the payloads of the test case are rendered (see TestCase.render_payloads()). It must be called with the lock.
+        Call _mark_sent() once the test case runs, and _forget_taken() when the test cases taken stop running. Payloads
+        of test cases taken and not sent yet are also skipped, so duplicates running at the same time are sent once
+
+        Returns: (The test case to run, None if it was skipped; True if the test cases were exhausted). When they are
+                 exhausted, the session goes back to the first test case without pausing
+        """
+        test_case = self.test_case
+        if test_case is None:
+            return None, True
+        if test_case.disabled:
+            test_case = None
+        else:
+            fingerprint = self._fingerprint(test_case) if self.opts.deduplicate else None
+            if fingerprint is not None and fingerprint in self.sent_payloads:
+                self.duplicates_skipped += 1
+                self.logger.log_info(f'Test case {test_case.id} skipped, its payload was already sent '
+                                     f'({self.duplicates_skipped} duplicates skipped)')
+                test_case = None
+            elif fingerprint is not None and fingerprint in self._payloads_taken:
+                self.duplicates_skipped += 1
+                self.logger.log_info(f'Test case {test_case.id} skipped, its payload is being sent by another test '
+                                     f'case ({self.duplicates_skipped} duplicates skipped)')
+                test_case = None
+            else:
+                test_case.render_payloads()
+                test_case.fingerprint = fingerprint
+                if fingerprint is not None:
+                    self._payloads_taken.add(fingerprint)
+
+        was_paused = self.is_paused
+        self.next()
+        exhausted = self.is_paused and not was_paused
+        if exhausted:
+            self.logger.log_info('Fuzzing test cases exhausted!')
+            self.is_paused = False
+        return test_case, exhausted
+
+    def _mark_sent(self, test_case: TestCase):
+        """Remembers the payload of a test case taken with _take_next() as sent, if the session deduplicates them"""
+        if test_case.fingerprint is not None:
+            with self.lock:
+                self.sent_payloads.add(test_case.fingerprint)
+                self._payloads_taken.discard(test_case.fingerprint)
+
+    def _forget_taken(self):
+        """
+        Forgets the payloads of the test cases taken with _take_next() that were not sent (e.g. the target did not
+        recover), so they are not skipped when they are taken again
+        """
+        with self.lock:
+            self._payloads_taken.clear()
+
+    def _fingerprint(self, test_case: TestCase) -> bytes:
+        """
+        Fingerprint of the payload of a test case: the path and the rendered fuzzed request
+
+        Args:
+            test_case: The test case, it must be the actual one (its request is rendered)
+
+        Returns: A digest of the payload
+        """
+        self._size_sent_payloads()
+        fingerprint = hashlib.blake2b(test_case.path_name.encode(), digest_size=16)
+        for segment in iter_segments(test_case.request.compile().render_segments()):
+            fingerprint.update(segment)
+        return fingerprint.digest()
+
+    def _size_sent_payloads(self):
+        """
+        Creates the BloomFilter of the payloads sent for the test cases of the graph, when the session starts iterating
+        them. The filter can not be resized (the fingerprints are not kept), so when the graph changes and it has
+        more test cases than the filter was sized for, a warning is logged: duplicates will be mistaken more often
+        """
+        if self.sent_payloads is None:
+            self.sent_payloads = BloomFilter(self.num_mutations)
+            self._sent_payloads_version = self.graph.version
+        elif self._sent_payloads_version != self.graph.version:
+            self._sent_payloads_version = self.graph.version
+            capacity = getattr(self.sent_payloads, 'capacity', len(self.sent_payloads))
+            if self.num_mutations > capacity:
+                self.logger.log_warn(f'The filter of the payloads sent was sized for {capacity} test cases and the '
+                                     f'graph has {self.num_mutations} now, more payloads not sent yet may be skipped '
+                                     f'as duplicates')
+
     # --------------------------------------------------------------- #
 
     def reset(self):
@@ -260,9 +477,10 @@ class Session(object):
         Resets the Session state
         """
         self.mutant_index = 0
+        self.schedule_position = 0
         self.last_send = None
         self.last_recv = None
-        self._test_cases = self.test_case_iterator()
+        self._test_cases = self.test_case_iterator() if self.scheduler is None else self.scheduled_test_case_iterator()
         self.test_case = None
         for path in self.graph.path_iterator():
             for edge in path:
@@ -324,15 +542,51 @@ class Session(object):
             test_case_id = 1
         if self.test_case is not None and test_case_id == self.test_case.id:
             return self.test_case
-        elif self.test_case is not None and test_case_id < self.test_case.id:
-            # 1st. Reset all
-            self._reset()
-        # if test_case_id == 0:
-        #     return None
-        for test_case in self._test_cases:
-            if test_case.id == test_case_id:
-                # self.logger.log_info(f'Test case {test_case.id} reached')
-                return test_case
+
+        # Random access: locate the request slot of the test case and move only that request to its local index
+        schedule_position = self.schedule_position
+        self._reset()
+        location = self._locate_test_case(test_case_id)
+        if location is None:
+            return None
+        path, request, mutant_index = location
+        request.goto(mutant_index)
+        self.mutant_index = test_case_id
+        self.test_case = TestCase(id=self.mutant_index, session=self, request=request, path=path)
+        if self.scheduler is None:
+            self._test_cases = self.test_case_iterator(start_id=test_case_id)
+        else:
+            # Continue the schedule after the test case, or from the actual position if it is not in the schedule
+            self.scheduler.schedule(self)
+            position = self.scheduler.position_of(test_case_id)
+            self.schedule_position = position + 1 if position is not None else schedule_position
+            self._test_cases = self.scheduled_test_case_iterator(self.schedule_position)
+        return self.test_case
+
+    def goto_position(self, position: int) -> TestCase or None:
+        """
+        Prepare the session in the test case scheduled in a position of the schedule (see IScheduler)
+        Args:
+            position: Position in the schedule, from 0
+
+        Returns: The test case in that position, or None if the schedule has less test cases
+        """
+        self._reset()
+        self.scheduler.schedule(self)
+        if position >= len(self.scheduler):
+            return None
+        self.goto_id(self.scheduler.test_case_id(position))
+        self.schedule_position = position + 1
+        self._test_cases = self.scheduled_test_case_iterator(self.schedule_position)
+        return self.test_case
+
+    def _goto_first(self) -> TestCase or None:
+        """
+        Go to the first test case, in the order of the scheduler if there is one
+        """
+        if self.scheduler is None:
+            return self.goto(1)
+        return self.goto_position(0)
 
     def goto_path(self, path_name: str) -> TestCase or None:
         """
@@ -345,10 +599,17 @@ class Session(object):
         destination = Request.get_mutant_by_path(path_name)
         if not destination.fuzzable:
             raise exception.FuzzowskiRuntimeError(f"You can't go to {path_name}. It is not fuzzable!")
+        # Locate the first test case of the destination without walking the test cases
+        for path, request, offset in self._test_case_slots():
+            if request.num_mutations == 0:
+                continue
+            if request == destination:
+                return self.goto_id(offset + 1)
+            mutation_offset = request.mutation_offset(destination)
+            if mutation_offset is not None:
+                return self.goto_id(offset + mutation_offset + 1)
         self._reset()
-        for test_case in self._test_cases:
-            if test_case.request == destination or test_case.request.mutant == destination:
-                return test_case
+        return None
 
     # --------------------------------------------------------------- #
 
@@ -358,9 +619,15 @@ class Session(object):
             return self.next()
         else:
             self.logger.log_info(f'Skipping {self.test_case.request.name}.{self.test_case.request.mutant.name}')
+            # Jump to the last test case of the current mutant, the next one belongs to another mutant
             test_case_mutant = self.test_case.request.mutant
-            while self.test_case is not None and test_case_mutant == self.test_case.request.mutant:
-                self.next()
+            if self.test_case.request.combinations is not None:
+                # All the combined mutants change in every test case, skip the rest of the request
+                test_case_mutant = self.test_case.request
+            remaining = test_case_mutant.num_mutations - test_case_mutant.mutant_index
+            if remaining > 0:
+                self.goto_id(self.test_case.id + remaining)
+            self.next()
             self.logger.log_info(f'Next element: {self.test_case.request.name}.{self.test_case.request.mutant.name}')
             return self.test_case
 
@@ -377,7 +644,7 @@ class Session(object):
             return self.test_case
         except StopIteration:
             # self.reset()
-            self.goto(1)
+            self._goto_first()
             self.is_paused = True
             return self.test_case
             # return None  # All test cases exhausted
@@ -388,13 +655,38 @@ class Session(object):
     # Test case Iterators                                             #
     # ================================================================#
 
-    def test_case_iterator(self) -> Generator[TestCase, None, None]:
+    def test_case_iterator(self, start_id: int = 0) -> Generator[TestCase, None, None]:
         """
         A generator of all session TestCases
+
+        Args:
+            start_id: (Optional, def=0) Test case id to resume from. The first TestCase generated is start_id + 1
         """
-        self.mutant_index = 0
-        for path in self.graph.path_iterator():
-            yield from self.test_case_path_iterator(path)
+        self.mutant_index = start_id
+        for path, request, offset in self._test_case_slots():
+            if offset + request.num_mutations < start_id:
+                continue  # All the test cases of this slot were already generated
+            yield from self.test_case_request_iterator(request, path, mutant_index=max(0, start_id - offset))
+
+    def scheduled_test_case_iterator(self, start_position: int = 0) -> Generator[TestCase, None, None]:
+        """
+        A generator of the TestCases in the order chosen by the scheduler. Each test case is reached with random access
+
+        Args:
+            start_position: (Optional, def=0) Position of the schedule to resume from
+        """
+        self.scheduler.schedule(self)
+        slots = self._slot_index()
+        for position in range(start_position, len(self.scheduler)):
+            test_case_id = self.scheduler.test_case_id(position)
+            path, request, mutant_index = self._locate_test_case(test_case_id, slots)
+            if self.test_case is not None and self.test_case.request is not request:
+                self.test_case.request.reset()  # The other requests of the paths are sent with their original value
+            request.goto(mutant_index)
+            self.mutant_index = test_case_id
+            self.schedule_position = position + 1
+            self.test_case = TestCase(id=test_case_id, session=self, request=request, path=path)
+            yield self.test_case
 
     def test_case_path_iterator(self, path: List[Edge]) -> Generator[TestCase, None, None]:
         """
@@ -407,21 +699,84 @@ class Session(object):
             mutant_request = edge.dst  # First, we chose our mutant Request
             yield from self.test_case_request_iterator(mutant_request, path)
 
-    def test_case_request_iterator(self, request: Request, path: List[Edge]) -> Generator[TestCase, None, None]:
+    def test_case_request_iterator(self, request: Request, path: List[Edge],
+                                   mutant_index: int = 0) -> Generator[TestCase, None, None]:
         """
         A generator of all TestCases for an specified request in a path
 
         Args:
             request: Request that is being fuzzed
             path: Path the request belongs to
+            mutant_index: (Optional, def=0) Request mutant_index to resume from
 
         Returns:
         """
-        for _ in request:
+        # Only the state is advanced here, the test case is rendered when it is sent
+        for _ in request.step_generator(mutant_index):
             self.mutant_index += 1
             self.test_case = TestCase(id=self.mutant_index, session=self, request=request, path=path)
             yield self.test_case
 
+    def _test_case_slots(self) -> Generator[Tuple[List[Edge], Request, int], None, None]:
+        """
+        Walks the graph in the same order as test_case_iterator(), without mutating or rendering anything. With the
+        fuzz_requests_once option, each request is only in the slot of its canonical path
+
+        Returns: A generator of tuples (path, request, offset), where offset is the number of test cases of the session
+                 before the first test case of the request in that path
+        """
+        canonical_paths = self._canonical_paths() if self.opts.fuzz_requests_once else None
+        offset = 0
+        for path in self.graph.path_iterator():
+            for edge in path:
+                if canonical_paths is not None and canonical_paths.get(edge.dst) != path:
+                    continue  # The request is fuzzed in another path
+                yield path, edge.dst, offset
+                offset += edge.dst.num_mutations
+
+    def _canonical_paths(self) -> Dict[Request, List[Edge]]:
+        """
+        Returns: The path where each request is fuzzed when the requests are fuzzed once (see Graph.canonical_paths())
+        """
+        paths = {'->'.join(edge.dst.name for edge in path): path for path in self.graph.path_iterator()}
+        # The paths not in the graph are ignored, as the graph may not be complete yet (see start())
+        preferred_paths = [paths[path_name] for path_name in self.opts.canonical_paths or [] if path_name in paths]
+        return self.graph.canonical_paths(preferred_paths)
+
+    def _slot_index(self) -> Tuple[List[Tuple[List[Edge], Request, int]], List[int]]:
+        """
+        Returns: A tuple (slots, ends) with the list of _test_case_slots() and the id of the last test case of each one,
+                 to locate test cases with a binary search while the graph does not change
+        """
+        slots = [slot for slot in self._test_case_slots() if slot[1].num_mutations > 0]
+        ends = [offset + request.num_mutations for _, request, offset in slots]
+        return slots, ends
+
+    def _locate_test_case(self, test_case_id: int,
+                          slots: Tuple[List[Tuple[List[Edge], Request, int]], List[int]] = None
+                          ) -> Tuple[List[Edge], Request, int] or None:
+        """
+        Maps a test case id to the request that generates it
+
+        Args:
+            test_case_id: The test case id (1..num_mutations)
+            slots: (Optional, def=None) The index returned by _slot_index(), to avoid walking the graph
+
+        Returns: A tuple (path, request, mutant_index) with the request mutant_index for that test case, or None if the
+                 test_case_id is not in the session
+        """
+        if slots is not None:
+            slot_list, ends = slots
+            i = bisect.bisect_left(ends, test_case_id)
+            if test_case_id < 1 or i == len(ends):
+                return None
+            path, request, offset = slot_list[i]
+            return path, request, test_case_id - offset
+        for path, request, offset in self._test_case_slots():
+            if offset < test_case_id <= offset + request.num_mutations:
+                return path, request, test_case_id - offset
+        return None
+
     # ================================================================#
     # Graph related functions                                         #
     # =====================================================   ===========#
@@ -443,9 +798,27 @@ class Session(object):
             pass
         if type(src) is Request and src not in self._requests:
             self._requests.append(src)
+            self._set_combination(src)
         if type(dst) is Request and dst not in self._requests:
             self._requests.append(dst)
-        self.total_mutations = self.num_mutations
+            self._set_combination(dst)
+
+    def _set_combination(self, request: Request):
+        """
+        Sets the request in combination mode if a combination strength was chosen for the session
+
+        Args:
+            request: A request of the session graph
+        """
+        if not self.opts.combination_strength:
+            return
+        mutant_names = None
+        if self.opts.combination_mutants is not None:
+            mutant_names = [path_name.split('.', 1)[1] for path_name in self.opts.combination_mutants
+                            if path_name.split('.', 1)[0] == request.name and '.' in path_name]
+            if not mutant_names:
+                return  # Only mutants of other requests are combined
+        request.combine(self.opts.combination_strength, mutant_names)
 
     # ================================================================#
     # Suspects, disabled elements                                     #
@@ -457,7 +830,9 @@ class Session(object):
         Args:
             test_case: The test case to add as a suspect
         """
-        if test_case.id not in self.suspects:
+        with self.lock:
+            if test_case.id in self.suspects:
+                return
             self.suspects[test_case.id] = test_case
             self.logger.log_info(f'Added test case {test_case.id} as a suspect')
 
@@ -482,19 +857,26 @@ class Session(object):
                                               f'Disabling it')
                         self.disable_by_path_name(f'{request_name}.{mutant_name}')
 
-    def add_last_case_as_suspect(self, error: Exception):
+    def add_last_case_as_suspect(self, error: Exception, target: Target = None):
         """
         Adds the latest test executed as a suspect
         Args:
             error: An Exception to include within the TestCase information
+            target: (Optional) With parallel targets, the target that failed. Its latest test case is the suspect
         """
-        if len(self.latest_tests) == 0 or self.previous_test_possible is False:
-            return  # No latest case to add
-        self.logger.log_warn("Adding latest test case as a suspect")
-        latest_test = self.latest_tests[0]
-        latest_test.add_error(error)
-        self.add_suspect(latest_test)
-        self.previous_test_possible = False
+        with self.lock:
+            if len(self.targets) > 1:
+                latest_test = self._latest_by_target.pop(target if target is not None else self.target, None)
+            elif len(self.latest_tests) > 0 and self.previous_test_possible:
+                latest_test = self.latest_tests[0]
+            else:
+                latest_test = None
+            if latest_test is None:
+                return  # No latest case to add
+            self.logger.log_warn("Adding latest test case as a suspect")
+            latest_test.add_error(error)
+            self.add_suspect(latest_test)
+            self.previous_test_possible = False
 
     # --------------------------------------------------------------- #
 
@@ -524,43 +906,64 @@ class Session(object):
             disable: (Def True). True to disable, False to enable
         """
         disabled_element = Request.get_mutant_by_path(path_name)
-        disabled_element.disabled = disable
-        if disable:  # Add to self.disabled_elements dictionary
-            self.disabled_elements[path_name] = disabled_element
-        else:
-            try:
-                self.disabled_elements.pop(path_name)
-            except KeyError:
-                pass
+        with self.lock:
+            disabled_element.disabled = disable
+            if disable:  # Add to self.disabled_elements dictionary
+                self.disabled_elements[path_name] = disabled_element
+            else:
+                try:
+                    self.disabled_elements.pop(path_name)
+                except KeyError:
+                    pass
 
     def add_latest_test(self, test_case: TestCase):
         """ Add a test case to the list of latest test cases keeping the maximum number"""
         # self.logger.log_info(f"Adding {test_case.id} to latest cases")
-        self.previous_test_possible = True
-        if len(self.latest_tests) == self.opts.tests_number_to_keep:
-            self.latest_tests.pop() # Take latest test
-        self.latest_tests.insert(0, test_case)
+        with self.lock:
+            self.previous_test_possible = True
+            self._latest_by_target[test_case.target] = test_case
+            if len(self.latest_tests) == self.opts.tests_number_to_keep:
+                self.latest_tests.pop() # Take latest test
+            self.latest_tests.insert(0, test_case)
 
     # ================================================================#
     # Restarters, Monitors                                            #
     # ================================================================#
 
-    def restart_target(self):
-        """ It will call the restart() command of the IRestarter instance, if a restarter module was set"""
-        if self._restarter is not None:
+    def restart_target(self, target: Target = None):
+        """
+        It will call the restart() command of the IRestarter instance, if a restarter module was set
+
+        Args:
+            target: (Optional) The target to restart, with its own restarter. Default: the target of the session
+        """
+        restarter = self._restarter if target is None or target is self.target else self._restarters.get(target)
+        if restarter is not None:
             try:
-                self.logger.open_test_step('Restarting Target')
-                restarter_info = self._restarter.restart()
-                self.logger.log_info(restarter_info)
+                with self.lock:
+                    self.logger.open_test_step('Restarting Target' if target is None or target is self.target
+                                               else f'Restarting Target {target.target_connection.info}')
+                restarter_info = restarter.restart()
+                with self.lock:
+                    self.logger.log_info(restarter_info)
             except Exception as e:
-                self.logger.log_fail(
-                    "The Restarter module {} threw an exception: {}".format(self._restarter.name(), e))
+                with self.lock:
+                    self.logger.log_fail(
+                        "The Restarter module {} threw an exception: {}".format(restarter.name(), e))
 
     def check_monitors(self):
         """ Check all monitors, and add the current test case as a suspect if a monitor returns False """
         for monitor in self.monitors:
             monitor.run(self.test_case)  # The monitor run() function decides whether to add a test_case as suspect or not
 
+    def target_monitors(self, target: Target) -> list:
+        """
+        Returns: The monitors of a target (the monitors of the session for the target of the session)
+        """
+        if target is None or target is self.target:
+            return self.monitors
+        return self._target_monitors.get(target, [])
+
     # --------------------------------------------------------------- #
 
     # ================================================================#
@@ -597,8 +1000,14 @@ class Session(object):
         """
         state = {
             "mutant_index": self.mutant_index,
+            "schedule_position": self.schedule_position,
             "suspect_ids": [key for key in self.suspects.keys()],  # TODO: Save also the contents of the suspect
-            "disabled_names": [key for key in self.disabled_elements.keys()]
+            "disabled_names": [key for key in self.disabled_elements.keys()],
+            "sent_payloads": self.sent_payloads,
+            "duplicates_skipped": self.duplicates_skipped,
+            "rtt_estimates": {name: (estimator.srtt, estimator.rttvar, estimator.samples)
+                              for name, estimator in self.target.rtt_estimators.items() if estimator.samples}
+            if self.target is not None else {}
             # TODO: crashes, last recv...
         }
         return state
@@ -613,15 +1022,28 @@ class Session(object):
             state: A dictionary with the actual configuration
         @see self.save_session_state()
         """
-        self.goto(state['mutant_index'])
-        for suspect_id in state['suspect_ids']:
-            if suspect_id not in self.suspects:
-                self.suspects[suspect_id] = None  # TODO: Adding as empty for now
+        # Disabled elements first, schedulers may leave them out of the schedule the position belongs to
         for mutant_name in state['disabled_names']:
             try:
                 self.disable_by_path_name(mutant_name, disable=True)
             except exception.FuzzowskiRuntimeError:
                 pass
+        self.goto(state['mutant_index'])
+        if self.scheduler is not None and state.get('schedule_position') is not None:
+            # The position is saved, as not every scheduler can find the position of a test case
+            self.schedule_position = state['schedule_position']
+            self._test_cases = self.scheduled_test_case_iterator(self.schedule_position)
+        for suspect_id in state['suspect_ids']:
+            if suspect_id not in self.suspects:
+                self.suspects[suspect_id] = None  # TODO: Adding as empty for now
+        if state.get('sent_payloads') is not None:
+            self.sent_payloads = state['sent_payloads']
+            self._sent_payloads_version = None  # Checked against the graph of this session the next time it is used
+            self.duplicates_skipped = state.get('duplicates_skipped', 0)
+        if self.target is not None and self.target.adaptive_timeout:
+            for request_name, (srtt, rttvar, samples) in state.get('rtt_estimates', {}).items():
+                estimator = self.target.rtt_estimator(request_name)
+                estimator.srtt, estimator.rttvar, estimator.samples = srtt, rttvar, samples
 
     # --------------------------------------------------------------- #
 
@@ -670,30 +1092,81 @@ class Session(object):
 
     # --------------------------------------------------------------- #
 
-    def add_target(self, target: Target):
+    def add_target(self, target: Target, restarter: IRestarter = None, monitors: "list of IMonitor" = None):
         """
-        Add a target to the session. Multiple targets can be added for parallel fuzzing.
+        Add a target to the session. Multiple targets can be added for parallel fuzzing: the first one is the target
+        of the session, with the restarter and monitors of the session, and run_all() runs the test cases in all of
+        them at the same time (see ParallelRunner). The targets must be instances of the same service, and the paths
+        can not have Responses in requests followed by others, as the variables are shared by the targets.
+        添加目标，多个目标时并行执行测试用例
 
         Args:
             target: Target to add to session
+            restarter: (Optional) Restarter of the target, if it is not the first one. Default None
+            monitors: (Optional) Monitor classes of the target, if it is not the first one. Default: the monitor
+                      classes of the session
         """
         target.set_fuzz_data_logger(fuzz_data_logger=self.logger)
 
         # add target to internal list.
-        self.target = target
+        if target in self.targets:
+            return
+        self.targets.append(target)
+        if self.target is None:
+            self.target = target
+            return
+        self._restarters[target] = restarter
+        self._target_monitors[target] = []
+        for monitor_class in (self._monitor_classes if monitors is None else monitors):
+            monitor = monitor_class(self)
+            monitor.target = target
+            self._target_monitors[target].append(monitor)
 
     @property
     def num_mutations(self) -> int:
         """
-        Number of total mutations in the graph. The logic of this routine is identical to that of fuzz(). See fuzz()
-        for inline comments. The member variable self.total_num_mutations is updated appropriately by this routine.
+        Number of total mutations in the graph, the ids of the test cases go from 1 to num_mutations. The graph is
+        only walked again when it changes, the changes of the mutations of a request only update the total
         """
-        num_mutations = 0
-        for path in self.graph.path_iterator():
-            for edge in path:
-                request = edge.dst
-                num_mutations += request.num_mutations
-        return num_mutations
+        return self._count_mutations()[0]
+
+    @property
+    def total_mutations(self) -> int:
+        return self.num_mutations
+
+    @property
+    def num_enabled_mutations(self) -> int:
+        """
+        Number of test cases that will be run: the mutations of the disabled requests and mutants are not counted
+        """
+        return self._count_mutations()[1]
+
+    def _count_mutations(self) -> Tuple[int, int]:
+        """
+        The totals are kept up to date incrementally: the graph is only walked again when it changes, to count the
+        slots of each request, and when the mutations of a request change (its count generation) only the difference
+        with the counts of that request already added is applied
+
+        Returns: A tuple (num_mutations, num_enabled_mutations)
+        """
+        if self._slot_counts is None or self._slot_counts[0] != self.graph.version:
+            slots = collections.Counter(request for _, request, _ in self._test_case_slots())
+            self._slot_counts = (self.graph.version, slots)
+            self._request_counts = {}
+            self._mutation_counts = [0, 0]
+
+        totals = self._mutation_counts
+        for request, slots in self._slot_counts[1].items():
+            counted = self._request_counts.get(request)
+            if counted is not None and counted[0] == request._count_generation:
+                continue
+            counts = (request._count_generation, request.num_mutations,
+                      0 if request.disabled else request.num_enabled_mutations)
+            previous = counted if counted is not None else (None, 0, 0)
+            totals[0] += slots * (counts[1] - previous[1])
+            totals[1] += slots * (counts[2] - previous[2])
+            self._request_counts[request] = counts
+        return totals[0], totals[1]
 
     def __iter__(self):
         self.reset()
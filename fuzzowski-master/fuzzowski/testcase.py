@@ -4,6 +4,7 @@ from typing import List, TYPE_CHECKING
 from fuzzowski.graph import Edge
 from fuzzowski.ip_constants import DEFAULT_MAX_RECV
 from fuzzowski.mutants.blocks import Request
+from fuzzowski.mutants.mutation_library import join_segments
 from fuzzowski import exception, helpers
 
 if TYPE_CHECKING:
@@ -38,6 +39,73 @@ class TestCase(object):
         self.request_name = self.request.name
         self.mutant_name = self.request.mutant.name
 
+        self._target = None
+        self.payloads = None  # Segments sent for each request of the path, see render_payloads()
+        self.original_payloads = None
+        self._mutant_type = None  # Type and default value of the mutant when the test case was taken
+        self._default_value = None
+        self.fingerprint = None  # Set when the session deduplicates the payloads, see Session._take_next()
+        self.last_send_segments = None  # Segments of the last request sent (see RenderPlan.render_segments())
+        self._last_send = None
+
+    @property
+    def target(self):
+        """The target where the test case runs: the target of the session, unless another one is set"""
+        return self._target if self._target is not None else self.session.target
+
+    @target.setter
+    def target(self, target):
+        self._target = target
+
+    @property
+    def last_send(self) -> bytes:
+        """
+        The data of the last request sent. It is only joined from last_send_segments when it is read, the segments
+        do not change when the request is rendered again (every render returns new segments)
+        """
+        if self._last_send is None and self.last_send_segments is not None:
+            self._last_send = join_segments(self.last_send_segments)
+        return self._last_send
+
+    @last_send.setter
+    def last_send(self, data: bytes):
+        self._last_send = data
+        self.last_send_segments = None
+
+    def render_payloads(self):
+        """
+        Renders the requests of the path as run() sends them, with and without fuzzing. The test case can then run
+        while the session is at another test case (in flight or in a parallel target), as it does not render its
+        requests again. Each payload is a list of segments (see RenderPlan.render_segments()), they are never joined
+        """
+        payloads = []
+        original_payloads = []
+        fuzzed_sent = False
+        for edge in self.path:
+            request = edge.dst
+            original_payloads.append([request.original_value])
+            if request == self.request or fuzzed_sent:
+                payloads.append(request.compile().render_segments())
+                fuzzed_sent = True
+            else:
+                payloads.append(original_payloads[-1])
+        self.payloads = payloads
+        self.original_payloads = original_payloads
+        self._mutant_type = type(self.request.mutant).__name__
+        self._default_value = self.request.mutant.original_value
+
+    @property
+    def mutant_info(self) -> str:
+        """
+        Type and default value of the mutant fuzzed. If the payloads were rendered, the ones of the mutant when the test
+        case was taken, as the session may be at the next mutant
+        """
+        if self.payloads is not None:
+            mutant_type, default_value = self._mutant_type, self._default_value
+        else:
+            mutant_type, default_value = type(self.request.mutant).__name__, self.request.mutant.original_value
+        return f"Type: {mutant_type}. Default value: {repr(default_value)}"
+
     def add_error(self, error):
         """ Add an error to the current case """
         self.errors.append(error)
@@ -53,52 +121,49 @@ class TestCase(object):
         Returns: True if the TestCase was run and data was transmitted (even if transmission was cut)
                  False if there was a connection issue and the target was paused, so the TestCase was not run
         """
-        # First step is to open the target
-        # TODO: Mechanism for not opening if want to keep an open connection between fuzzed packets
-        #  (e.g. CLI in Telnet Session)
+        # First step is to open the target. With Target.reuse_connection the connection of the previous test case is
+        # used if it is still alive
         try:
             self.logger.open_test_case(f"{self.id}: {self.name} {'[SENDING ORIGINAL]' if not fuzz else ''}",
                                        name=self.name, index=self.id)
-            self.logger.log_info(
-                f"Type: {type(self.request.mutant).__name__}. "
-                f"Default value: {repr(self.request.mutant.original_value)}. "
-                f"Case {self.id} of {self.session.num_mutations} overall.")
+            self.logger.log_info(f"{self.mutant_info}. Case {self.id} of {self.session.num_mutations} overall.")
 
             self.open_fuzzing_target(retry=retry)
 
+            payloads = self.payloads if fuzz else self.original_payloads
             fuzzed_sent = False
             for idx, edge in enumerate(self.path, start=1):  # Now we go through our path, sending each request
                 request = edge.dst
-                callback = edge.callback
+                payload = payloads[idx - 1] if payloads is not None else None
 
                 if request == self.request:
                     # This is the node we are fuzzing
                     if fuzz:
                         self.logger.open_test_step(f'Fuzzing node {request.name}')
                         callback_data = self._callback_current_node(node=request, edge=edge)
-                        self.transmit(request, callback_data=callback_data)
+                        self.transmit(request, callback_data=callback_data, payload=payload)
                         fuzzed_sent = True
                     else:
                         self.logger.open_test_step(f'Transmit node {request.name}')
                         callback_data = self._callback_current_node(node=request, edge=edge, original=True)
-                        self.transmit(request, callback_data=callback_data, original=True)
+                        self.transmit(request, callback_data=callback_data, original=True, payload=payload)
 
                 else:
                     # This is a node we are not fuzzing right now
                     self.logger.open_test_step(f'Transmit node {request.name}')
                     callback_data = self._callback_current_node(node=request, edge=edge, original=True)
-                    self.transmit(request, callback_data=callback_data, original=not fuzzed_sent)
+                    self.transmit(request, callback_data=callback_data, original=not fuzzed_sent, payload=payload)
 
                 if self.session.opts.new_connection_between_requests and len(self.path) > idx:  # Reopen connection
                     try:
-                        self.session.target.close()
+                        self.target.close()
                         self.open_fuzzing_target(retry=False)
                     except (exception.FuzzowskiTargetConnectionFailedError, Exception) as e:
                         self.add_error(e)
                         self.session.add_suspect(self)
                         raise exception.FuzzowskiTestCaseAborted(str(e))
 
-            self.session.target.close()
+            self.target.release()
             self.session.add_latest_test(self)
             return True
         except exception.FuzzowskiPaused:
@@ -120,7 +185,7 @@ class TestCase(object):
         Args:
             retry: Only retry, restart and wait for recover if retry is True
         """
-        target = self.session.target
+        target = self.target
 
         try:
             target.open()
@@ -131,9 +196,9 @@ class TestCase(object):
                     target.open()  # Second try, just in case we have a network error not caused by the fuzzer
                 except (exception.FuzzowskiTargetConnectionFailedError, Exception) as e:
                     self.logger.log_error("Cannot connect to target; target presumed down.")
-                    self.session.add_last_case_as_suspect(e)
+                    self.session.add_last_case_as_suspect(e, target)
                     # raise
-                    self.session.restart_target()  # Restart the target if a restarter was set
+                    self.session.restart_target(target)  # Restart the target if a restarter was set
                     recovered = self.wait_until_target_recovered()  # Wait for target to recover
                     if recovered:
                         # target.open()  # Open a new connection, as the last one will be closed
@@ -144,7 +209,8 @@ class TestCase(object):
             else:  # Do not retry, raise the exception
                 raise
 
-    def transmit(self, request: Request, callback_data: bytes = None, original: bool = False, receive=True):
+    def transmit(self, request: Request, callback_data: bytes = None, original: bool = False, receive=True,
+                 payload: List[bytes] = None):
         """
         Render and transmit a fuzzed node, process callbacks accordingly.
 
@@ -153,22 +219,26 @@ class TestCase(object):
             callback_data: callback data from a previous callback
             original: if True, will send the original value and not render
             receive: if True, it will try to receive data after sending the request
+            payload: segments to send instead of rendering the request (see render_payloads())
 
         Returns: None
         Raises: FuzzowskiTestCaseAborted when a transmission error occurs
         """
         if callback_data:
-            data = callback_data
+            segments = [callback_data]
+        elif payload is not None:
+            segments = payload
         else:
             if original:
-                data = request.original_value
+                segments = [request.original_value]
             else:
-                data = request.render()
+                # The rendered request is sent as a list of segments, so it is never joined
+                segments = request.compile().render_segments()
 
         # 1. SEND DATA
         try:
-            self.last_send = data
-            self.session.target.send(data)
+            self.last_send_segments, self._last_send = segments, None
+            self.target.send_segments(segments)
         except exception.FuzzowskiTargetConnectionReset as e:  # Connection was reset
             self.logger.log_info("Target connection reset.")
             condition = self.session.opts.ignore_transmission_errors if original \
@@ -194,7 +264,9 @@ class TestCase(object):
             try:
                 receive_failed = False
                 error = ''
-                self.last_recv = self.session.target.recv_all(DEFAULT_MAX_RECV)
+                self.last_recv = self.target.recv_all(DEFAULT_MAX_RECV,
+                                                      completions=request.reply_completions,
+                                                      request_name=request.name)
                 if not self.last_recv:  # Nothing received, probably conn reset
                     receive_failed = True
                     error = "Nothing received. Connection Reset?"
@@ -202,7 +274,8 @@ class TestCase(object):
                 elif len(request.responses) > 0:  # Data received, Responses defined
                     try:
                         self.logger.log_check("Parsing response with data received")
-                        response_str = request.parse_response(self.last_recv)
+                        with self.session.lock:  # Responses set variables shared by the test cases
+                            response_str = request.parse_response(self.last_recv)
                         self.logger.log_info(response_str)
                         receive_failed = False
                     except exception.FuzzowskiRuntimeError as e:  # Data received, Response do not match
@@ -277,12 +350,12 @@ class TestCase(object):
     def print_poc(self):
         """Prints the Test Case as PoC code that can be run standalone"""
         # TODO: Take all options, send the whole test case instead of parameters
-        helpers.print_poc(self.session.target, self.path,
+        helpers.print_poc(self.target, self.path,
                           self.session.opts.receive_data_after_each_request, self.session.opts.receive_data_after_fuzz)
 
     def get_poc(self):
         """Gets the code of the PoC of this Test Case that can be run standalone"""
-        exploit_code = helpers.get_exploit_code(self.session.target, self.path,
+        exploit_code = helpers.get_exploit_code(self.target, self.path,
                                                 self.session.opts.receive_data_after_each_request,
                                                 self.session.opts.receive_data_after_fuzz)
         return exploit_code
@@ -311,7 +384,7 @@ class TestCase(object):
         # if the edge has a callback, process it. the callback has the option to render the node, modify it and return.
         if edge.callback:
             self.logger.open_test_step('Callback function')
-            data = edge.callback(self.session.target, self.logger, session=self, node=node, edge=edge,
+            data = edge.callback(self.target, self.logger, session=self, node=node, edge=edge,
                                  original=original)
 
         return data
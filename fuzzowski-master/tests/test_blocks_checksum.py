@@ -1,10 +1,24 @@
 import pytest
 import os
 import hashlib
+import random
+import struct
+import zlib
 from fuzzowski.mutants.spike import *
+from fuzzowski.helpers import checksums, helpers
 import pytest
 
 
+def _ipv4_checksum_reference(msg):
+    # Word by word, as the previous helpers.ipv4_checksum
+    if len(msg) % 2 == 1:
+        msg += b"\x00"
+    total = 0
+    for i in range(0, len(msg), 2):
+        total = helpers._ones_complement_sum_carry_16(total, (msg[i] << 8) + msg[i + 1])
+    return ~total & 0xffff
+
+
 def test_md5_values():
     s_initialize('request_checksum_test')
     with s_block('block1'):
@@ -53,4 +67,74 @@ def test_checksum_reset():
 
 
 
+def test_checksum_kernels():
+    rng = random.Random(0)
+    messages = [b'', b'\x00', b'\x00\x00', b'\xff\xff', b'\x01', b'\xff\xff\x00\x00\xff', b'\xff' * 9]
+    messages += [bytes(rng.getrandbits(8) for _ in range(rng.randrange(200))) for _ in range(200)]
+    for msg in messages:
+        assert checksums.internet_checksum(msg) == helpers.ipv4_checksum(msg) == _ipv4_checksum_reference(msg)
+        assert checksums.internet_checksum(memoryview(msg)) == _ipv4_checksum_reference(msg)
+    assert helpers.crc16(b'123456789') == helpers.crc16('123456789') == 0xbb3d  # CRC-16/ARC check value
+    assert helpers.udp_checksum(b'\x12\x34\x00', b'\x7f\x00\x00\x01', b'\x7f\x00\x00\x01') == \
+        _ipv4_checksum_reference(b'\x7f\x00\x00\x01\x7f\x00\x00\x01\x00\x11\x00\x03\x12\x34\x00')
+
+    a, b = b'hello ', b'world!!'
+    assert checksums.crc32_combine(zlib.crc32(a), zlib.crc32(b), len(b)) == zlib.crc32(a + b)
+    assert checksums.adler32_combine(zlib.adler32(a), zlib.adler32(b), len(b)) == zlib.adler32(a + b)
+
+
+@pytest.mark.parametrize('algorithm, reference', [
+    ('crc32', zlib.crc32),
+    ('adler32', zlib.adler32),
+    ('ones_complement', lambda data: ~_ipv4_checksum_reference(data) & 0xffff),
+])
+def test_segmented_checksum(algorithm, reference):
+    rng = random.Random(algorithm)
+    segmented = checksums.SegmentedChecksum(algorithm)
+    segments = [bytes(rng.getrandbits(8) for _ in range(rng.randrange(8))) for _ in range(12)]
+    assert segmented(segments) == reference(b''.join(segments))
+    for _ in range(300):
+        segments = list(segments)
+        if rng.random() < 0.05:
+            segments.append(b'\xff')  # a different number of segments
+        for position in rng.sample(range(len(segments)), rng.choice((1, 1, 1, 2))):
+            segments[position] = bytes(rng.getrandbits(8) for _ in range(rng.randrange(8)))
+        assert segmented(segments) == reference(b''.join(segments))
+    assert segmented(segments) == reference(b''.join(segments))
+
+
+@pytest.mark.parametrize('algorithm', ['crc32', 'adler32', 'ipv4', 'udp'])
+def test_checksum_incremental(algorithm):
+    s_initialize(f'request_checksum_{algorithm}')
+    s_static(b'\x0a\x00\x00\x01', name='src')
+    s_static(b'\x0a\x00\x00\x02', name='dst')
+    with s_block('data'):
+        s_string(b'hola', name='str1')
+        s_static(b'=' * 301)
+        s_byte(0x41, name='byte1')
+        s_static(b'-' * 100)
+    s_checksum('data', algorithm=algorithm, endian='>', name='checksum', fuzzable=False,
+               ipv4_src_block_name='src' if algorithm == 'udp' else None,
+               ipv4_dst_block_name='dst' if algorithm == 'udp' else None)
+    request = s_get(f'request_checksum_{algorithm}')
+    checksum = request.names['checksum']
+    plan = request.compile()
+
+    def expected():
+        data = request.names['data'].render()
+        if algorithm == 'crc32':
+            return struct.pack('>L', zlib.crc32(data))
+        elif algorithm == 'adler32':
+            return struct.pack('>L', zlib.adler32(data))
+        elif algorithm == 'ipv4':
+            return struct.pack('>H', helpers.ipv4_checksum(data))
+        return struct.pack('>H', helpers.udp_checksum(data, b'\x0a\x00\x00\x01', b'\x0a\x00\x00\x02'))
+
+    for _ in range(request.num_mutations):
+        next(request)
+        assert checksum.render() == expected()
+        assert plan.render() == request.render()
+        assert plan.render()[-len(checksum):] == expected()
+
+
 # TODO: Only tested md5, should test others!
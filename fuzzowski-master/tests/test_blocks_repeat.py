@@ -116,3 +116,75 @@ def test_repeat_variable_include_spike():
 
     request.goto(7)
     assert next(request) == dword.render() + b'x' * 7 == request.render()
+
+
+def test_repeat_lazy(monkeypatch):
+    s_initialize('request_repeat_lazy')
+    s_size('big_repeat', length=4, fuzzable=False)
+    with s_block('big'):
+        s_static(b'A' * 1000)
+    s_repeat('big', min_reps=0, max_reps=5000, step=1000, name='big_repeat')
+
+    request = s_get('request_repeat_lazy')
+    repeat = request.names['big_repeat']
+    plan = request.compile()
+    request.goto(request.num_mutations)
+    assert repeat._repetitions == 5000
+
+    # Neither the length nor the segments build the repetitions, they are a descriptor of the rendered block
+    from fuzzowski.mutants.mutation_library import RepeatedSequence, join_segments
+
+    def build(self):
+        raise AssertionError('repetitions built')
+    monkeypatch.setattr(RepeatedSequence, 'build', build)
+    assert len(repeat) == 5000 * 1000
+    segments = plan.render_segments()
+    assert len(segments) == 3
+    assert segments[0] == (1000 * 5000).to_bytes(4, 'little')
+    assert segments[2] == RepeatedSequence(segments[1], 5000)
+    monkeypatch.undo()
+
+    rendered = request.render()
+    assert rendered == join_segments(segments) == segments[0] + b'A' * 1000 * 5001
+    assert repeat.render() is repeat.render()  # The repetitions are reused while nothing changes
+
+
+def test_repeat_lazy_send(monkeypatch):
+    import socket
+    import threading
+    from fuzzowski import SocketConnection, Target
+    from fuzzowski.loggers import FuzzLoggerBuffer
+    from fuzzowski.mutants.mutation_library import RepeatedSequence, CHUNK_SIZE
+
+    s_initialize('request_repeat_lazy_send')
+    s_size('big_repeat', length=4, fuzzable=False)
+    with s_block('big'):
+        s_static(b'AB')
+    s_repeat('big', min_reps=0, max_reps=1000000, step=1000000, name='big_repeat')
+    request = s_get('request_repeat_lazy_send')
+    request.goto(request.num_mutations)
+
+    def build(self):
+        raise AssertionError('repetitions built')
+    monkeypatch.setattr(RepeatedSequence, 'build', build)
+
+    # The plan and the send path (log, sendmsg) only use chunks of one buffer of repetitions
+    connection = SocketConnection('127.0.0.1', 1337, proto='tcp')
+    connection._sock, peer = socket.socketpair()
+    received = []
+
+    def receive():
+        while sum(map(len, received)) < 4 + 2 * 1000001:
+            received.append(peer.recv(1 << 20))
+    reader = threading.Thread(target=receive, daemon=True)
+    reader.start()
+    target = Target(connection)
+    target.set_fuzz_data_logger(FuzzLoggerBuffer())
+    try:
+        target.send_segments(request.compile().render_segments())
+        reader.join(10)
+        assert b''.join(received) == (2 * 1000000).to_bytes(4, 'little') + b'AB' * 1000001
+        assert max(map(len, RepeatedSequence(b'AB', 1000000).chunks())) <= CHUNK_SIZE
+    finally:
+        connection.close()
+        peer.close()
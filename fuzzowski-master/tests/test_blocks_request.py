@@ -1,6 +1,11 @@
 from fuzzowski import constants
 from fuzzowski.mutants.spike import *
+from fuzzowski.mutants.covering_array import CoveringArray
+from fuzzowski.mutants.mutation_library import join_segments
+import functools
 import hashlib
+import itertools
+import operator
 import pytest
 
 
@@ -161,4 +166,277 @@ def test_request_movements():
                 assert item.mutant_index != 0
 
     for item in request.stack:
-        assert item.mutant_index == 0
\ No newline at end of file
+        assert item.mutant_index == 0
+
+def test_request_goto_random_access():
+    s_initialize('request_test_goto_random')
+    with s_block('b0'):
+        with s_block('b1'):
+            s_string(b'str1', name='str1')
+            s_static(b' ')
+        s_checksum('b1', algorithm='md5', output_format='hex', name='md5_b1')
+        s_delim(b':')
+    s_size('b0', inclusive=True, output_format='binary', length=4, endian=constants.BIG_ENDIAN)
+    s_byte(b'\xff')
+    s_repeat('b0', min_reps=0, max_reps=2)
+
+    request = s_get('request_test_goto_random')
+    original = request.render()
+    sequential = [(mutation, request.mutant.name) for mutation in request]
+    assert len(sequential) == request.num_mutations
+
+    # goto(i) must leave the request in the same state as i calls to next()
+    # Check every child boundary plus a sample of the rest, in reverse order
+    indexes = set(range(1, request.num_mutations + 1, 97)) | {1, request.num_mutations}
+    for position in range(1, len(sequential)):
+        if sequential[position][1] != sequential[position - 1][1]:
+            indexes |= {position, position + 1}
+    for i in sorted(indexes, reverse=True):
+        request.goto(i)
+        assert request.mutant_index == i
+        assert (request.render(), request.mutant.name) == sequential[i - 1]
+        assert [x for x in request.mutation_generator(None)] == [x for x, _ in sequential[i:]]
+        assert request.mutant is None
+        assert request.render() == original
+
+
+def test_request_render_cache():
+    s_initialize('request_test_render_cache')
+    with s_block('b0'):
+        with s_block('b1', encoder=lambda data: data.upper()):
+            s_string(b'str1', name='str1', mutation_types=('instance', 'misc'))
+            s_static(b' ')
+            s_size('b0', output_format='ascii', length=4, name='size_b0_inner')
+        s_checksum('b1', algorithm='crc32', name='crc_b1')
+        s_delim(b':')
+        s_group(b'A', [b'A', b'BB', b'CCC'], name='group1')
+    s_size('b0', inclusive=True, output_format='binary', length=4, endian=constants.BIG_ENDIAN)
+    s_byte(b'\xff')
+    s_variable('var_render_cache', b'NOTSET')
+    s_repeat('b1', min_reps=0, max_reps=2)
+
+    request = s_get('request_test_render_cache')
+    blocks_with_cache = [request] + [m for m in request.names.values() if isinstance(m, blocks.Block)]
+
+    def cold_render():
+        # Render again discarding every cache, it must match the incremental render
+        for block in blocks_with_cache:
+            block._chunks = None
+        return request.render()
+
+    original = request.render()
+    assert original == cold_render()
+    for mutation in request:
+        assert mutation == request.render() == cold_render()
+
+    request.goto(7)
+    assert request.render() == cold_render()
+    request.names['group1']._value = b'DDDD'
+    assert request.render() == cold_render()
+    request.variables['var_render_cache'] = b'SET'
+    assert request.render().endswith(b'SET')
+    del request.variables['var_render_cache']
+    request.reset()
+    assert request.render() == cold_render() == original
+
+
+def test_request_compile():
+    s_initialize('request_test_compile')
+    with s_block('b0'):
+        s_size('b0', inclusive=True, length=2, name='size_b0_inner')
+        with s_block('b1'):
+            s_string(b'str1', name='str1', mutation_types=('instance', 'misc'))
+            s_checksum('b1', algorithm='crc32', name='crc_b1_inner')
+        s_checksum('b0', algorithm='md5', output_format='hex', name='md5_b0')
+        with s_block('b2', encoder=lambda data: data[::-1]):
+            s_size('b1', output_format='ascii', name='size_b1_ascii')
+            s_delim(b':')
+        s_size('b2', length=1, name='size_b2')
+    s_checksum('b1', algorithm='adler32', name='adler_b1')
+    s_size('b0', length=4, endian=constants.BIG_ENDIAN, name='size_b0')
+    s_size('b0', output_format='ascii', name='size_b0_ascii')
+    s_variable('var_compile', b'NOTSET')
+    s_repeat('b1', min_reps=0, max_reps=2)
+
+    request = s_get('request_test_compile')
+    plan = request.compile()
+    assert plan.compiled
+    assert request.compile() is plan
+    assert plan._kinds.count(plan.SIZE) == 3 and plan._kinds.count(plan.LATE_SIZE) == 1
+    assert plan.render() == request.render()
+    for mutation in request:
+        assert plan.render() == join_segments(plan.render_segments()) == mutation
+
+    request.variables['var_compile'] = b'SET'
+    assert plan.render() == request.render()
+    del request.variables['var_compile']
+
+
+def test_request_compile_checksum_loop():
+    s_initialize('request_test_compile_loop')
+    with s_block('b0'):
+        s_static(b'0')
+        s_checksum('b1', algorithm='crc32', name='crc_b1')
+    with s_block('b1'):
+        s_static(b'1')
+        s_checksum('b0', algorithm='crc32', name='crc_b0')
+
+    request = s_get('request_test_compile_loop')
+    plan = request.compile()
+    assert not plan.compiled
+    assert plan.render() == request.render()
+
+
+def test_request_step_generator(monkeypatch):
+    s_initialize('request_test_steps')
+    with s_block('b0'):
+        s_string(b'str1', name='str1_steps')
+        s_delim(b':')
+    s_size('b0', length=2)
+    s_byte(b'\xff')
+
+    request = s_get('request_test_steps')
+    sequential = list(request)
+
+    renders = []
+    original_render = blocks.Block.render
+    monkeypatch.setattr(blocks.Block, 'render', lambda self, *args, **kwargs: renders.append(self))
+    assert list(request.step_generator()) == list(range(1, request.num_mutations + 1))
+    assert request.mutant is None and request.mutant_index == 0
+    steps = request.step_generator()
+    for _ in range(20):
+        next(steps)
+    assert renders == []  # Stepping must not render anything
+
+    monkeypatch.setattr(blocks.Block, 'render', original_render)
+    assert request.render() == sequential[19]
+    assert next(steps) == 21 and request.render() == sequential[20]
+    assert next(request.mutation_generator(None)) == sequential[21]
+
+
+def test_request_group():
+    s_initialize('request_test_group')
+    s_group(b'\x01', [b'\x01', b'\x03', b'\x10'], name='function_code')
+    with s_block('pdu', group='function_code'):
+        s_mutant(b'A', name='mutant_group1', mutations=[b'B', b'C'])
+        s_static(b':')
+        s_mutant(b'W', name='mutant_group2', mutations=[b'X'])
+    s_byte(b'\xff', fuzzable=False)
+
+    request = s_get('request_test_group')
+    pdu = request.names['pdu']
+    assert pdu.num_mutations == 3 * 3
+    assert request.num_mutations == 3 + 9
+
+    sequential = [mutation for mutation in request]
+    assert sequential == [b'\x01A:W\xff', b'\x03A:W\xff', b'\x10A:W\xff',
+                          b'\x01B:W\xff', b'\x01C:W\xff', b'\x01A:X\xff',
+                          b'\x03B:W\xff', b'\x03C:W\xff', b'\x03A:X\xff',
+                          b'\x10B:W\xff', b'\x10C:W\xff', b'\x10A:X\xff']
+    assert request.render() == b'\x01A:W\xff'
+
+    plan = request.compile()
+    for i in reversed(range(1, request.num_mutations + 1)):
+        request.goto(i)
+        assert request.render() == plan.render() == sequential[i - 1]
+        assert [x for x in request.mutation_generator(None)] == sequential[i:]
+        assert request.render() == b'\x01A:W\xff'
+
+    runs = request.mutation_runs()
+    assert [(mutant.name, start, length) for mutant, start, length in runs] == [
+        ('function_code', 0, 3), ('mutant_group1', 3, 2), ('mutant_group2', 5, 1),
+        ('mutant_group1', 6, 2), ('mutant_group2', 8, 1), ('mutant_group1', 9, 2), ('mutant_group2', 11, 1)]
+    for mutant, start, length in runs:
+        for mutant_index in range(start + 1, start + length + 1):
+            request.goto(mutant_index)
+            assert request.mutant is mutant
+
+
+@pytest.mark.parametrize('levels, strength', [
+    ([5], 2), ([3, 3], 2), ([7, 2, 5, 3, 4, 2], 2), ([2] * 9, 2), ([6, 5, 1, 3], 3), ([3] * 6, 3), ([4, 2, 3], 1)
+])
+def test_covering_array(levels, strength):
+    array = CoveringArray(levels, strength)
+    rows = list(array)
+    assert len(rows) <= functools.reduce(operator.mul, levels, 1)
+    for factors in itertools.combinations(range(len(levels)), min(strength, len(levels))):
+        covered = {tuple(row[factor] for factor in factors) for row in rows}
+        assert covered == set(itertools.product(*(range(levels[factor]) for factor in factors)))
+    assert array[len(array) - 1] == array[-1] == rows[-1]
+    with pytest.raises(IndexError):
+        array[len(array)]
+
+
+def test_request_combine():
+    s_initialize('request_test_combine')
+    s_mutant(b'A', name='combine1', mutations=[b'B', b'C', b'D'])
+    s_static(b':')
+    with s_block('combine_b0'):
+        s_mutant(b'1', name='combine2', mutations=[b'2', b'3'])
+        s_mutant(b'x', name='combine3', mutations=[b'y'])
+    s_mutant(b'-', name='combine4', mutations=[b'+', b'*'])
+
+    request = s_get('request_test_combine')
+    single = [mutation for mutation in request]
+    assert request.combinations is None
+
+    request.combine(2)
+    assert len(request.combinations) == request.num_mutations < 4 * 3 * 2 * 3
+    sequential = [(mutation, request.mutant.name) for mutation in request]
+    assert len(sequential) == request.num_mutations
+
+    # Every pair of values (original or mutations) of any two mutants is in some test case
+    values = [[b'A', b'B', b'C', b'D'], [b'1', b'2', b'3'], [b'x', b'y'], [b'-', b'+', b'*']]
+    rendered = [(m[0:1], m[2:3], m[3:4], m[4:5]) for m, _ in sequential]
+    for first in range(4):
+        for second in range(first + 1, 4):
+            pairs = {(r[first], r[second]) for r in rendered}
+            assert len(pairs) == len(values[first]) * len(values[second])
+
+    plan = request.compile()
+    for i in reversed(range(1, request.num_mutations + 1)):
+        request.goto(i)
+        assert request.mutant_index == i
+        assert (request.render(), request.mutant.name) == sequential[i - 1]
+        assert plan.render() == sequential[i - 1][0]
+        assert [x for x in request.mutation_generator(None)] == [x for x, _ in sequential[i:]]
+        assert request.render() == b'A:1x-'
+    assert request.mutation_offset(request.names['combine3']) == 0
+
+    # Only some mutants
+    request.combine(2, ['combine1', 'combine4'])
+    assert request.num_mutations == 4 * 3
+    assert {m[0:1] + m[4:5] for m in request} == {a + b for a in values[0] for b in values[3]}
+    assert request.mutation_offset(request.names['combine2']) is None
+    with pytest.raises(FuzzowskiRuntimeError):
+        request.combine(2, ['combine1', 'notexist'])
+
+    request.combine(0)
+    assert request.combinations is None
+    assert [mutation for mutation in request] == single
+
+
+def test_request_cached_num_mutations():
+    s_initialize('request_test_cached_count')
+    s_mutant(b'A', name='mutant1', mutations=[b'B', b'C'])
+    with s_block('block1'):
+        s_string('str', name='string1', mutation_types=('instance',))
+    request = s_get('request_test_cached_count')
+    block1 = request.names['block1']
+    string1 = request.names['string1']
+    assert request.num_mutations == 2 + 18 and request.num_enabled_mutations == 20
+
+    # Pushing items, changing the mutation types and disabling mutants invalidate the counts of the blocks above
+    generation = request._count_generation
+    string1.mutation_types = ['instance', 'format']
+    assert request._count_generation > generation
+    assert block1.num_mutations == 24 and request.num_mutations == 26
+    s_switch('request_test_cached_count')
+    s_mutant(b'W', name='mutant2', mutations=[b'X'])
+    assert request.num_mutations == 27
+    string1.disabled = True
+    assert request.num_mutations == 27 and request.num_enabled_mutations == 3
+    string1.disabled = False
+    assert request.num_enabled_mutations == 27
+    request.goto(27)
+    assert request.mutant.name == 'mutant2'
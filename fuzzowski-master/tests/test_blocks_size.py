@@ -120,5 +120,23 @@ def test_size_blocks(test_string, length, output_format, endian, inclusive, muta
     assert test_string.render() + static1.render() + size.render() == req_value
 
 
+def test_sizes_non_ascii(tmpdir):
+    """Sizes count the bytes of the encoded value, not the characters of a str mutation"""
+    tmpfile = os.path.join(tmpdir, 'string_mutations.txt')
+    with open(tmpfile, 'w', encoding='utf-8') as f:
+        f.write('ñandú\n')
+    string = String('Test', name='test_string', filename=tmpfile, mutation_types=('file',))
+    request = Request('test_request')
+    size = Size(string.name, request, length=2, output_format='binary', endian='>', fuzzable=False)
+    request.push(string)
+    request.push(size)
+    plan = request.compile()
+
+    mutation = next(request.mutation_generator(0))
+    assert string.render() == 'ñandú'.encode('utf-8')
+    assert _word_to_int(size.render(), '>') == len(string.render()) == 7
+    assert plan.render() == b''.join(plan.render_segments()) == mutation
+
+
 def _word_to_int(word: bytes, endian: chr) -> int:
     return struct.unpack(endian + "H", word)[0]
@@ -116,3 +116,75 @@ def test_dword(value, rendered):
 ])
 def test_qword(value, rendered):
     assert QWord(value).render() == QWord(value).original_value == rendered
+
+
+def test_bit_field_boundaries():
+    b = BitField(30, width=8)
+    assert list(b._mutations) == list(dict.fromkeys(
+        case for integer in (0, 128, 85, 64, 32, 16, 8, 256) for case in range(integer - 10, integer + 10)
+        if 0 <= case < 256))
+    assert b.num_mutations == len(set(b._mutations))
+    b.add_integer_boundaries(200)
+    assert b.num_mutations == len(set(b._mutations)) and b._mutations[-1] == 209
+
+
+@pytest.mark.parametrize("field, max_num", [
+    (Word(0, full_range=True), 2 ** 16),
+    (DWord(0, full_range=True), 2 ** 32),
+    (BitField(0, width=16, full_range=True, mutations=[0xffff, 0x1234]), 2 ** 16 + 2),
+])
+def test_bit_field_full_range(field, max_num):
+    # The whole range is never built, indexes and length are computed
+    assert field.num_mutations == max_num
+    field.goto(max_num)
+    assert field.render() == b'\xff' * (field.width // 8)
+    field.goto(max_num - 0x1233)
+    assert field._value == 2 ** field.width - 0x1234
+
+
+def test_bit_field_full_range_qword():
+    q = QWord(0, full_range=True)
+    assert q.num_mutations > 2 ** 62
+    q.goto(2 ** 40 + 1)
+    assert q.render() == b'\x00\x00\x00\x00\x00\x01\x00\x00'
+
+
+def test_bit_field_range_mutations():
+    b = DWord(0, mutations=range(0x1000, 0x100000000, 0x1000))
+    assert b.num_mutations == 0xfffff
+    assert next(b) == b'\x00\x10\x00\x00'
+    b.goto(b.num_mutations)
+    assert b.render() == b'\x00\xf0\xff\xff'
+
+
+@pytest.mark.parametrize("value, output_format, width, endian, signed, rendered", [
+    (0x1234, 'binary', 12, LITTLE_ENDIAN, False, b'\x34\x02'),
+    (0x1234, 'binary', 12, BIG_ENDIAN, False, b'\x02\x34'),
+    (-1, 'binary', 16, BIG_ENDIAN, False, b'\xff\xff'),
+    (0x1ff, 'binary', 8, BIG_ENDIAN, False, b'\xff'),
+    (0xff, 'ascii', 8, BIG_ENDIAN, True, b'-1'),
+    (0x80, 'ascii', 8, BIG_ENDIAN, True, b'-128'),
+    (0x7f, 'ascii', 8, BIG_ENDIAN, True, b'127'),
+    (0xff, 'ascii', 8, BIG_ENDIAN, False, b'255'),
+])
+def test_render_int(value, output_format, width, endian, signed, rendered):
+    assert BitField.render_int(value, output_format, width, endian, signed) == rendered
+    assert BitField.render_ints([value, value], output_format, width, endian, signed) == [rendered, rendered]
+
+
+def test_bit_field_render_mutations():
+    b = Word(0x1234, endian=BIG_ENDIAN)
+    expected = [x for x in b]
+    assert b.render_mutations() == expected
+    assert b.render_mutations(5, 10) == expected[5:10]
+    assert b.render() == b'\x12\x34'
+
+
+def test_bit_field_shared_boundaries():
+    b1, b2 = Byte(1), Byte(2)
+    assert b1._mutations is b2._mutations
+    expected = list(b2._mutations)
+    b1.add_integer_boundaries(200)
+    assert b1._mutations is not b2._mutations
+    assert list(b2._mutations) == list(Byte(3)._mutations) == expected
+    assert list(b1._mutations) == expected + list(range(190, 210))
@@ -24,3 +24,12 @@ def test_delim1(test_delim):
     assert len(test_delim._mutations) == len(all_mutations)
 
     assert b':' * 100 in all_mutations
+
+
+def test_delim_shared_mutations():
+    delims = [Delim(b':', name='shared_delim1'), Delim(':', name='shared_delim2'), Delim(b',', name='shared_delim3')]
+    assert delims[0]._mutations is delims[1]._mutations
+    assert delims[0]._mutations[-1] is delims[2]._mutations[-1]  # substitutions are shared by every Delim
+    assert all(isinstance(mutation, bytes) for mutation in delims[2]._mutations)
+    assert [x for x in delims[1]] == [x for x in delims[0]]
+    assert delims[2]._mutations[0] == b',,'
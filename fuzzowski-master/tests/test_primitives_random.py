@@ -32,3 +32,27 @@ def test_random_reset(test_random):
         pass
     assert test_random.render() == test_random.original_value == b'Test'
 
+
+
+def test_random_deterministic():
+    r1 = RandomData(b'Test', name='random_det', min_length=1, max_length=100, max_mutations=50)
+    r2 = RandomData(b'Test', name='random_det', min_length=1, max_length=100, max_mutations=50)
+    mutations = [x for x in r1]
+    assert mutations == [x for x in r2]
+    assert all(1 <= len(x) <= 100 for x in mutations)
+    assert len(set(mutations)) == 50
+
+    # Any mutation can be reached directly, in any order
+    for i in (37, 2, 50):
+        r2.goto(i)
+        assert r2.render() == mutations[i - 1]
+
+    # Other seeds give other data
+    r3 = RandomData(b'Test', name='random_det', min_length=1, max_length=100, max_mutations=50, seed=1234)
+    assert [x for x in r3] != mutations
+
+
+def test_random_step():
+    r = RandomData(b'Test', name='random_step', min_length=0, max_length=10, step=5)
+    assert r.num_mutations == 3
+    assert [len(x) for x in r] == [0, 5, 10]
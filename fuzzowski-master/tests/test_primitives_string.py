@@ -3,6 +3,7 @@ import os
 
 from fuzzowski import FuzzowskiRuntimeError
 from fuzzowski.mutants.primitives.string import String
+from fuzzowski.mutants.mutation_library import MutationLibrary, RepeatedSequence
 
 @pytest.fixture
 def test_string():
@@ -74,3 +75,32 @@ def test_string_mutation_types(test_string):
     with pytest.raises(FuzzowskiRuntimeError):
         mutations += 'thisdoesnotexist'
         s.mutation_types = mutations
+
+
+def test_string_lazy_mutations():
+    s1 = String('Test')
+    s2 = String('Other')
+
+    # Generic mutations are shared across instances and long strings are only built when reached
+    assert s1._get_generic_library(s1.mutation_types) is s2._get_generic_library(s2.mutation_types)
+    assert all(isinstance(m, RepeatedSequence) for m in String._generic_long_mutations[:-7])
+
+    assert s1._mutations[0] == b'Test' * 2
+    assert s1._mutations[8] == (b'Test' * 50000)[:65535]
+    assert s1._mutations[17] == (b'Test' * 50000)[:65535] + b'\xfe'
+    assert s1._mutations[-1] == String._generic_misc_mutations[-1]
+    assert list(s1._mutations[:3]) == [s1._mutations[0], s1._mutations[1], s1._mutations[2]]
+    assert len(list(s1._mutations)) == len(s1._mutations) == s1.num_mutations
+
+    s1.goto(9)
+    assert s1.render() == (b'Test' * 50000)[:65535]
+
+
+def test_mutation_library():
+    library = MutationLibrary([1, 2], [], MutationLibrary([3], [RepeatedSequence('ab', 3, max_len=5, suffix='!')]))
+    assert len(library) == 4
+    assert list(library) == [1, 2, 3, 'ababa!'] == [library[i] for i in range(4)]
+    assert library[-1] == 'ababa!'
+    assert len(RepeatedSequence('ab', 3, max_len=5, suffix='!')) == 6
+    with pytest.raises(IndexError):
+        library[4]
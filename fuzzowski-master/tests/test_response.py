@@ -58,3 +58,15 @@ def test_response():
     with pytest.raises(FuzzowskiRuntimeError):
         s_response(RegexResponse, name='wrong_declared_response', required_vars=['error'], optional_vars=[],
                    regex_list=[b'error=(?P<error>[a-zA-Z0-9]*)', b'notdeclared=(?P<notdeclared>[a-zA-Z0-9]*)'])
+
+
+def test_response_completions():
+    s_initialize('testreqcompletion1')
+    s_mutant(b'A', name='mutant31', mutations=[b'B'])
+    request = s_get('testreqcompletion1')
+    assert request.reply_completions is None  # The completions of the Target are used
+
+    s_response(HTTPJsonResponse, name='response_json', required_vars=[], optional_vars=[])
+    assert request.reply_completions == [HTTPJsonResponse.completion]
+    s_completion(Delimiter, b'\r\n\r\n')
+    assert [type(completion) for completion in request.reply_completions] == [Delimiter, ContentLength]
@@ -0,0 +1,204 @@
+from fuzzowski.mutants.spike import *
+from fuzzowski.mutants import blocks
+from fuzzowski.schedulers import FeistelPermutation, PermutationScheduler, RoundRobinScheduler, SampleScheduler
+from fuzzowski.schedulers.sample_scheduler import _apportion
+from fuzzowski.session import Session
+import pytest
+
+
+@pytest.mark.parametrize('length', [0, 1, 2, 3, 17, 64, 1000, 4097])
+def test_feistel_permutation(length):
+    permutation = FeistelPermutation(length, seed=1234)
+    values = [permutation[i] for i in range(length)]
+    assert sorted(values) == list(range(length))
+    assert all(permutation.index(value) == i for i, value in enumerate(values))
+    assert values == [FeistelPermutation(length, seed=1234)[i] for i in range(length)]  # Stable
+    with pytest.raises(IndexError):
+        permutation[length]
+
+
+def test_feistel_permutation_seed():
+    assert list(FeistelPermutation(1000, seed=1)) != list(FeistelPermutation(1000, seed=2))
+    assert list(FeistelPermutation(1000, seed=1)) != list(range(1000))
+    assert FeistelPermutation(10 ** 15, seed=1)[10 ** 14] < 10 ** 15
+
+
+def test_session_permutation_scheduler():
+    s_initialize('permutation_request1')
+    s_mutant(b'A', name='mutant11', mutations=[b'B', b'C', b'D'])
+    s_mutant(b'W', name='mutant12', mutations=[b'X', b'Y', b'Z'])
+    s_initialize('permutation_request2')
+    s_mutant(b'1', name='mutant21', mutations=[b'2', b'3'])
+
+    session = Session()
+    session.connect(s_get('permutation_request1'))
+    session.connect(s_get('permutation_request1'), s_get('permutation_request2'))
+    session.goto(1)
+    sequential = {session.test_case.id: session.test_case.request.render()}
+    while session.next() is not None and session.test_case.id != 1:
+        sequential[session.test_case.id] = session.test_case.request.render()
+
+    scheduler = PermutationScheduler(3)
+    session = Session(scheduler=scheduler)
+    session.connect(s_get('permutation_request1'))
+    session.connect(s_get('permutation_request1'), s_get('permutation_request2'))
+    # The requests of the path that are not fuzzed keep their original value
+    scheduled = [(test_case.id, test_case.request.render(),
+                  [edge.dst.render() for edge in test_case.path if edge.dst is not test_case.request])
+                 for test_case in session.scheduled_test_case_iterator()]
+    ids = [test_case_id for test_case_id, _, _ in scheduled]
+    assert sorted(ids) == list(range(1, session.num_mutations + 1)) and ids != sorted(ids)
+    assert all(rendered == sequential[test_case_id] for test_case_id, rendered, _ in scheduled)
+    assert all(other in (b'AW', b'1') for _, _, others in scheduled for other in others)
+
+    # Resume after a goto, and from a saved state
+    session.goto(ids[3])
+    assert session.schedule_position == 4
+    assert session.next().id == ids[4]
+    state = session.save_session_state()
+    session = Session(scheduler=PermutationScheduler(3))
+    session.connect(s_get('permutation_request1'))
+    session.connect(s_get('permutation_request1'), s_get('permutation_request2'))
+    session.load_session_state(state)
+    assert session.test_case.id == ids[4]
+    assert [session.next().id for _ in range(len(ids) - 5)] == ids[5:]
+    assert session.next().id == ids[0]  # Back to the start of the schedule
+
+
+def _round_robin_session(scheduler):
+    if 'round_robin_request1' not in blocks.REQUESTS:
+        s_initialize('round_robin_request1')
+        s_mutant(b'A', name='mutant11', mutations=[b'B', b'C', b'D'])
+        with s_block('round_robin_block'):
+            s_mutant(b'W', name='mutant12', mutations=[b'X', b'Y', b'Z', b'V', b'U'])
+        s_initialize('round_robin_request2')
+        s_mutant(b'1', name='mutant21', mutations=[b'2', b'3'])
+    session = Session(scheduler=scheduler)
+    session.connect(s_get('round_robin_request1'))
+    session.connect(s_get('round_robin_request1'), s_get('round_robin_request2'))
+    return session
+
+
+def _mutants(session):
+    return [f'{test_case.request.name}.{test_case.request.mutant.name}:{test_case.request.mutant.mutant_index}'
+            for test_case in session.scheduled_test_case_iterator()]
+
+
+def test_round_robin_scheduler():
+    session = _round_robin_session(RoundRobinScheduler())
+    assert _mutants(session) == [
+        'round_robin_request1.mutant11:1', 'round_robin_request1.mutant12:1', 'round_robin_request2.mutant21:1',
+        'round_robin_request1.mutant11:2', 'round_robin_request1.mutant12:2', 'round_robin_request2.mutant21:2',
+        'round_robin_request1.mutant11:3', 'round_robin_request1.mutant12:3',
+        'round_robin_request1.mutant12:4',
+        'round_robin_request1.mutant12:5']
+    scheduler = session.scheduler
+    ids = [scheduler.test_case_id(position) for position in range(len(scheduler))]
+    assert sorted(ids) == list(range(1, session.num_mutations + 1))
+    assert all(scheduler.position_of(test_case_id) == position for position, test_case_id in enumerate(ids))
+
+
+def test_round_robin_scheduler_weights():
+    session = _round_robin_session(RoundRobinScheduler('round_robin_request1.mutant12=2', 'round_robin_request1=0',
+                                                       'round_robin_request2=3'))
+    assert _mutants(session) == [
+        'round_robin_request1.mutant12:1', 'round_robin_request1.mutant12:2',
+        'round_robin_request2.mutant21:1', 'round_robin_request2.mutant21:2',
+        'round_robin_request1.mutant12:3', 'round_robin_request1.mutant12:4',
+        'round_robin_request1.mutant12:5']
+    assert session.scheduler.position_of(1) is None  # mutant11 is excluded
+    with pytest.raises(FuzzowskiRuntimeError):
+        RoundRobinScheduler('String')
+
+
+@pytest.mark.parametrize('weights', [(), ('Mutant=3', 'round_robin_request1.mutant11=1'), ('Mutant=7',)])
+def test_round_robin_scheduler_positions(weights):
+    session = _round_robin_session(RoundRobinScheduler(*weights))
+    scheduler = session.scheduler
+    scheduler.schedule(session)
+    ids = [scheduler.test_case_id(position) for position in range(len(scheduler))]
+    assert sorted(ids) == list(range(1, session.num_mutations + 1))
+    assert [scheduler.position_of(test_case_id) for test_case_id in ids] == list(range(len(ids)))
+
+
+def test_round_robin_scheduler_disabled():
+    session = _round_robin_session(RoundRobinScheduler())
+    session.disable_by_path_name('round_robin_request1.mutant12')
+    ids = [test_case.id for test_case in session.scheduled_test_case_iterator()]
+    assert ids == [1, 9, 2, 10, 3] and session.scheduler.position_of(4) is None
+    ids = [session.next().id for _ in range(3)]
+
+    # Resume from a saved state, the disabled mutant is left out before the position is restored
+    state = session.save_session_state()
+    session = _round_robin_session(RoundRobinScheduler())
+    session.load_session_state(state)
+    assert session.test_case.id == ids[-1]
+    assert session.test_case.request.mutant.name != 'mutant12'
+    assert session.schedule_position == 3
+    session.disable_by_path_name('round_robin_request1.mutant12', disable=False)
+
+
+@pytest.mark.parametrize('total, weights, caps, shares', [
+    (10, [1, 1], [100, 100], [5, 5]),
+    (10, [1, 3], [100, 100], [3, 7]),
+    (10, [1, 1, 1], [100, 1, 100], [5, 1, 4]),
+    (7, [2, 1, 1], [1, 2, 100], [1, 2, 4]),
+    (0, [1, 2], [5, 5], [0, 0]),
+    (10, [5, 5], [5, 5], [5, 5]),
+])
+def test_apportion(total, weights, caps, shares):
+    assert _apportion(total, weights, caps) == shares
+
+
+def _sample_session(**kwargs):
+    if 'sample_request1' not in blocks.REQUESTS:
+        s_initialize('sample_request1')
+        s_string('sample', name='string1')
+        s_mutant(b'A', name='mutant11', mutations=[bytes([i]) for i in range(200)])
+        s_initialize('sample_request2')
+        s_string('sample', name='string2', mutation_types=('instance', 'format'))
+    session = Session(**kwargs)
+    session.connect(s_get('sample_request1'))
+    session.connect(s_get('sample_request1'), s_get('sample_request2'))
+    return session
+
+
+def test_sample_scheduler():
+    session = _sample_session(sample_budget=60, sample_seed=5)
+    scheduler = session.scheduler
+    test_cases = [(test_case.id, test_case.request.mutant.name, test_case.request.mutant.mutant_index)
+                  for test_case in session.scheduled_test_case_iterator()]
+    ids = [test_case_id for test_case_id, _, _ in test_cases]
+    assert len(ids) == 60 and ids == sorted(set(ids))
+    assert all(scheduler.position_of(test_case_id) == position for position, test_case_id in enumerate(ids))
+
+    # Every mutant gets its share, and every mutation type of the strings is sampled
+    mutants = [name for _, name, _ in test_cases]
+    assert [mutants.count(name) for name in ('string1', 'mutant11', 'string2')] == [20, 20, 20]
+    string1_indexes = [mutant_index for _, name, mutant_index in test_cases if name == 'string1']
+    bucket_start = 0
+    for mutation_type, size in s_get('sample_request1').names['string1'].mutation_buckets():
+        assert any(bucket_start < mutant_index <= bucket_start + size for mutant_index in string1_indexes), \
+            mutation_type
+        bucket_start += size
+
+    # Deterministic for the same seed
+    other = _sample_session(sample_budget=60, sample_seed=5)
+    other.scheduler.schedule(other)
+    assert [other.scheduler.test_case_id(i) for i in range(60)] == ids
+    other = _sample_session(sample_budget=60, sample_seed=6)
+    other.scheduler.schedule(other)
+    assert [other.scheduler.test_case_id(i) for i in range(60)] != ids
+
+
+def test_sample_scheduler_weights():
+    session = _sample_session(sample_budget=40, sample_weights=['String=3', 'sample_request2=0'])
+    mutants = [test_case.request.mutant.name for test_case in session.scheduled_test_case_iterator()]
+    assert mutants.count('string1') == 30 and mutants.count('mutant11') == 10 and 'string2' not in mutants
+
+    # The budget is capped by the test cases of the mutants
+    session = _sample_session(sample_budget=10 ** 6)
+    session.scheduler.schedule(session)
+    assert len(session.scheduler) == session.num_mutations
+    with pytest.raises(FuzzowskiRuntimeError):
+        _sample_session(sample_budget=10, scheduler=RoundRobinScheduler())
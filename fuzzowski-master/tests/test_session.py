@@ -1,5 +1,6 @@
 from fuzzowski.mutants.spike import *
 from fuzzowski.session import Session
+from fuzzowski.helpers.bloom_filter import BloomFilter
 import pytest
 import os
 
@@ -139,3 +140,543 @@ def test_session_movements():
     assert session.suspects[6] == test_case
 
 
+
+
+def test_session_goto_random_access():
+    s_initialize('goto_request1')
+    s_mutant(b'A', name='mutant11', mutations=[b'B', b'C', b'D'])
+    with s_block('goto_b0'):
+        s_mutant(b'W', name='mutant12', mutations=[b'X', b'Y', b'Z'])
+        s_static(b' ')
+    s_initialize('goto_request2')
+    s_mutant(b'1', name='mutant21', mutations=[b'2', b'3'])
+    s_initialize('goto_request3')
+    s_mutant(b'a', name='mutant31', mutations=[b'b', b'c', b'd', b'e'])
+
+    session = Session()
+    session.connect(s_get('goto_request1'))
+    session.connect(s_get('goto_request1'), s_get('goto_request2'))
+    session.connect(s_get('goto_request1'), s_get('goto_request3'))
+
+    session.goto(1)
+    sequential = [(session.test_case.request.name, session.test_case.request.render())]
+    while session.next() is not None and session.test_case.id != 1:
+        sequential.append((session.test_case.request.name, session.test_case.request.render()))
+    assert len(sequential) == session.num_mutations == 6 + 2 + 6 + 4
+
+    for test_case_id in reversed(range(1, session.num_mutations + 1)):
+        test_case = session.goto(test_case_id)
+        assert test_case.id == session.mutant_index == test_case_id
+        assert (test_case.request.name, test_case.request.render()) == sequential[test_case_id - 1]
+        if test_case_id < session.num_mutations:
+            next_case = session.next()
+            assert next_case.id == test_case_id + 1
+            assert (next_case.request.name, next_case.request.render()) == sequential[test_case_id]
+
+    # Movements by mutant go straight to the first test case of the mutant
+    assert session.goto('goto_request1.mutant12').id == 4
+    assert session.goto('goto_request1.goto_b0').id == 4
+    assert session.goto('goto_request3').id == 15
+    session.goto(2)
+    assert session.skip().id == 4
+    assert session.skip().id == 7
+    session.goto(session.num_mutations - 1)
+    assert session.skip().id == 1
+
+
+def test_session_combination():
+    s_initialize('combination_request1')
+    s_mutant(b'A', name='mutant11', mutations=[b'B', b'C', b'D'])
+    s_mutant(b'W', name='mutant12', mutations=[b'X', b'Y', b'Z'])
+    s_mutant(b'1', name='mutant13', mutations=[b'2'])
+    s_initialize('combination_request2')
+    s_mutant(b'a', name='mutant21', mutations=[b'b', b'c'])
+    s_mutant(b'z', name='mutant22', mutations=[b'y'])
+
+    session = Session(combination_strength=2, combination_mutants=['combination_request1.mutant11',
+                                                                   'combination_request1.mutant12'])
+    session.connect(s_get('combination_request1'))
+    session.connect(s_get('combination_request1'), s_get('combination_request2'))
+    r1 = s_get('combination_request1')
+    r2 = s_get('combination_request2')
+    assert r1.combinations is not None and r2.combinations is None
+    assert session.num_mutations == 4 * 4 + 3
+    assert {(m[0], m[1]) for m in r1} == {(a, b) for a in b'ABCD' for b in b'WXYZ'} and len(list(r1)) == 16
+
+    session.goto(3)
+    assert session.skip().id == 17  # The rest of the combinations are skipped
+    assert session.test_case.request == r2
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    assert sum(bloom.add(b'item%d' % i) for i in range(1000)) == len(bloom) > 980
+    assert all(b'item%d' % i in bloom for i in range(1000))
+    assert not bloom.add(b'item1')
+    assert sum(b'other%d' % i in bloom for i in range(10000)) < 300
+    assert BloomFilter(10 ** 9, max_bytes=1024).num_bits == 1024 * 8
+
+
+def test_session_deduplicate():
+    s_initialize('dedup_request1')
+    s_mutant(b'A', name='mutant11', mutations=[b'B', b'AX', b''])
+    s_mutant(b'W', name='mutant12', mutations=[b'XW', b'', b'Y'])
+    s_initialize('dedup_request2')
+    s_mutant(b'1', name='mutant21', mutations=[b'2', b'2'])
+
+    session = Session(deduplicate=True)
+    session.connect(s_get('dedup_request1'))
+    session.connect(s_get('dedup_request1'), s_get('dedup_request2'))
+    sent = []
+    session.run = lambda: sent.append((session.test_case.id, session.test_case.request.render())) or True
+    session.goto(1)
+    session.is_paused = False
+    while not session.is_paused:
+        session.run_next()
+    assert sent == [(1, b'BW'), (2, b'AXW'), (3, b'W'), (5, b'A'), (6, b'AY'), (7, b'2')]
+    assert session.duplicates_skipped == 2
+
+    # The payloads sent are kept in the session state
+    state = session.save_session_state()
+    session = Session(deduplicate=True)
+    session.connect(s_get('dedup_request1'))
+    session.connect(s_get('dedup_request1'), s_get('dedup_request2'))
+    session.load_session_state(state)
+    assert session.duplicates_skipped == 2 and session.sent_payloads is state['sent_payloads']
+
+
+def test_session_deduplicate_sizing():
+    s_initialize('dedup_size_request1')
+    s_mutant(b'A', name='mutant11', mutations=[b'B', b'C'])
+    s_initialize('dedup_size_request2')
+    s_mutant(b'1', name='mutant21', mutations=[b'2', b'3', b'4'])
+
+    session = Session(deduplicate=True, fuzz_loggers=[])
+    session.connect(s_get('dedup_size_request1'))
+    warnings = []
+    session.logger.log_warn = warnings.append
+    session.goto(1)
+    session.is_paused = True
+    session.run_all()  # The filter is sized when the session starts iterating, even if it is paused
+    assert session.sent_payloads.capacity == 2
+
+    # It can not be resized: the graph growing over its capacity is warned once
+    session.connect(s_get('dedup_size_request1'), s_get('dedup_size_request2'))
+    session.run_all()
+    session.run_all()
+    assert session.sent_payloads.capacity == 2 and len(warnings) == 1 and 'sized for 2' in warnings[0]
+
+
+def test_session_take_next_in_flight_duplicate():
+    s_initialize('dedup_in_flight')
+    s_mutant(b'A', name='mutant', mutations=[b'B', b'B'])
+    session = Session(deduplicate=True, fuzz_loggers=[])
+    session.connect(s_get('dedup_in_flight'))
+    messages = []
+    session.logger.log_info = messages.append
+    session.goto(1)
+    taken, _ = session._take_next()
+    skipped, _ = session._take_next()
+    assert taken is not None and skipped is None and session.duplicates_skipped == 1
+    assert 'being sent by another test case' in messages[-1]
+
+    session._mark_sent(taken)
+    session.goto(2)
+    session._take_next()
+    assert session.duplicates_skipped == 2 and 'already sent' in messages[-1]
+
+
+def test_session_fuzz_requests_once():
+    for name, mutations in (('once_a', [b'A1', b'A2']), ('once_b', [b'B1']), ('once_c', [b'C1', b'C2', b'C3']),
+                            ('once_d', [b'D1'])):
+        s_initialize(name)
+        s_mutant(name.encode(), name='mutant', mutations=mutations)
+
+    def session_with(**kwargs):
+        session = Session(**kwargs)
+        session.connect(s_get('once_a'))
+        session.connect(s_get('once_a'), s_get('once_b'))
+        session.connect(s_get('once_a'), s_get('once_c'))
+        session.connect(s_get('once_b'), s_get('once_d'))
+        session.connect(s_get('once_c'), s_get('once_d'))
+        return session
+
+    # Paths: once_a->once_b->once_d and once_a->once_c->once_d
+    assert session_with().num_mutations == 2 + 1 + 1 + 2 + 3 + 1
+    session = session_with(fuzz_requests_once=True)
+    assert session.num_mutations == 2 + 1 + 3 + 1
+    test_cases = [(test_case.id, test_case.path_name) for test_case in session.test_case_iterator()]
+    assert test_cases == [(1, '[once_a]->once_b->once_d'), (2, '[once_a]->once_b->once_d'),
+                          (3, 'once_a->[once_b]->once_d'), (4, 'once_a->once_b->[once_d]'),
+                          (5, 'once_a->[once_c]->once_d'), (6, 'once_a->[once_c]->once_d'),
+                          (7, 'once_a->[once_c]->once_d')]
+    assert session.goto(6).request.render() == b'C2'
+    assert session.goto('once_d').id == 4
+
+    session = session_with(fuzz_requests_once=True, canonical_paths=['once_a->once_c->once_d'])
+    assert [test_case.path_name for test_case in session.test_case_iterator()] == [
+        'once_a->[once_b]->once_d', '[once_a]->once_c->once_d', '[once_a]->once_c->once_d',
+        'once_a->[once_c]->once_d', 'once_a->[once_c]->once_d', 'once_a->[once_c]->once_d',
+        'once_a->once_c->[once_d]']
+    with pytest.raises(FuzzowskiRuntimeError):
+        session_with(fuzz_requests_once=True, canonical_paths=['once_a->once_d']).start()
+
+
+def test_session_cached_num_mutations(monkeypatch):
+    s_initialize('count_request1')
+    s_mutant(b'A', name='mutant11', mutations=[b'B', b'C', b'D'])
+    s_mutant(b'W', name='mutant12', mutations=[b'X', b'Y'])
+    s_initialize('count_request2')
+    s_mutant(b'1', name='mutant21', mutations=[b'2'])
+    s_initialize('count_request3')
+    s_mutant(b'Z', name='mutant31', mutations=[b'Y'])
+
+    session = Session()
+    session.connect(s_get('count_request1'))
+    session.connect(s_get('count_request1'), s_get('count_request2'))
+    assert session.num_mutations == session.total_mutations == session.num_enabled_mutations == 6
+    other_session = Session()
+    other_session.connect(s_get('count_request3'))
+    assert other_session.num_mutations == 1
+
+    # The graph is only walked again when it changes, the changes of the mutants update the totals
+    walks = []
+    test_case_slots = session._test_case_slots
+    monkeypatch.setattr(session, '_test_case_slots', lambda: walks.append(1) or test_case_slots())
+    other_counts = dict(other_session._request_counts)
+    assert session.num_mutations == 6 and session.num_mutations == 6 and len(walks) == 0
+    session.disable_by_path_name('count_request1.mutant12')
+    assert session.num_mutations == 6 and session.num_enabled_mutations == 4
+    session.disable_by_path_name('count_request2')
+    assert session.num_enabled_mutations == 3
+    session.disable_by_path_name('count_request1.mutant12', disable=False)
+    session.disable_by_path_name('count_request2', disable=False)
+    assert session.num_enabled_mutations == 6 and len(walks) == 0
+
+    # The changes of other requests do not invalidate the counts of a session
+    assert other_session.num_mutations == 1 and other_session._request_counts == other_counts
+
+    session.connect(s_get('count_request3'))
+    assert session.num_mutations == 7 and len(walks) == 1
+
+
+def test_session_in_flight():
+    import socketserver
+    import threading
+    import time
+    from fuzzowski import Target, SocketConnection
+
+    received = []
+
+    class DelayedReplyHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            data = self.request.recv(1024)
+            received.append(data)
+            time.sleep(0.05)
+            self.request.sendall(b'OK ' + data)
+
+    class Server(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        request_queue_size = 64  # The connections of the test cases in flight are not dropped
+
+    server = Server(('127.0.0.1', 0), DelayedReplyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    s_initialize('in_flight_request')
+    s_mutant(b'A', name='mutant', mutations=[bytes([65 + i]) * 2 for i in range(24)])
+
+    def run_all(**kwargs):
+        connection = SocketConnection('127.0.0.1', server.server_address[1], proto='tcp', recv_timeout=2.0)
+        session = Session(target=Target(connection), fuzz_loggers=[], **kwargs)
+        session.connect(s_get('in_flight_request'))
+        session.goto(1)
+        session.is_paused = False
+        start = time.monotonic()
+        session.run_all()
+        return session, time.monotonic() - start
+
+    try:
+        session, sequential_time = run_all()
+        assert sorted(received) == sorted(bytes([65 + i]) * 2 for i in range(24))
+        received.clear()
+        session, in_flight_time = run_all(in_flight=8)
+        assert sorted(received) == sorted(bytes([65 + i]) * 2 for i in range(24))
+        assert in_flight_time < sequential_time / 3
+        # The results are collected in order, and the session goes back to the first test case when exhausted
+        assert [test_case.id for test_case in session.latest_tests] == list(range(24, 0, -1))
+        assert session.is_paused and session.test_case.id == 1 and not session.suspects
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    with pytest.raises(FuzzowskiRuntimeError):
+        Session(in_flight=4, sleep_time=1.0)
+
+
+def test_session_in_flight_deduplicate():
+    import socketserver
+    import threading
+    from fuzzowski import Target, SocketConnection
+
+    received = []
+
+    class ReplyHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            data = self.request.recv(1024)
+            received.append(data)
+            self.request.sendall(b'OK ' + data)
+
+    class Server(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        request_queue_size = 64
+
+    server = Server(('127.0.0.1', 0), ReplyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    s_initialize('in_flight_dedup_request')
+    s_mutant(b'A', name='mutant', mutations=[b'BB', b'BB', b'CC', b'BB', b'CC', b'DD'])
+    try:
+        connection = SocketConnection('127.0.0.1', server.server_address[1], proto='tcp', recv_timeout=2.0)
+        session = Session(target=Target(connection), fuzz_loggers=[], deduplicate=True, in_flight=8)
+        session.connect(s_get('in_flight_dedup_request'))
+        session.goto(1)
+        session.is_paused = False
+        session.run_all()
+
+        # The duplicates are in flight at the same time, they are skipped before the first one is collected
+        assert sorted(received) == [b'BB', b'CC', b'DD']
+        assert session.duplicates_skipped == 3
+        assert not session._payloads_taken
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_session_take_next_mutant_info():
+    s_initialize('take_next_mutant_info')
+    s_mutant(b'A', name='mutant', mutations=[b'B'])
+    s_string('S', name='string')
+    session = Session(fuzz_loggers=[])
+    session.connect(s_get('take_next_mutant_info'))
+    session.goto(1)
+    test_case, _ = session._take_next()
+
+    # The session went on to the next mutant, the test case logs the one it fuzzes
+    assert session.test_case.request.mutant.name == 'string'
+    assert test_case.mutant_info == "Type: Mutant. Default value: b'A'"
+
+
+def test_async_runner_case_timeout_and_monitors():
+    import socketserver
+    import threading
+    import time
+    from fuzzowski import Target, SocketConnection
+    from fuzzowski.exception import FuzzowskiTargetRecvTimeout
+
+    class ReplyHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            data = self.request.recv(1024)
+            time.sleep(1.0 if data == b'SLOW' else 0)
+            self.request.sendall(b'OK ' + data)
+
+    class Server(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        request_queue_size = 64
+
+    class BlockingMonitor(object):
+        threads = set()
+
+        def run(self, test_case):
+            self.threads.add(threading.current_thread())
+            time.sleep(0.05)
+
+    server = Server(('127.0.0.1', 0), ReplyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    s_initialize('case_timeout_request')
+    s_mutant(b'A', name='mutant', mutations=[b'FAST', b'SLOW', b'FAST'])
+    try:
+        connection = SocketConnection('127.0.0.1', server.server_address[1], proto='tcp', recv_timeout=2.0)
+        session = Session(target=Target(connection), fuzz_loggers=[], in_flight=4, case_timeout=0.3,
+                          check_data_received_each_request=True)
+        session.monitors.append(BlockingMonitor())
+        session.connect(s_get('case_timeout_request'))
+        session.goto(1)
+        session.is_paused = False
+        session.run_all()
+
+        # The test case that timed out has an error and is a suspect
+        slow = [test_case for test_case in session.latest_tests if test_case.id == 2][0]
+        assert len(slow.errors) == 1 and isinstance(slow.errors[0], FuzzowskiTargetRecvTimeout)
+        assert list(session.suspects) == [2]
+        # The monitors do not block the event loop
+        assert threading.main_thread() not in BlockingMonitor.threads and len(session.latest_tests) == 3
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_async_runner_suspects():
+    from fuzzowski import Target, SocketConnection
+    from fuzzowski.async_runner import AsyncRunner, _AsyncTestCase
+
+    s_initialize('suspects_request')
+    s_mutant(b'A', name='mutant', mutations=[b'B', b'C', b'D', b'E', b'F'])
+    session = Session(target=Target(SocketConnection('127.0.0.1', 1)), fuzz_loggers=[], crash_threshold_element=10,
+                      crash_threshold_request=10)
+    session.connect(s_get('suspects_request'))
+    runner = AsyncRunner(session, in_flight=4)
+
+    def case(test_case_id, sent_at, finished_at):
+        async_case = _AsyncTestCase(session.goto(test_case_id), [])
+        async_case.sent_at, async_case.finished_at = sent_at, finished_at
+        runner._recent.append(async_case)
+        return async_case
+
+    case(1, 1.0, 2.0)  # Finished before the last connection, not a suspect
+    case(2, 2.5, 4.0)
+    case(3, 3.5, 3.8)
+    failed = case(4, None, 6.0)
+    case(5, 6.5, 7.0)  # Sent after the failure
+    failed.connect_error = FuzzowskiRuntimeError('down')
+    failed.connect_failed_at, failed.last_connect_before_failure = 6.0, 3.0
+    runner._add_suspects(failed)
+    assert sorted(session.suspects) == [2, 3]
+
+
+def test_async_runner_responses():
+    from fuzzowski import Target, SocketConnection, RegexResponse
+    from fuzzowski.async_runner import AsyncRunner
+
+    s_initialize('async_create_job')
+    s_mutant(b'create', name='mutant', mutations=[b'B', b'C'])
+    s_response(RegexResponse, name='async_job_id', required_vars=['async_job_id'], optional_vars=[],
+               regex_list=[b'id=(?P<async_job_id>[0-9]+)'])
+    s_initialize('async_send_uri')
+    s_static(b'send ')
+    s_variable('async_job_id', b'0')
+    s_mutant(b'uri', name='mutant', mutations=[b'B', b'C'])
+
+    # A Response in the last request of the paths is parsed after the payloads are rendered
+    session = Session(target=Target(SocketConnection('127.0.0.1', 1)), fuzz_loggers=[])
+    session.connect(s_get('async_create_job'))
+    AsyncRunner(session, in_flight=4)
+
+    # The requests after a Response use the variables it sets, they can not be rendered before it is parsed
+    session.connect(s_get('async_create_job'), s_get('async_send_uri'))
+    with pytest.raises(FuzzowskiRuntimeError):
+        AsyncRunner(session, in_flight=4)
+
+
+def test_session_parallel_targets():
+    import socket
+    import socketserver
+    import threading
+    import time
+    from fuzzowski import Target, SocketConnection
+
+    received = {}
+
+    class DelayedReplyHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            data = self.request.recv(1024)
+            received.setdefault(self.server.server_address[1], []).append(data)
+            time.sleep(0.05)
+            self.request.sendall(b'OK ' + data)
+
+    class Server(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+
+    servers = [Server(('127.0.0.1', 0), DelayedReplyHandler) for _ in range(3)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)  # A port where nothing listens
+    closed.bind(('127.0.0.1', 0))
+    closed_port = closed.getsockname()[1]
+
+    s_initialize('parallel_request')
+    s_mutant(b'A', name='mutant', mutations=[bytes([65 + i]) * 2 for i in range(12)])
+
+    def session_with(ports):
+        session = Session(fuzz_loggers=[], restart_sleep_time=0.1)
+        for port in ports:
+            session.add_target(Target(SocketConnection('127.0.0.1', port, proto='tcp', recv_timeout=2.0)))
+        session.connect(s_get('parallel_request'))
+        session.goto(1)
+        session.is_paused = False
+        return session
+
+    try:
+        session = session_with([server.server_address[1] for server in servers])
+        assert session.target is session.targets[0] and len(session.targets) == 3
+        start = time.monotonic()
+        session.run_all()
+        assert time.monotonic() - start < 12 * 0.05
+        # Every test case runs once, in one of the targets, and all the targets run test cases
+        assert sorted(data for port_received in received.values() for data in port_received) == \
+            sorted(bytes([65 + i]) * 2 for i in range(12))
+        assert len(received) == 3
+        assert sorted(test_case.id for test_case in session.latest_tests) == list(range(1, 13))
+        assert session.is_paused and session.test_case.id == 1
+
+        # A target that is down waits to recover while the others go on, the session goes back to its test case
+        session = session_with([servers[0].server_address[1], closed_port])
+        threading.Timer(1.0, lambda: setattr(session, 'is_paused', True)).start()
+        session.run_all()
+        assert session.is_paused
+        not_run = session.test_case.id
+        assert sorted(test_case.id for test_case in session.latest_tests if test_case.target is session.target) \
+            == [test_case_id for test_case_id in range(1, 13) if test_case_id != not_run]
+    finally:
+        closed.close()
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+def test_session_parallel_targets_responses():
+    from fuzzowski import Target, SocketConnection, RegexResponse
+
+    s_initialize('parallel_create_job')
+    s_mutant(b'create', name='mutant', mutations=[b'B', b'C'])
+    s_response(RegexResponse, name='parallel_job_id', required_vars=['parallel_job_id'], optional_vars=[],
+               regex_list=[b'id=(?P<parallel_job_id>[0-9]+)'])
+    s_initialize('parallel_send_uri')
+    s_static(b'send ')
+    s_variable('parallel_job_id', b'0')
+    s_mutant(b'uri', name='mutant', mutations=[b'B', b'C'])
+
+    session = Session(fuzz_loggers=[])
+    for port in (1, 2):
+        session.add_target(Target(SocketConnection('127.0.0.1', port)))
+    session.connect(s_get('parallel_create_job'))
+    session.connect(s_get('parallel_create_job'), s_get('parallel_send_uri'))
+    session.goto(1)
+    session.is_paused = False
+
+    # send_uri would be rendered with the job id parsed in any target, maybe before create_job was answered
+    with pytest.raises(FuzzowskiRuntimeError):
+        session.run_all()
+
+
+def test_session_add_last_case_as_suspect_parallel():
+    from fuzzowski import Target, SocketConnection
+
+    s_initialize('parallel_suspect_request')
+    s_mutant(b'A', name='mutant', mutations=[b'B', b'C', b'D'])
+    session = Session(fuzz_loggers=[])
+    targets = [Target(SocketConnection('127.0.0.1', 1)), Target(SocketConnection('127.0.0.1', 2))]
+    for target in targets:
+        session.add_target(target)
+    session.connect(s_get('parallel_suspect_request'))
+    for test_case_id, target in ((1, targets[0]), (2, targets[1]), (3, targets[0])):
+        test_case = session.goto(test_case_id)
+        test_case.target = target
+        session.add_latest_test(test_case)
+
+    # The suspect is the latest test case of the target that failed, once
+    session.add_last_case_as_suspect(FuzzowskiRuntimeError('down'), targets[1])
+    session.add_last_case_as_suspect(FuzzowskiRuntimeError('down'), targets[1])
+    assert list(session.suspects) == [2]
+    session.add_last_case_as_suspect(FuzzowskiRuntimeError('down'), targets[0])
+    assert sorted(session.suspects) == [2, 3]
@@ -0,0 +1,242 @@
+import socket
+import time
+
+import pytest
+
+from fuzzowski import SocketConnection, Target, Session, FuzzowskiRuntimeError, LITTLE_ENDIAN
+from fuzzowski.connections.rtt_estimator import RttEstimator
+from fuzzowski.connections.completion import FixedLength, LengthPrefix, ContentLength, Delimiter, RegexMatch, \
+    PeerClose, completion_from_string
+from fuzzowski.connections.socket_connection import _truncate_segments, _coalesce_segments
+from fuzzowski.mutants.mutation_library import RepeatedSequence
+
+
+def test_truncate_segments():
+    segments = [b'abc', b'defg', b'hi']
+    not_truncated = _truncate_segments(segments, 100)
+    assert not_truncated == segments and all(a is b for a, b in zip(not_truncated, segments))
+    truncated = _truncate_segments(segments, 5)
+    assert truncated[0] is segments[0]
+    assert isinstance(truncated[1], memoryview) and truncated[1].obj is segments[1]
+    assert b''.join(truncated) == b'abcde'
+
+    # Repeated segments are given in chunks only up to the limit
+    truncated = _truncate_segments([b'abc', RepeatedSequence(b'xy', 1000000)], 8)
+    assert b''.join(truncated) == b'abcxyxyx' and len(truncated) == 2
+
+
+def test_coalesce_segments():
+    big = b'B' * 5000
+    segments = [b'a', b'', b'b', big, b'c', b'd']
+    assert _coalesce_segments(segments, 10) == [b'a', b'b', big, b'c', b'd']
+    coalesced = _coalesce_segments(segments, 3)
+    assert coalesced == [b'ab', big, b'cd'] and coalesced[1] is big
+    assert _coalesce_segments(segments, 2) == [b'ab' + big + b'cd']
+
+
+def test_send_segments_tcp():
+    connection = SocketConnection('127.0.0.1', 1337, proto='tcp')
+    connection._sock, peer = socket.socketpair()
+    try:
+        assert connection.send_segments([b'abc', memoryview(b'defg'), b'']) == 7
+        assert peer.recv(100) == b'abcdefg'
+    finally:
+        connection.close()
+        peer.close()
+
+
+def test_target_send_segments_log():
+    from fuzzowski.connections.target import LOG_SEND_MAX_BYTES
+    from fuzzowski.loggers import FuzzLoggerBuffer
+
+    connection = SocketConnection('127.0.0.1', 1337, proto='tcp')
+    connection._sock, peer = socket.socketpair()
+    buffer = FuzzLoggerBuffer()
+    target = Target(connection)
+    target.set_fuzz_data_logger(buffer)
+    big = b'B' * LOG_SEND_MAX_BYTES
+    try:
+        # Only a bounded prefix of the data is logged, the segments are not joined to log them
+        target.send_segments([b'abc', big, b'def'])
+        assert peer.recv(2 * LOG_SEND_MAX_BYTES) == b'abc' + big + b'def'
+        (_, send), (_, info) = buffer._entries
+        assert send == {'data': b'abc' + big[:-3]}
+        assert str(LOG_SEND_MAX_BYTES + 6) in info['description'] and '3 segments' in info['description']
+    finally:
+        connection.close()
+        peer.close()
+
+
+def test_send_segments_udp_truncated():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    connection = SocketConnection('127.0.0.1', receiver.getsockname()[1], proto='udp')
+    connection.open()
+    max_payload = connection.MAX_PAYLOADS['udp']
+    try:
+        connection.MAX_PAYLOADS['udp'] = 6
+        assert connection.send_segments([b'abc', b'defg', b'hi']) == 6
+        assert receiver.recv(100) == b'abcdef'
+    finally:
+        connection.MAX_PAYLOADS['udp'] = max_payload
+        connection.close()
+        receiver.close()
+
+
+def test_completions():
+    assert not FixedLength(4).is_complete(b'abc') and FixedLength(4).is_complete(b'abcd')
+
+    mbap = LengthPrefix(4, 2)  # MODBUS/TCP: the length counts the unit id and the PDU
+    reply = b'\x00\x01\x00\x00\x00\x05\xff\x01\x02\x00\x00'
+    assert not mbap.is_complete(reply[:5]) and not mbap.is_complete(reply[:-1]) and mbap.is_complete(reply)
+    assert LengthPrefix(0, 2, LITTLE_ENDIAN, adjust=-2).is_complete(b'\x04\x00ab')
+
+    http = ContentLength()
+    headers = b'HTTP/1.1 200 OK\r\ncontent-length: 4\r\n\r\n'
+    assert not http.is_complete(headers[:-2]) and not http.is_complete(headers + b'abc')
+    assert http.is_complete(headers + b'abcd')
+    chunked = b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n4\r\nabcd\r\n'
+    assert not http.is_complete(chunked) and http.is_complete(chunked + b'0\r\n\r\n')
+    assert not http.is_complete(b'HTTP/1.0 200 OK\r\n\r\nabcd')  # Until the connection is closed
+
+    assert Delimiter(b'>').is_complete(b'a>b') and not Delimiter(b'>', at_end=True).is_complete(b'a>b')
+    assert RegexMatch(rb'\d+ OK').is_complete(b'x 12 OK') and not RegexMatch(rb'\d+ OK').is_complete(b'OK')
+    assert not PeerClose().is_complete(b'abc')
+
+
+def test_completion_from_string():
+    assert completion_from_string('length:4').length == 4
+    prefix = completion_from_string('prefix:4:2:1:little')
+    assert (prefix.offset, prefix.size, prefix.adjust, prefix.endian) == (4, 2, 1, LITTLE_ENDIAN)
+    assert isinstance(completion_from_string('http'), ContentLength)
+    assert completion_from_string('delim:\\r\\n\\r\\n').delimiter == b'\r\n\r\n'
+    assert completion_from_string('regex:a+').is_complete(b'baa')
+    assert isinstance(completion_from_string('close'), PeerClose)
+    for spec in ('length:x', 'length:0', 'prefix:4', 'prefix:4:2:0:middle', 'delim:', 'regex:(', 'other'):
+        with pytest.raises(FuzzowskiRuntimeError):
+            completion_from_string(spec)
+
+
+def test_recv_all_completions():
+    connection = SocketConnection('127.0.0.1', 1337, proto='tcp', recv_timeout=0.2)
+    connection._sock, peer = socket.socketpair()
+    connection._sock.settimeout(0.2)
+    try:
+        peer.sendall(b'\x00\x01\x00\x00\x00\x02\xff\x01')
+        assert connection.recv_all(100, completions=[Delimiter(b'\r\n'), LengthPrefix(4, 2)]) == \
+            b'\x00\x01\x00\x00\x00\x02\xff\x01'
+        # Without completions, the data is received until the timeout expires or the peer closes the connection
+        peer.sendall(b'abc')
+        assert connection.recv_all(100) == b'abc'
+        peer.sendall(b'abc')
+        peer.shutdown(socket.SHUT_WR)
+        assert connection.recv_all(100, completions=[PeerClose()]) == b'abc'
+    finally:
+        connection.close()
+        peer.close()
+
+
+def test_rtt_estimator():
+    estimator = RttEstimator(floor=0.01, ceiling=1.0, outlier_factor=4.0)
+    assert estimator.timeout is None
+    estimator.add_sample(0.1)
+    assert (estimator.srtt, estimator.rttvar) == (0.1, 0.05)
+    assert estimator.timeout == pytest.approx(0.3)
+    estimator.add_sample(0.1)
+    assert estimator.srtt == pytest.approx(0.1) and estimator.rttvar == pytest.approx(0.0375)
+    estimator.add_sample(100)  # Outlier, counted as 4 * SRTT
+    assert estimator.srtt == pytest.approx(0.1375) and estimator.samples == 3
+    for _ in range(100):
+        estimator.add_sample(0.0001)
+    assert estimator.timeout == 0.01  # Floor
+    for _ in range(100):
+        estimator.add_sample(10)
+    assert estimator.timeout == 1.0  # Ceiling
+    with pytest.raises(FuzzowskiRuntimeError):
+        RttEstimator(floor=2, ceiling=1)
+
+
+def test_target_adaptive_timeout():
+    connection = SocketConnection('127.0.0.1', 1337, proto='tcp', recv_timeout=1.0)
+    target = Target(connection, adaptive_timeout=True, timeout_floor=0.05, timeout_ceiling=1.0)
+    assert Target(connection).rtt_estimator('request') is None
+    connection._sock, peer = socket.socketpair()
+    connection._sock.settimeout(1.0)
+    try:
+        target.send(b'ping')
+        peer.sendall(b'pong')
+        start = time.monotonic()
+        assert target.recv_all(100, request_name='request') == b'pong'
+        assert time.monotonic() - start >= 0.9  # Not learned yet, the recv timeout of the connection
+        estimator = target.rtt_estimators['request']
+        assert estimator.samples == 1 and estimator.timeout == 0.05
+
+        target.send(b'ping')
+        peer.sendall(b'pong')
+        start = time.monotonic()
+        assert target.recv_all(100, request_name='request') == b'pong'
+        assert time.monotonic() - start < 0.5 and estimator.samples == 2
+        assert connection._sock.gettimeout() == 1.0  # Restored
+
+        target.send(b'ping')
+        assert target.recv_all(100, request_name='request') == b''  # No reply, no sample
+        assert estimator.samples == 2
+    finally:
+        connection.close()
+        peer.close()
+
+    session = Session(target=target)
+    state = session.save_session_state()
+    assert state['rtt_estimates'] == {'request': (estimator.srtt, estimator.rttvar, 2)}
+    other_target = Target(SocketConnection('127.0.0.1', 1337, proto='tcp'), adaptive_timeout=True)
+    Session(target=other_target).load_session_state(state)
+    assert other_target.rtt_estimators['request'].timeout == estimator.timeout
+
+
+def test_is_alive():
+    connection = SocketConnection('127.0.0.1', 1337, proto='tcp')
+    connection._sock, peer = socket.socketpair()
+    connection._sock.settimeout(0.2)
+    try:
+        assert connection.is_alive()
+        peer.sendall(b'late reply')
+        assert connection.is_alive()  # The data left is discarded
+        peer.sendall(b'reply')
+        assert connection.recv_all(100, completions=[FixedLength(5)]) == b'reply'
+        peer.close()
+        assert not connection.is_alive()
+    finally:
+        connection.close()
+    assert not connection.is_alive()
+
+
+def test_target_reuse_connection():
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(4)
+    listener.settimeout(1.0)
+    connection = SocketConnection('127.0.0.1', listener.getsockname()[1], proto='tcp', recv_timeout=1.0)
+    target = Target(connection, reuse_connection=True)
+    Session(target=target)  # Sets the logger
+    try:
+        target.open()
+        peer, _ = listener.accept()
+        sock = connection._sock
+        target.send(b'a')
+        target.release()
+        target.open()
+        assert connection._sock is sock  # Reused
+        target.send(b'b')
+        assert peer.recv(10) == b'ab'
+
+        peer.close()  # The target closes the connection, it is opened again
+        target.release()
+        target.open()
+        assert connection._sock is not sock
+        peer, _ = listener.accept()
+        target.send(b'c')
+        assert peer.recv(10) == b'c'
+        peer.close()
+    finally:
+        target.close()
+        listener.close()
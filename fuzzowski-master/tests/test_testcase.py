@@ -48,3 +48,27 @@ def test_testcase1():
     print(next(s_get('testcaserequest1')))
     test = TestCase(i, session, s_get('testcaserequest1'), path)
     assert test.name == '[testcaserequest1]->testcaserequest2.mutant11.2'
+
+
+def test_testcase_last_send():
+    s_initialize('testcase_last_send')
+    with s_block('b0'):
+        s_mutant(b'A', name='mutant', mutations=[b'B', b'C'])
+    s_size('b0', length=1, fuzzable=False)
+
+    class SegmentsTarget(object):
+        def send_segments(self, segments):
+            self.segments = segments
+
+    request = s_get('testcase_last_send')
+    session = Session(fuzz_loggers=[])
+    session.connect(request)
+    test = session.goto(1)
+    test.target = SegmentsTarget()
+    test.transmit(request, receive=False)
+
+    # last_send is the data sent, even after the request is rendered again
+    assert test.last_send_segments is test.target.segments
+    next(request)
+    request.render()
+    assert test.last_send == b'B\x01' and isinstance(test.last_send, bytes)